@@ -0,0 +1,67 @@
+"""Benchmark the chunked page cleaner against whole-page regex cleaning.
+
+Usage:
+    python benchmarks/bench_clean_content.py
+"""
+
+import random
+import re
+import time
+import tracemalloc
+
+from uncluttered.core.search import MAX_CONTENT_CHARS, _clean_content
+
+
+def whole_page_clean(text: str) -> str:
+    """The previous cleaner: three full passes over the page, then truncate."""
+    text = re.sub(r"https?://\S+", "", text)
+    text = re.sub(r"\n{3,}", "\n\n", text)
+    text = re.sub(r" {2,}", " ", text)
+    return text[:MAX_CONTENT_CHARS]
+
+
+def synthetic_page(size: int, seed: int = 0) -> str:
+    """Build a noisy page of roughly `size` characters with links and blank lines."""
+    rng = random.Random(seed)
+    parts = [
+        "Preheat the oven to 180C and whisk   the eggs.",
+        "\n\n\n\n",
+        "https://cdn.example.com/img/123.jpg",
+        "  Subscribe to our newsletter  ",
+        "2 cups flour\n1 tsp salt\n",
+    ]
+    chunks = []
+    total = 0
+    while total < size:
+        part = rng.choice(parts)
+        chunks.append(part)
+        total += len(part)
+    return "".join(chunks)
+
+
+def measure(fn, text: str) -> tuple[float, float]:
+    """Return (seconds, peak MiB allocated) for one call."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn(text)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 2**20
+
+
+def main() -> None:
+    print(f"{'page size':>10}  {'whole-page':>22}  {'chunked':>22}")
+    for size_mb in (0.05, 1, 10, 50):
+        text = synthetic_page(int(size_mb * 2**20))
+        assert _clean_content(text) == whole_page_clean(text)
+        old_s, old_mb = measure(whole_page_clean, text)
+        new_s, new_mb = measure(_clean_content, text)
+        print(
+            f"{size_mb:>8} MB  {old_s * 1000:>9.1f} ms {old_mb:>7.1f} MiB"
+            f"  {new_s * 1000:>9.1f} ms {new_mb:>7.1f} MiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Benchmark in-process page preprocessing against the worker-process pool.
+
+Usage:
+    python benchmarks/bench_preprocess.py [--pages N] [--page-mb M] [--workers W]
+"""
+
+import argparse
+import os
+import time
+
+from bench_clean_content import synthetic_page
+
+from uncluttered.core import search
+
+
+def run(pages: list[str], workers: int) -> float:
+    """Preprocess every page once and return the elapsed seconds."""
+    os.environ["PREPROCESS_WORKERS"] = str(workers)
+    start = time.perf_counter()
+    search.preprocess_pages(pages)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--page-mb", type=float, default=1.0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    args = parser.parse_args()
+
+    pages = [synthetic_page(int(args.page_mb * 2**20), seed=i) for i in range(args.pages)]
+    print(f"{args.pages} pages of {args.page_mb} MB, {args.workers} workers")
+
+    in_process = run(pages, workers=0)
+    run(pages[: args.workers], workers=args.workers)  # start and warm the pool
+    pooled = run(pages, workers=args.workers)
+    assert search.preprocess_pages(pages) == [search._preprocess(p) for p in pages]
+
+    print(f"in-process: {in_process * 1000:8.1f} ms")
+    print(f"pool:       {pooled * 1000:8.1f} ms  (pool reused across calls)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,39 @@
-"""Rich display utilities for the CLI."""
+"""Rich display utilities for the CLI.
 
-import sys
+Rich is imported on first use rather than with this module, so commands
+writing machine-readable output (see output.py) never load it.
+"""
 
-from rich.console import Console
-from rich.markdown import Markdown
-from rich.panel import Panel
-from rich.table import Table
+import sys
 
+from uncluttered.core.costs import ExtractionSummary
 from uncluttered.core.models import Recipe
+from uncluttered.core.screening import screening_rates
+
+_console = None
+
+
+def _get_console():
+    """Return the shared Rich console, importing Rich on first use."""
+    global _console
+    if _console is None:
+        from rich.console import Console
+
+        _console = Console()
+    return _console
+
+
+class _LazyConsole:
+    """Stands in for the Rich console until it is first used."""
 
-console = Console()
+    def __getattr__(self, name):
+        return getattr(_get_console(), name)
+
+
+console = _LazyConsole()
+
+# Returned by prompt_selection when the user asks for the next page
+NEXT_PAGE = 0
 
 
 def _score_color(score: int) -> str:
@@ -22,8 +46,14 @@ def _score_color(score: int) -> str:
         return "red"
 
 
-def print_search_results(recipes: list[Recipe], title: str | None = None) -> None:
-    """Render a Rich Table of recipes."""
+def print_search_results(
+    recipes: list[Recipe],
+    title: str | None = None,
+    similarities: list[float] | None = None,
+) -> None:
+    """Render a Rich Table of recipes, optionally with a similarity score per recipe."""
+    from rich.table import Table
+
     if not recipes:
         console.print("[dim]No recipes found.[/dim]")
         return
@@ -38,6 +68,8 @@ def print_search_results(recipes: list[Recipe], title: str | None = None) -> Non
     table.add_column("#", justify="right", width=3)
     table.add_column("Recipe", style="bold")
     table.add_column("Trust Score", justify="center", width=12)
+    if similarities is not None:
+        table.add_column("Similarity", justify="center", width=10)
 
     for i, recipe in enumerate(recipes, 1):
         score = recipe.trust_score.score if recipe.trust_score else 0
@@ -48,13 +80,19 @@ def print_search_results(recipes: list[Recipe], title: str | None = None) -> Non
         # Title on first line, slug below in dim
         recipe_cell = f"{recipe.title}\n[dim]{slug}[/dim]"
 
-        table.add_row(str(i), recipe_cell, score_display)
+        row = [str(i), recipe_cell, score_display]
+        if similarities is not None:
+            row.append(_percent(similarities[i - 1]))
+        table.add_row(*row)
 
     console.print(table)
 
 
 def print_recipe_detail(recipe: Recipe) -> None:
     """Render a detailed recipe view."""
+    from rich.markdown import Markdown
+    from rich.panel import Panel
+
     # Build ingredients list
     ingredients_md = "\n".join(
         f"- {ing.quantity} {ing.unit or ''} {ing.name}".strip() for ing in recipe.ingredients
@@ -118,6 +156,8 @@ _{recipe.description}_
 
 def print_search_terms(terms: list[tuple[str, int]]) -> None:
     """Render a numbered table of search terms with recipe counts."""
+    from rich.table import Table
+
     if not terms:
         console.print("[dim]No saved recipes yet.[/dim]")
         return
@@ -138,19 +178,80 @@ def print_search_terms(terms: list[tuple[str, int]]) -> None:
     console.print(table)
 
 
-def prompt_selection(count: int, label: str = "show") -> int | None:
-    """Prompt the user to select a numbered item. Returns 1-indexed int or None."""
+def _percent(value: float | None) -> str:
+    """Format a ratio as a percentage, or a dash when unknown."""
+    return f"{value:.0%}" if value is not None else "-"
+
+
+def print_screening_stats(stats: dict[tuple[str, str], dict[str, int]]) -> None:
+    """Render screening precision/recall per provider and model."""
+    from rich.table import Table
+
+    rows = [
+        (key, counts)
+        for key, counts in stats.items()
+        if any(m.startswith("screen_") for m in counts)
+    ]
+    if not rows:
+        console.print("[dim]No screening statistics yet. Set RECIPE_SCREENING=heuristic.[/dim]")
+        return
+
+    table = Table(
+        title="Screening",
+        show_header=True,
+        header_style="bold cyan",
+        show_lines=True,
+    )
+    table.add_column("Provider", style="bold")
+    table.add_column("Forwarded", justify="right")
+    table.add_column("Rejected", justify="right")
+    table.add_column("Audited", justify="right")
+    table.add_column("Precision", justify="right")
+    table.add_column("Est. Recall", justify="right")
+
+    for (provider, model), counts in rows:
+        forwarded = counts.get("screen_pass_hit", 0) + counts.get("screen_pass_miss", 0)
+        audited = counts.get("screen_reject_hit", 0) + counts.get("screen_reject_miss", 0)
+        rejected = audited + counts.get("screen_reject_skipped", 0)
+        precision, recall = screening_rates(counts)
+        table.add_row(
+            f"{provider}\n[dim]{model}[/dim]",
+            str(forwarded),
+            str(rejected),
+            str(audited),
+            _percent(precision),
+            _percent(recall),
+        )
+
+    console.print(table)
+
+
+def escape(text: str) -> str:
+    """Escape Rich markup in text, such as an "[extra]" in an install hint."""
+    from rich.markup import escape as escape_markup
+
+    return escape_markup(text)
+
+
+def prompt_selection(count: int, label: str = "show", more: bool = False) -> int | None:
+    """Prompt the user to select a numbered item. Returns 1-indexed int or None.
+
+    With more=True, entering "n" returns NEXT_PAGE.
+    """
     if not sys.stdin.isatty():
         return None
 
+    next_hint = ", n for next page" if more else ""
     try:
-        raw = console.input(f"Enter # to {label} (or Enter to skip): ")
+        raw = console.input(f"Enter # to {label}{next_hint} (or Enter to skip): ")
     except EOFError:
         return None
 
     raw = raw.strip()
     if not raw:
         return None
+    if more and raw.lower() == "n":
+        return NEXT_PAGE
 
     try:
         choice = int(raw)
@@ -163,3 +264,124 @@ def prompt_selection(count: int, label: str = "show") -> int | None:
         return None
 
     return choice
+
+
+def print_routing_stats(stats: dict[tuple[str, str], dict[str, int]]) -> None:
+    """Render how often the router picked each backend first or as a fallback."""
+    from rich.table import Table
+
+    rows = [
+        (key, counts)
+        for key, counts in stats.items()
+        if "routed" in counts or "route_fallback" in counts
+    ]
+    if not rows:
+        return
+
+    table = Table(
+        title="Routing",
+        show_header=True,
+        header_style="bold cyan",
+        show_lines=True,
+    )
+    table.add_column("Provider", style="bold")
+    table.add_column("First Choice", justify="right")
+    table.add_column("Fallback", justify="right")
+
+    for (provider, model), counts in rows:
+        table.add_row(
+            f"{provider}\n[dim]{model}[/dim]",
+            str(counts.get("routed", 0)),
+            str(counts.get("route_fallback", 0)),
+        )
+
+    console.print(table)
+
+
+def print_repair_stats(stats: dict[tuple[str, str], dict[str, int]]) -> None:
+    """Render how often each provider's output needed repair."""
+    from rich.table import Table
+
+    metrics = ("parse_ok", "repair_local", "repair_followup", "repair_failed")
+    rows = [(key, counts) for key, counts in stats.items() if any(m in counts for m in metrics)]
+    if not rows:
+        return
+
+    table = Table(
+        title="Output Repair",
+        show_header=True,
+        header_style="bold cyan",
+        show_lines=True,
+    )
+    table.add_column("Provider", style="bold")
+    table.add_column("Valid", justify="right")
+    table.add_column("Repaired Locally", justify="right")
+    table.add_column("Repaired by Follow-up", justify="right")
+    table.add_column("Failed", justify="right")
+    table.add_column("Repair Rate", justify="right")
+
+    for (provider, model), counts in rows:
+        ok, local, followup, failed = (counts.get(m, 0) for m in metrics)
+        total = ok + local + followup + failed
+        table.add_row(
+            f"{provider}\n[dim]{model}[/dim]",
+            str(ok),
+            str(local),
+            str(followup),
+            str(failed),
+            _percent((local + followup) / total if total else None),
+        )
+
+    console.print(table)
+
+
+def _latency(ms: int | None) -> str:
+    """Format milliseconds as seconds, or a dash when unknown."""
+    return f"{ms / 1000:.1f}s" if ms is not None else "-"
+
+
+def print_extraction_stats(summaries: list[ExtractionSummary], title: str) -> None:
+    """Render token usage, cost and latency percentiles per provider and model."""
+    from rich.table import Table
+
+    if not summaries:
+        console.print("[dim]No extractions logged yet.[/dim]")
+        return
+
+    table = Table(
+        title=title,
+        show_header=True,
+        header_style="bold cyan",
+        show_lines=True,
+    )
+    show_window = any(summary.window != "all" for summary in summaries)
+    if show_window:
+        table.add_column("Day")
+    table.add_column("Provider", style="bold")
+    table.add_column("Calls", justify="right")
+    table.add_column("Failed", justify="right")
+    table.add_column("Input Tokens", justify="right")
+    table.add_column("Cached", justify="right")
+    table.add_column("Output Tokens", justify="right")
+    table.add_column("Cost", justify="right")
+    table.add_column("p50", justify="right")
+    table.add_column("p90", justify="right")
+    table.add_column("p99", justify="right")
+
+    for summary in summaries:
+        usage = summary.usage
+        row = [
+            f"{summary.provider}\n[dim]{summary.model}[/dim]",
+            str(summary.calls),
+            str(summary.failed),
+            f"{usage.input_tokens:,}",
+            _percent(usage.cached_tokens / usage.input_tokens if usage.input_tokens else None),
+            f"{usage.output_tokens:,}",
+            f"${summary.cost:.4f}" if summary.cost is not None else "-",
+            _latency(summary.latency_percentile(50)),
+            _latency(summary.latency_percentile(90)),
+            _latency(summary.latency_percentile(99)),
+        ]
+        table.add_row(*([summary.window] if show_window else []), *row)
+
+    console.print(table)
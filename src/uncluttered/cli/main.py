@@ -4,27 +4,65 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+import time  # noqa: E402
+from datetime import UTC, datetime  # noqa: E402
+from pathlib import Path  # noqa: E402
 from typing import Optional  # noqa: E402
 
 import typer  # noqa: E402
 
 from uncluttered.cli.display import (  # noqa: E402
+    NEXT_PAGE,
     console,
+    escape,
+    print_extraction_stats,
     print_recipe_detail,
+    print_repair_stats,
+    print_routing_stats,
+    print_screening_stats,
     print_search_results,
     print_search_terms,
     prompt_selection,
 )
+from uncluttered.cli.output import OutputFormat, RecordWriter, recipe_record  # noqa: E402
+from uncluttered.core.corpus import CorpusIndex  # noqa: E402
+from uncluttered.core.costs import summarize_extractions  # noqa: E402
 from uncluttered.core.database import (  # noqa: E402
+    DEFAULT_PAGE_SIZE,
+    check_search_term_summary,
+    count_recipes,
     create_tables,
     delete_all_recipes,
     delete_recipe_by_slug,
     delete_recipes_by_search_term,
+    get_all_recipes,
+    get_archived_recipes,
+    get_extraction_records,
+    get_provider_stats,
     get_recipe_by_slug,
-    get_recipes_by_search_term,
+    get_recipes_by_ids,
+    get_recipes_page,
     get_search_term_counts,
+    get_stale_recipes,
+    rebuild_search_term_summary,
+)
+from uncluttered.core.engine import (  # noqa: E402
+    process_query,
+    reextract_recipes,
+    refresh_recipes,
+)
+from uncluttered.core.models import Recipe  # noqa: E402
+from uncluttered.core.similarity import (  # noqa: E402
+    find_similar,
+    indexed_count,
+    rebuild_index,
+)
+from uncluttered.core.transfer import export_library, import_library  # noqa: E402
+from uncluttered.core.utils import (  # noqa: E402
+    format_page_cursor,
+    parse_duration,
+    parse_page_cursor,
 )
-from uncluttered.core.engine import process_query  # noqa: E402
 
 app = typer.Typer(
     name="uncluttered",
@@ -33,27 +71,87 @@ app = typer.Typer(
 )
 
 
+FORMAT_HELP = "Output format: table, or ndjson/json records for scripts"
+
+
 @app.callback()
 def startup():
     """Ensure database tables exist before any command runs."""
     create_tables()
 
 
+def _fail(message: str) -> None:
+    """Report an error on stderr without Rich, for machine-readable output modes."""
+    typer.echo(f"Error: {message}", err=True)
+    raise typer.Exit(1)
+
+
+def _page_position(recipe: Recipe) -> tuple[int | None, int]:
+    """Return the (trust score, ID) keyset position of a listed recipe."""
+    return (recipe.trust_score.score if recipe.trust_score else None, recipe.id)
+
+
 @app.command()
 def search(
     query: str = typer.Argument(..., help="Recipe search query"),
     fetch: int = typer.Option(5, "--fetch", "-f", help="Number of recipes to fetch"),
     display: int = typer.Option(3, "--display", "-d", help="Number of recipes to display"),
+    timeout: Optional[float] = typer.Option(
+        None, "--timeout", "-t", help="Give up on remaining sources after this many seconds"
+    ),
+    output_format: OutputFormat = typer.Option(OutputFormat.TABLE, "--format", help=FORMAT_HELP),
+    offline_first: bool = typer.Option(
+        False,
+        "--offline-first",
+        help="Show saved recipes for a matching query instead of searching, if there are "
+        "enough trusted ones (default when OFFLINE_FIRST is set)",
+    ),
+    refresh: bool = typer.Option(
+        False, "--refresh", help="Always search and extract, even in offline-first mode"
+    ),
 ):
-    """Search for recipes and save them to the database."""
+    """Search for recipes and save them to the database.
+
+    With --format ndjson or json, every saved recipe is written as soon as it is saved.
+    """
+    # --offline-first forces the mode on; without it OFFLINE_FIRST decides
+    mode = False if refresh else (True if offline_first else None)
+
+    if output_format != OutputFormat.TABLE:
+        with RecordWriter(output_format) as out:
+            try:
+                process_query(
+                    query,
+                    fetch_count=fetch,
+                    display_count=display,
+                    timeout=timeout,
+                    on_recipe=lambda recipe: out.write(recipe_record(recipe)),
+                    offline_first=mode,
+                )
+            except Exception as e:
+                _fail(str(e))
+        return
+
     with console.status("[bold green]Hunting for recipes...", spinner="dots"):
         try:
-            recipes = process_query(query, fetch_count=fetch, display_count=display)
+            result = process_query(
+                query,
+                fetch_count=fetch,
+                display_count=display,
+                timeout=timeout,
+                offline_first=mode,
+            )
         except Exception as e:
             console.print(f"[bold red]Error:[/bold red] {e}")
             raise typer.Exit(1)
-
-    console.print(f'[green]Saved {len(recipes)} recipes for "{query}"[/green]\n')
+    recipes = result.recipes
+    if result.from_library:
+        console.print(
+            f'[green]Found {len(recipes)} saved recipes for "{escape(query)}"[/green] '
+            "[dim](use --refresh to search again)[/dim]\n"
+        )
+    else:
+        console.print(f'[green]Saved {len(recipes)} recipes for "{query}"[/green]\n')
     print_search_results(recipes, title=f'Top Results for "{query}"')
 
     choice = prompt_selection(len(recipes))
@@ -64,9 +162,44 @@ def search(
 @app.command("list")
 def list_recipes(
     search_term: Optional[str] = typer.Argument(None, help="Search term to filter recipes"),
+    all_recipes: bool = typer.Option(False, "--all", "-a", help="List all saved recipes"),
+    page_size: int = typer.Option(
+        DEFAULT_PAGE_SIZE, "--page-size", "-n", min=1, help="Number of recipes per page"
+    ),
+    after: Optional[str] = typer.Option(
+        None, "--after", help="Start after this position (the score:id printed below a page)"
+    ),
+    output_format: OutputFormat = typer.Option(OutputFormat.TABLE, "--format", help=FORMAT_HELP),
 ):
-    """List saved recipes. Without arguments, shows all search terms."""
-    if search_term is None:
+    """List saved recipes. Without arguments, shows all search terms.
+
+    With --format ndjson or json, every recipe from --after on is written,
+    read --page-size at a time.
+    """
+    try:
+        cursor = parse_page_cursor(after) if after is not None else None
+    except ValueError as e:
+        if output_format != OutputFormat.TABLE:
+            _fail(str(e))
+        console.print(f"[bold red]Error:[/bold red] {e}")
+        raise typer.Exit(1)
+
+    if output_format != OutputFormat.TABLE:
+        with RecordWriter(output_format) as out:
+            if search_term is None and not all_recipes:
+                for term, count in get_search_term_counts():
+                    out.write({"search_term": term, "recipe_count": count})
+                return
+            more = True
+            while more:
+                recipes, more = get_recipes_page(search_term, page_size=page_size, after=cursor)
+                for recipe in recipes:
+                    out.write(recipe_record(recipe))
+                if recipes:
+                    cursor = _page_position(recipes[-1])
+        return
+
+    if search_term is None and not all_recipes:
         # Show all search terms
         terms = get_search_term_counts()
         print_search_terms(terms)
@@ -81,14 +214,83 @@ def list_recipes(
         # User picked a search term — show its recipes
         search_term = terms[choice - 1][0]
 
-    recipes = get_recipes_by_search_term(search_term)
+    title = f'Recipes for "{search_term}"' if search_term is not None else "All Recipes"
+    total = count_recipes(search_term)
+    while True:
+        recipes, more = get_recipes_page(search_term, page_size=page_size, after=cursor)
+
+        if not recipes:
+            if search_term is None:
+                console.print("[yellow]No saved recipes.[/yellow]")
+            elif cursor is None:
+                console.print(f'[yellow]No recipes found for "{search_term}".[/yellow]')
+                console.print(f'Try: [bold]uncluttered search "{search_term}"[/bold]')
+            else:
+                console.print("[yellow]No more recipes.[/yellow]")
+            raise typer.Exit(0)
+
+        print_search_results(recipes, title=f"{title} ({total} total)")
+        cursor = _page_position(recipes[-1])
+        if more:
+            console.print(f"[dim]Next page: --after {format_page_cursor(*cursor)}[/dim]")
+
+        choice = prompt_selection(len(recipes), more=more)
+        if choice == NEXT_PAGE:
+            continue
+        if choice is not None:
+            print_recipe_detail(recipes[choice - 1])
+        return
 
-    if not recipes:
-        console.print(f'[yellow]No recipes found for "{search_term}".[/yellow]')
-        console.print(f'Try: [bold]uncluttered search "{search_term}"[/bold]')
-        raise typer.Exit(0)
 
-    print_search_results(recipes, title=f'Recipes for "{search_term}"')
+@app.command()
+def show(
+    slug: str = typer.Argument(..., help="Recipe slug to display"),
+    output_format: OutputFormat = typer.Option(OutputFormat.TABLE, "--format", help=FORMAT_HELP),
+):
+    """Show details of a saved recipe by slug."""
+    recipe = get_recipe_by_slug(slug)
+
+    if output_format != OutputFormat.TABLE:
+        if recipe is None:
+            _fail(f'Recipe with slug "{slug}" not found.')
+        with RecordWriter(output_format) as out:
+            out.write(recipe_record(recipe))
+        return
+
+    if recipe is None:
+        console.print(f'[bold red]Error:[/bold red] Recipe with slug "{slug}" not found.')
+        raise typer.Exit(1)
+
+    print_recipe_detail(recipe)
+
+
+@app.command()
+def similar(
+    slug: str = typer.Argument(..., help="Recipe slug to find similar recipes for"),
+    limit: int = typer.Option(5, "--limit", "-n", min=1, help="Number of similar recipes to show"),
+):
+    """Find saved recipes with a similar title and ingredients."""
+    recipe = get_recipe_by_slug(slug)
+    if recipe is None:
+        console.print(f'[bold red]Error:[/bold red] Recipe with slug "{slug}" not found.')
+        raise typer.Exit(1)
+
+    try:
+        # Recipes saved before the index existed (or without numpy) are indexed now
+        if indexed_count() != count_recipes():
+            with console.status("[bold green]Indexing saved recipes...", spinner="dots"):
+                rebuild_index(get_all_recipes())
+        matches = dict(find_similar(recipe, limit=limit))
+    except ImportError as e:
+        console.print(f"[bold red]Error:[/bold red] {escape(str(e))}")
+        raise typer.Exit(1)
+
+    recipes = get_recipes_by_ids(list(matches))
+    print_search_results(
+        recipes,
+        title=f'Similar to "{recipe.title}"',
+        similarities=[matches[r.id] for r in recipes],
+    )
 
     choice = prompt_selection(len(recipes))
     if choice is not None:
@@ -96,15 +298,207 @@ def list_recipes(
 
 
 @app.command()
-def show(slug: str = typer.Argument(..., help="Recipe slug to display")):
-    """Show details of a saved recipe by slug."""
-    recipe = get_recipe_by_slug(slug)
+def reextract(
+    slug: Optional[str] = typer.Argument(None, help="Recipe slug to re-extract"),
+    search_term: Optional[str] = typer.Option(
+        None, "--search-term", "-s", help="Re-extract all recipes for a search term"
+    ),
+    all_recipes: bool = typer.Option(False, "--all", "-a", help="Re-extract all recipes"),
+):
+    """Re-run extraction on archived source pages, without searching again."""
+    options_set = sum([slug is not None, search_term is not None, all_recipes])
+    if options_set != 1:
+        console.print(
+            "[bold red]Error:[/bold red] Specify exactly one of: slug, --search-term, or --all"
+        )
+        raise typer.Exit(1)
 
-    if recipe is None:
-        console.print(f'[bold red]Error:[/bold red] Recipe with slug "{slug}" not found.')
+    archived = get_archived_recipes(slug=slug, search_term=search_term)
+    if not archived:
+        console.print("[yellow]No recipes with archived source content found.[/yellow]")
+        raise typer.Exit(0)
+
+    with console.status(f"[bold green]Re-extracting {len(archived)} recipe(s)...", spinner="dots"):
+        updated, errors = reextract_recipes(archived)
+
+    for error in errors:
+        console.print(f"[yellow]Skipped {error}[/yellow]")
+    console.print(f"[green]Re-extracted {len(updated)} recipe(s)[/green]\n")
+    if updated:
+        print_search_results(updated, title="Re-extracted Recipes")
+
+
+@app.command()
+def refresh(
+    slug: Optional[str] = typer.Argument(None, help="Recipe slug to refresh"),
+    search_term: Optional[str] = typer.Option(
+        None, "--search-term", "-s", help="Refresh the recipes for a search term"
+    ),
+    older_than: str = typer.Option(
+        "30d", "--older-than", help="Only recipes whose source was fetched longer ago (e.g. 7d)"
+    ),
+    concurrency: Optional[int] = typer.Option(
+        None,
+        "--concurrency",
+        "-c",
+        min=1,
+        help="Extractions run at once (default: EXTRACTION_CONCURRENCY)",
+    ),
+):
+    """Re-fetch source pages of older recipes and re-extract the ones that changed."""
+    try:
+        cutoff = datetime.now(UTC).replace(tzinfo=None) - parse_duration(older_than)
+    except ValueError as e:
+        console.print(f"[bold red]Error:[/bold red] {e}")
         raise typer.Exit(1)
 
-    print_recipe_detail(recipe)
+    stale = get_stale_recipes(cutoff, slug=slug, search_term=search_term)
+    if not stale:
+        console.print(f"[green]No recipes fetched more than {older_than} ago.[/green]")
+        raise typer.Exit(0)
+
+    with console.status(f"[bold green]Refreshing {len(stale)} recipe(s)...", spinner="dots"):
+        try:
+            result = refresh_recipes(stale, concurrency=concurrency)
+        except Exception as e:
+            console.print(f"[bold red]Error:[/bold red] {e}")
+            raise typer.Exit(1)
+
+    for error in result.errors:
+        console.print(f"[yellow]Skipped {error}[/yellow]")
+    console.print(
+        f"[green]Checked {result.fetched} source page(s): {result.unchanged} unchanged, "
+        f"{result.fetched - result.unchanged} changed.[/green]"
+    )
+    if result.unavailable:
+        console.print(f"[yellow]{result.unavailable} source page(s) could not be fetched.[/yellow]")
+    console.print(
+        f"Re-extracted {len(result.updated)} recipe(s); "
+        f"skipped {result.unchanged} extraction call(s) for unchanged pages.\n"
+    )
+    if result.updated:
+        print_search_results(result.updated, title="Refreshed Recipes")
+
+
+@app.command()
+def index(
+    directory: Path = typer.Argument(
+        ..., exists=True, file_okay=False, help="Directory of HTML, text or WARC files"
+    ),
+    rebuild: bool = typer.Option(False, "--rebuild", help="Discard the whole index first"),
+):
+    """Index crawled pages for offline search with SEARCH_PROVIDER=local."""
+    corpus = CorpusIndex()
+    start = time.perf_counter()
+    with console.status(f"[bold green]Indexing {directory}...", spinner="dots"):
+        stats = corpus.build(directory, rebuild=rebuild)
+    elapsed = time.perf_counter() - start
+
+    console.print(
+        f"[green]Indexed {stats.pages} page(s) from {stats.files} file(s) "
+        f"in {elapsed:.1f}s ({stats.pages / max(elapsed, 1e-9):,.0f} pages/s)[/green]"
+    )
+    if stats.unchanged:
+        console.print(f"[dim]{stats.unchanged} unchanged file(s) skipped.[/dim]")
+    if stats.removed:
+        console.print(f"[dim]Removed {stats.removed} deleted file(s) from the index.[/dim]")
+    if stats.failed:
+        console.print(f"[yellow]Could not read {stats.failed} file(s); see the log.[/yellow]")
+    console.print(f"{corpus.page_count()} page(s) in the index.")
+
+
+@app.command()
+def export(
+    path: Path = typer.Argument(..., help="Output file (.jsonl, .jsonl.gz or .jsonl.zst)"),
+):
+    """Export all saved recipes as JSONL, optionally compressed."""
+    start = time.perf_counter()
+    try:
+        with console.status("[bold green]Exporting recipes...", spinner="dots"):
+            count = export_library(path)
+    except (ImportError, OSError) as e:
+        console.print(f"[bold red]Error:[/bold red] {escape(str(e))}")
+        raise typer.Exit(1)
+    elapsed = time.perf_counter() - start
+    console.print(
+        f"[green]Exported {count} recipe(s) to {path} "
+        f"in {elapsed:.1f}s ({count / max(elapsed, 1e-9):,.0f}/s)[/green]"
+    )
+
+
+@app.command("import")
+def import_(
+    path: Path = typer.Argument(
+        ..., help="JSONL export to import (.jsonl, .jsonl.gz or .jsonl.zst)"
+    ),
+):
+    """Import recipes from a JSONL export, skipping ones already saved."""
+    start = time.perf_counter()
+    try:
+        with console.status("[bold green]Importing recipes...", spinner="dots"):
+            result = import_library(path)
+    except (ImportError, OSError, EOFError) as e:
+        console.print(f"[bold red]Error:[/bold red] {escape(str(e))}")
+        raise typer.Exit(1)
+    elapsed = time.perf_counter() - start
+    total = result.imported + result.duplicates + result.invalid
+    console.print(
+        f"[green]Imported {result.imported} recipe(s) in {elapsed:.1f}s "
+        f"({total / max(elapsed, 1e-9):,.0f} records/s)[/green]"
+    )
+    if result.duplicates:
+        console.print(
+            f"[dim]{result.duplicates} already saved; linked to their search terms.[/dim]"
+        )
+    if result.invalid:
+        console.print(f"[yellow]Skipped {result.invalid} unreadable line(s).[/yellow]")
+
+
+@app.command()
+def stats(
+    since: Optional[str] = typer.Option(
+        None, "--since", help="Only count extractions from the last period (e.g. 24h, 7d)"
+    ),
+    daily: bool = typer.Option(False, "--daily", help="Break extraction usage down by day"),
+):
+    """Show extraction statistics per LLM provider and model."""
+    start = None
+    if since is not None:
+        try:
+            start = datetime.now(UTC).replace(tzinfo=None) - parse_duration(since)
+        except ValueError as e:
+            console.print(f"[bold red]Error:[/bold red] {e}")
+            raise typer.Exit(1)
+    summaries = summarize_extractions(get_extraction_records(since=start), daily=daily)
+    print_extraction_stats(
+        summaries, title=f"Extractions (last {since})" if since else "Extractions"
+    )
+
+    provider_stats = get_provider_stats()
+    print_screening_stats(provider_stats)
+    print_repair_stats(provider_stats)
+    print_routing_stats(provider_stats)
+
+
+@app.command()
+def check(
+    fix: bool = typer.Option(False, "--fix", help="Rebuild the summary if it is inconsistent"),
+):
+    """Check the search-term summary used by `list` against saved recipes."""
+    problems = check_search_term_summary()
+    if not problems:
+        console.print("[green]Search-term summary is consistent.[/green]")
+        return
+
+    for problem in problems:
+        console.print(f"[yellow]{problem}[/yellow]")
+
+    if fix:
+        count = rebuild_search_term_summary()
+        console.print(f"[green]Rebuilt summary for {count} search term(s).[/green]")
+    else:
+        console.print("Run [bold]uncluttered check --fix[/bold] to rebuild it.")
+        raise typer.Exit(1)
 
 
 @app.command()
@@ -0,0 +1,63 @@
+"""Machine-readable CLI output: NDJSON or a JSON array, written record by record.
+
+This module must not import Rich (directly or through display.py), so
+scripted runs skip its import and rendering cost entirely.
+"""
+
+import json
+import sys
+from enum import Enum
+from typing import IO
+
+from uncluttered.core.models import Recipe
+
+
+class OutputFormat(str, Enum):
+    """How a command writes its results."""
+
+    TABLE = "table"
+    NDJSON = "ndjson"
+    JSON = "json"
+
+
+class RecordWriter:
+    """Write records to a stream as they are produced.
+
+    NDJSON writes one object per line. JSON writes a single array, opened
+    before the first record and closed on exit, so it is also streamed
+    rather than built in memory. Each record is flushed immediately so a
+    downstream consumer sees it without waiting for the command to finish.
+    """
+
+    def __init__(self, output_format: OutputFormat, stream: IO[str] | None = None):
+        self._format = output_format
+        self._stream = stream if stream is not None else sys.stdout
+        self.count = 0
+
+    def write(self, record: dict) -> None:
+        """Write one record."""
+        line = json.dumps(record, ensure_ascii=False)
+        if self._format == OutputFormat.JSON:
+            line = ("[\n" if self.count == 0 else ",\n") + line
+        else:
+            line += "\n"
+        self._stream.write(line)
+        self._stream.flush()
+        self.count += 1
+
+    def close(self) -> None:
+        """Finish the output (closing the JSON array)."""
+        if self._format == OutputFormat.JSON:
+            self._stream.write("[]\n" if self.count == 0 else "\n]\n")
+            self._stream.flush()
+
+    def __enter__(self) -> "RecordWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def recipe_record(recipe: Recipe) -> dict:
+    """Return a recipe as a JSON-compatible dict, with the same keys as an export."""
+    return recipe.model_dump(mode="json", by_alias=True)
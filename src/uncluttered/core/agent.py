@@ -1,7 +1,9 @@
 """Recipe extraction agent with pluggable LLM providers."""
 
-from .models import Recipe
+from .models import PackedRecipes, Recipe
 from .providers import get_provider
+from .providers.base import CallRecorder
+from .resilience import Deadline
 
 SYSTEM_PROMPT = """You are a recipe extraction expert. Your job is to extract a complete,
 well-structured recipe from the provided context.
@@ -53,12 +55,25 @@ For calibration:
 Provide brief reasoning explaining your assessment.
 """
 
+PACKED_PROMPT = """
+## Multiple Sources
 
-def extract_recipe(context: str) -> Recipe:
+The context contains several independent sources, each starting with a line of the form
+"=== Source N ===". Extract one recipe from each source, using only that source's content, and
+assess its trust score on its own merits. Return every recipe in "recipes", with "source_index"
+set to the N of the source it came from. Return exactly one entry per source.
+"""
+
+
+def extract_recipe(
+    context: str, deadline: Deadline | None = None, record: CallRecorder | None = None
+) -> Recipe:
     """Extract a structured Recipe from raw search context.
 
     Args:
         context: Raw text content from search results
+        deadline: Optional time limit for the call, including retries
+        record: Optional callback receiving each LLM call made
 
     Returns:
         A validated Recipe object with trust score
@@ -67,4 +82,46 @@ def extract_recipe(context: str) -> Recipe:
     return provider.extract_recipe(
         SYSTEM_PROMPT,
         f"Extract a recipe from the following context:\n\n{context}",
+        deadline=deadline,
+        record=record,
     )
+
+
+def extract_recipes_packed(
+    contexts: list[str], deadline: Deadline | None = None, record: CallRecorder | None = None
+) -> list[Recipe | None]:
+    """Extract one Recipe from each of several sources in a single LLM request.
+
+    Packing saves repeating the system prompt and schema for every short page.
+
+    Args:
+        contexts: Raw text content of each source
+        deadline: Optional time limit for the call, including retries
+        record: Optional callback receiving each LLM call made
+
+    Returns:
+        A Recipe for each context, in order, or None for any source the
+        response skipped or tagged ambiguously
+    """
+    provider = get_provider()
+    sources = "\n\n".join(
+        f"=== Source {index} ===\n{context}" for index, context in enumerate(contexts, 1)
+    )
+    packed = provider.extract_structured(
+        f"{SYSTEM_PROMPT}\n{PACKED_PROMPT}",
+        f"Extract a recipe from each of the following {len(contexts)} sources:\n\n{sources}",
+        PackedRecipes,
+        deadline=deadline,
+        record=record,
+    )
+
+    recipes: list[Recipe | None] = [None] * len(contexts)
+    seen: set[int] = set()
+    for item in packed.recipes:
+        position = item.source_index - 1
+        if not 0 <= position < len(contexts):
+            continue
+        # A source tagged twice is ambiguous; re-extract it on its own
+        recipes[position] = None if position in seen else item.recipe
+        seen.add(position)
+    return recipes
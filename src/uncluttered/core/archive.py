@@ -0,0 +1,110 @@
+"""Content-addressed, compressed archive of cleaned source pages.
+
+Each page is stored once under the SHA-256 of its text, so recipes can be
+re-extracted later without searching or fetching the page again. Pages are
+compressed with zstd when the optional `zstandard` package is installed, and
+with zlib otherwise. zlib blobs can always be read back; zstd blobs need the
+`zstd` extra, and reading one without it raises ImportError naming the extra.
+"""
+
+import hashlib
+import os
+import tempfile
+import zlib
+from pathlib import Path
+
+from .utils import get_data_dir
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+_ZSTD_SUFFIX = ".zst"
+_ZLIB_SUFFIX = ".z"
+
+
+def _get_archive_dir() -> Path:
+    """Return the archive directory beside the database, creating it if needed."""
+    archive_dir = get_data_dir() / "archive"
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    return archive_dir
+
+
+def _blob_path(content_hash: str, suffix: str) -> Path:
+    """Return the blob path for a hash, fanned out by its first two characters."""
+    return _get_archive_dir() / content_hash[:2] / f"{content_hash}{suffix}"
+
+
+def content_hash(text: str) -> str:
+    """Return the hex SHA-256 digest identifying a page's cleaned text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def store_content(text: str, digest: str | None = None) -> str:
+    """Archive a page's cleaned text and return its content hash.
+
+    Storing the same text again is a no-op.
+
+    Args:
+        text: Cleaned page text
+        digest: The text's content hash, if the caller has already computed it
+
+    Returns:
+        The content hash the text is archived under
+    """
+    if digest is None:
+        digest = content_hash(text)
+    if load_path(digest) is not None:
+        return digest
+
+    data = text.encode("utf-8")
+    if zstandard is not None:
+        suffix, blob = _ZSTD_SUFFIX, zstandard.ZstdCompressor(level=10).compress(data)
+    else:
+        suffix, blob = _ZLIB_SUFFIX, zlib.compress(data, 9)
+
+    path = _blob_path(digest, suffix)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Write to a temp file and rename so readers never see a partial blob
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(blob)
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+    return digest
+
+
+def load_path(content_hash: str) -> Path | None:
+    """Return the path of an archived blob, or None if it is not archived."""
+    for suffix in (_ZSTD_SUFFIX, _ZLIB_SUFFIX):
+        path = _blob_path(content_hash, suffix)
+        if path.exists():
+            return path
+    return None
+
+
+def load_content(content_hash: str) -> str | None:
+    """Return the archived text for a content hash, or None if it is not archived.
+
+    Raises:
+        ImportError: If the page is zstd-compressed and the zstd extra is not installed
+    """
+    path = load_path(content_hash)
+    if path is None:
+        return None
+
+    blob = path.read_bytes()
+    if path.suffix == _ZSTD_SUFFIX:
+        if zstandard is None:
+            raise ImportError(
+                f"Archived page {content_hash} is zstd-compressed and the 'zstandard' "
+                'package is not installed. Install with: pip install "uncluttered[zstd]"'
+            )
+        data = zstandard.ZstdDecompressor().decompress(blob)
+    else:
+        data = zlib.decompress(blob)
+    return data.decode("utf-8")
@@ -0,0 +1,439 @@
+"""On-disk BM25 index over a local corpus of crawled recipe pages.
+
+`uncluttered index <directory>` walks a directory of HTML, plain text and
+WARC files (each optionally gzip-compressed) and adds every page to a
+SQLite FTS5 full-text index beside the database. The local search provider
+ranks pages with FTS5's BM25, weighting titles above body text, so the
+whole pipeline can run against the corpus without network access.
+
+Re-indexing a directory only reads files whose size or modification time
+changed, and drops pages of files that were removed. When the same URL is
+found more than once, the last copy indexed wins.
+"""
+
+import gzip
+import logging
+import os
+import re
+import sqlite3
+from collections.abc import Iterator
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import BinaryIO
+from urllib.parse import urlparse
+
+from .search_providers.base import SearchHit
+from .utils import get_data_dir
+
+logger = logging.getLogger(__name__)
+
+HTML_SUFFIXES = {".html", ".htm", ".xhtml"}
+TEXT_SUFFIXES = {".txt", ".text", ".md"}
+WARC_SUFFIXES = {".warc"}
+
+# BM25 column weights for (title, body)
+TITLE_WEIGHT = 4.0
+BODY_WEIGHT = 1.0
+
+# Pages written per transaction while indexing
+INDEX_BATCH_SIZE = 500
+
+# Approximate words in a search snippet
+SNIPPET_WORDS = 40
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pages (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL,
+    url TEXT NOT NULL UNIQUE,
+    domain TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_pages_path ON pages (path);
+CREATE VIRTUAL TABLE IF NOT EXISTS pages_fts USING fts5(
+    title, body, tokenize = 'porter unicode61 remove_diacritics 2'
+);
+"""
+
+_WORD_RE = re.compile(r"\w+")
+_CHARSET_RE = re.compile(rb"""charset=["']?([\w.:-]+)""", re.IGNORECASE)
+
+
+@dataclass
+class Page:
+    """One page read from the corpus."""
+
+    url: str
+    title: str
+    text: str
+
+
+@dataclass
+class IndexStats:
+    """What one indexing run did."""
+
+    files: int = 0
+    pages: int = 0
+    unchanged: int = 0
+    removed: int = 0
+    failed: int = 0
+
+
+def _get_index_path() -> Path:
+    """Return the path of the corpus index beside the database."""
+    return get_data_dir() / "corpus.db"
+
+
+class _TextExtractor(HTMLParser):
+    """Collect the visible text, title and canonical URL of an HTML page.
+
+    Scripts and styles are skipped, except JSON-LD, which on recipe sites
+    usually holds the structured recipe itself.
+    """
+
+    _SKIP = {"script", "style", "noscript", "template", "svg", "iframe"}
+    _BLOCKS = {
+        "address", "article", "aside", "blockquote", "br", "dd", "div", "dl", "dt",
+        "figcaption", "footer", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr",
+        "li", "main", "nav", "ol", "p", "pre", "section", "table", "td", "th", "tr", "ul",
+    }  # fmt: skip
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: list[str] = []
+        self.title = ""
+        self.canonical_url = ""
+        self._skip_depth = 0
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        attrs = {name: value or "" for name, value in attrs}
+        if tag in self._SKIP:
+            if not (tag == "script" and attrs.get("type") == "application/ld+json"):
+                self._skip_depth += 1
+        elif tag == "title":
+            self._in_title = True
+        elif tag == "link" and "canonical" in attrs.get("rel", "").lower().split():
+            self.canonical_url = self.canonical_url or attrs.get("href", "")
+        elif tag == "meta" and attrs.get("property") == "og:url":
+            self.canonical_url = self.canonical_url or attrs.get("content", "")
+        if tag in self._BLOCKS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self._SKIP and self._skip_depth:
+            self._skip_depth -= 1
+        elif tag == "title":
+            self._in_title = False
+        if tag in self._BLOCKS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        if self._in_title:
+            self.title += data
+        else:
+            self.parts.append(data)
+
+
+def _decode(data: bytes, charset: str | None = None) -> str:
+    """Decode page bytes using the declared charset, falling back to UTF-8."""
+    if charset is None:
+        match = _CHARSET_RE.search(data[:2048])
+        charset = match.group(1).decode("ascii") if match else "utf-8"
+    try:
+        return data.decode(charset, errors="replace")
+    except LookupError:
+        return data.decode("utf-8", errors="replace")
+
+
+def parse_html(html: str, fallback_url: str) -> Page:
+    """Extract a page's title, text and URL (its canonical link, if absolute)."""
+    parser = _TextExtractor()
+    parser.feed(html)
+    parser.close()
+    url = parser.canonical_url.strip()
+    if not urlparse(url).scheme.startswith("http"):
+        url = fallback_url
+    text = re.sub(r"[ \t\r\f\v]*\n\s*", "\n", "".join(parser.parts)).strip()
+    return Page(url=url, title=" ".join(parser.title.split()), text=text)
+
+
+def _read_warc(stream: BinaryIO) -> Iterator[tuple[str, bytes, str | None]]:
+    """Yield (target URL, body, charset) for each successful HTML response in a WARC file."""
+    while True:
+        line = stream.readline()
+        if not line:
+            return
+        if not line.startswith(b"WARC/"):
+            continue
+        headers: dict[str, str] = {}
+        for header in iter(stream.readline, b""):
+            if not header.strip():
+                break
+            name, _, value = header.decode("utf-8", errors="replace").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        block = stream.read(int(headers.get("content-length", "0")))
+        if headers.get("warc-type") != "response":
+            continue
+        if not headers.get("content-type", "").startswith("application/http"):
+            continue
+
+        http_head, _, body = block.partition(b"\r\n\r\n")
+        status_line, *http_headers = http_head.decode("latin-1").split("\r\n")
+        status = status_line.split(" ", 2)[1:2]
+        content_type = next(
+            (h.partition(":")[2] for h in http_headers if h.lower().startswith("content-type:")),
+            "",
+        )
+        if status != ["200"] or "html" not in content_type.lower():
+            continue
+        match = _CHARSET_RE.search(content_type.encode("latin-1"))
+        yield headers.get("warc-target-uri", ""), body, match.group(1).decode() if match else None
+
+
+def _split_suffixes(path: Path) -> tuple[str, bool]:
+    """Return a file's content suffix and whether it is gzip-compressed."""
+    suffixes = [suffix.lower() for suffix in path.suffixes]
+    compressed = bool(suffixes) and suffixes[-1] == ".gz"
+    if compressed:
+        suffixes.pop()
+    return (suffixes[-1] if suffixes else ""), compressed
+
+
+def is_corpus_file(path: Path) -> bool:
+    """Return True if path is a file type the corpus indexer reads."""
+    suffix, _ = _split_suffixes(path)
+    return suffix in HTML_SUFFIXES | TEXT_SUFFIXES | WARC_SUFFIXES
+
+
+def read_pages(path: Path) -> Iterator[Page]:
+    """Yield the pages in a corpus file."""
+    suffix, compressed = _split_suffixes(path)
+    opener = gzip.open if compressed else open
+    file_url = path.resolve().as_uri()
+    with opener(path, "rb") as f:
+        if suffix in WARC_SUFFIXES:
+            for url, body, charset in _read_warc(f):
+                yield parse_html(_decode(body, charset), url or file_url)
+        elif suffix in HTML_SUFFIXES:
+            yield parse_html(_decode(f.read()), file_url)
+        else:
+            text = _decode(f.read()).strip()
+            title = next((line.strip() for line in text.splitlines() if line.strip()), path.stem)
+            yield Page(url=file_url, title=title[:200], text=text)
+
+
+def _domain(url: str) -> str:
+    """Return a URL's host without "www."/"m." prefixes, matching search exclusions."""
+    return (urlparse(url).hostname or "").removeprefix("www.").removeprefix("m.")
+
+
+def _match_expression(query: str) -> str | None:
+    """Turn free text into an FTS5 query matching any of its words.
+
+    Each word is quoted so FTS5 operators and punctuation in the query are
+    taken literally; BM25 ranks pages matching more (and rarer) words higher.
+    """
+    words = dict.fromkeys(_WORD_RE.findall(query.lower()))
+    return " OR ".join(f'"{word}"' for word in words) or None
+
+
+class CorpusIndex:
+    """A SQLite FTS5 index of corpus pages.
+
+    Each operation opens its own connection, so one index can be searched
+    from several threads.
+    """
+
+    def __init__(self, path: Path | None = None):
+        self._path = path
+
+    @property
+    def path(self) -> Path:
+        return self._path if self._path is not None else _get_index_path()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        return conn
+
+    def page_count(self) -> int:
+        """Return the number of indexed pages."""
+        if not self.path.exists():
+            return 0
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT count(*) FROM pages").fetchone()[0]
+        finally:
+            conn.close()
+
+    def search(
+        self,
+        query: str,
+        limit: int,
+        exclude_domains: list[str] | None = None,
+        snippets: bool = False,
+    ) -> list[SearchHit]:
+        """Return the best-matching pages for query by BM25, best first.
+
+        Scores are scaled so the best hit has 1.0. With snippets, each hit
+        carries only the passage of body text that best matches the query
+        instead of the whole page.
+        """
+        expression = _match_expression(query)
+        if expression is None or limit <= 0:
+            return []
+        excluded = sorted(set(exclude_domains or []))
+        placeholders = ", ".join("?" for _ in excluded)
+        sql = (
+            "SELECT pages_fts.rowid, bm25(pages_fts, ?, ?) AS rank FROM pages_fts "
+            "JOIN pages ON pages.id = pages_fts.rowid WHERE pages_fts MATCH ? "
+            + (f"AND pages.domain NOT IN ({placeholders}) " if excluded else "")
+            + "ORDER BY rank LIMIT ?"
+        )
+        conn = self._connect()
+        try:
+            ranked = conn.execute(
+                sql, (TITLE_WEIGHT, BODY_WEIGHT, expression, *excluded, limit)
+            ).fetchall()
+            if not ranked:
+                return []
+            ids = [row_id for row_id, _ in ranked]
+            id_placeholders = ", ".join("?" for _ in ids)
+            if snippets:
+                # snippet() needs the MATCH that selected the row
+                content = f"snippet(pages_fts, 1, '', '', '...', {SNIPPET_WORDS})"
+                match, params = "AND pages_fts MATCH ?", [*ids, expression]
+            else:
+                content, match, params = "pages_fts.body", "", ids
+            rows = conn.execute(
+                f"SELECT pages.id, pages.url, pages_fts.title, {content} FROM pages "
+                "JOIN pages_fts ON pages_fts.rowid = pages.id "
+                f"WHERE pages.id IN ({id_placeholders}) {match}",
+                params,
+            ).fetchall()
+        finally:
+            conn.close()
+
+        pages = {row_id: (url, title, body) for row_id, url, title, body in rows}
+        # bm25() is negative, lower is better
+        best = -ranked[0][1] or 1.0
+        hits = []
+        for row_id, rank in ranked:
+            url, title, body = pages[row_id]
+            hits.append(SearchHit(url=url, title=title, content=body, score=-rank / best))
+        return hits
+
+    def get_pages(self, urls: list[str]) -> dict[str, str]:
+        """Return the indexed text of the given pages, keyed by URL."""
+        if not urls or not self.path.exists():
+            return {}
+        placeholders = ", ".join("?" for _ in urls)
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT pages.url, pages_fts.body FROM pages "
+                "JOIN pages_fts ON pages_fts.rowid = pages.id "
+                f"WHERE pages.url IN ({placeholders})",
+                urls,
+            ).fetchall()
+        finally:
+            conn.close()
+        return dict(rows)
+
+    def build(self, directory: Path, rebuild: bool = False) -> IndexStats:
+        """Index every corpus file under directory.
+
+        Args:
+            directory: Directory to walk recursively
+            rebuild: Discard the whole index (all directories) first
+
+        Returns:
+            Counts of files read, pages indexed, unchanged, removed and failed files
+        """
+        stats = IndexStats()
+        root = directory.resolve()
+        conn = self._connect()
+        try:
+            if rebuild:
+                conn.executescript("DELETE FROM files; DELETE FROM pages; DELETE FROM pages_fts;")
+
+            known = {
+                path: (size, mtime_ns)
+                for path, size, mtime_ns in conn.execute("SELECT path, size, mtime_ns FROM files")
+            }
+            seen: set[str] = set()
+            pending = 0
+            for path in sorted(root.rglob("*")):
+                if not path.is_file() or not is_corpus_file(path):
+                    continue
+                key = str(path)
+                seen.add(key)
+                stat = path.stat()
+                if known.get(key) == (stat.st_size, stat.st_mtime_ns):
+                    stats.unchanged += 1
+                    continue
+
+                self._remove_file(conn, key)
+                try:
+                    for page in read_pages(path):
+                        if not page.text:
+                            continue
+                        self._add_page(conn, key, page)
+                        stats.pages += 1
+                        pending += 1
+                        if pending >= INDEX_BATCH_SIZE:
+                            conn.commit()
+                            pending = 0
+                except (OSError, EOFError, ValueError) as e:
+                    logger.warning("Skipping %s: %s", path, e)
+                    stats.failed += 1
+                    continue
+                conn.execute(
+                    "INSERT OR REPLACE INTO files (path, size, mtime_ns) VALUES (?, ?, ?)",
+                    (key, stat.st_size, stat.st_mtime_ns),
+                )
+                stats.files += 1
+
+            # Files deleted from this directory since it was last indexed
+            prefix = os.path.join(str(root), "")
+            for key in known:
+                if key.startswith(prefix) and key not in seen:
+                    self._remove_file(conn, key)
+                    conn.execute("DELETE FROM files WHERE path = ?", (key,))
+                    stats.removed += 1
+            conn.commit()
+        finally:
+            conn.close()
+        return stats
+
+    @staticmethod
+    def _add_page(conn: sqlite3.Connection, path: str, page: Page) -> None:
+        existing = conn.execute("SELECT id FROM pages WHERE url = ?", (page.url,)).fetchone()
+        if existing is not None:
+            conn.execute("DELETE FROM pages WHERE id = ?", existing)
+            conn.execute("DELETE FROM pages_fts WHERE rowid = ?", existing)
+        cursor = conn.execute(
+            "INSERT INTO pages (path, url, domain) VALUES (?, ?, ?)",
+            (path, page.url, _domain(page.url)),
+        )
+        conn.execute(
+            "INSERT INTO pages_fts (rowid, title, body) VALUES (?, ?, ?)",
+            (cursor.lastrowid, page.title, page.text),
+        )
+
+    @staticmethod
+    def _remove_file(conn: sqlite3.Connection, path: str) -> None:
+        conn.execute(
+            "DELETE FROM pages_fts WHERE rowid IN (SELECT id FROM pages WHERE path = ?)", (path,)
+        )
+        conn.execute("DELETE FROM pages WHERE path = ?", (path,))
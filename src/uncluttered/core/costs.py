@@ -0,0 +1,106 @@
+"""Token pricing and extraction-log summaries for `stats`.
+
+Prices are USD per million tokens as (input, cached input, output). They
+change over time, so LLM_PRICES can override or add models, e.g.
+
+    LLM_PRICES=gpt-4o-mini=0.15/0.075/0.6,my-finetune=1/0.5/4
+
+Local Ollama models cost nothing. Costs are computed when reporting, so
+updated prices also apply to calls logged earlier.
+"""
+
+import math
+import os
+from dataclasses import dataclass, field
+
+from .models import ExtractionRecord, Usage
+
+MODEL_PRICES: dict[str, tuple[float, float, float]] = {
+    "gemini-2.0-flash": (0.10, 0.025, 0.40),
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "claude-sonnet-4-5-20250929": (3.00, 0.30, 15.00),
+    "claude-haiku-4-5-20251001": (1.00, 0.10, 5.00),
+}
+
+
+def _get_prices() -> dict[str, tuple[float, float, float]]:
+    """Return the built-in price table with any LLM_PRICES overrides applied."""
+    prices = dict(MODEL_PRICES)
+    for entry in os.getenv("LLM_PRICES", "").split(","):
+        if not entry.strip():
+            continue
+        model, _, values = entry.partition("=")
+        try:
+            input_price, cached_price, output_price = (float(v) for v in values.split("/"))
+        except ValueError:
+            raise ValueError(
+                f"Invalid LLM_PRICES entry: '{entry}'. Expected model=input/cached/output"
+            ) from None
+        prices[model.strip()] = (input_price, cached_price, output_price)
+    return prices
+
+
+def estimate_cost(provider: str, model: str, usage: Usage) -> float | None:
+    """Return the USD cost of usage, or None if the model's price is unknown."""
+    if provider == "ollama":
+        return 0.0
+    price = _get_prices().get(model)
+    if price is None:
+        return None
+    input_price, cached_price, output_price = price
+    uncached = usage.input_tokens - usage.cached_tokens
+    return (
+        uncached * input_price
+        + usage.cached_tokens * cached_price
+        + usage.output_tokens * output_price
+    ) / 1_000_000
+
+
+def percentile(sorted_values: list[int], q: float) -> int | None:
+    """Return the nearest-rank q-th percentile (0-100) of already-sorted values."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+@dataclass
+class ExtractionSummary:
+    """Aggregated extraction calls for one provider, model and time window."""
+
+    provider: str
+    model: str
+    window: str
+    calls: int = 0
+    failed: int = 0
+    usage: Usage = field(default_factory=Usage)
+    cost: float | None = 0.0
+    latencies_ms: list[int] = field(default_factory=list)
+
+    def latency_percentile(self, q: float) -> int | None:
+        return percentile(sorted(self.latencies_ms), q)
+
+
+def summarize_extractions(
+    records: list[ExtractionRecord], daily: bool = False
+) -> list[ExtractionSummary]:
+    """Group logged extraction calls by provider and model, and by UTC day if daily.
+
+    A group's cost is None if any of its models has no known price.
+    """
+    summaries: dict[tuple[str, str, str], ExtractionSummary] = {}
+    for record in records:
+        window = record.created_at.date().isoformat() if daily else "all"
+        key = (window, record.provider, record.model)
+        summary = summaries.get(key)
+        if summary is None:
+            summary = summaries[key] = ExtractionSummary(record.provider, record.model, window)
+        summary.calls += 1
+        summary.failed += record.outcome != "ok"
+        summary.usage.add(record.usage)
+        summary.latencies_ms.append(record.latency_ms)
+        cost = estimate_cost(record.provider, record.model, record.usage)
+        summary.cost = None if cost is None or summary.cost is None else summary.cost + cost
+    return [summaries[key] for key in sorted(summaries)]
@@ -1,24 +1,71 @@
 """SQLite database management using SQLAlchemy."""
 
 import json
+import queue
+import threading
+from collections import defaultdict
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future
+from datetime import UTC, datetime
 from pathlib import Path
+from typing import TypeVar
 
-from sqlalchemy import Column, Integer, String, Text, create_engine, func
+from sqlalchemy import (
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    UniqueConstraint,
+    create_engine,
+    event,
+    func,
+    inspect,
+    text,
+    tuple_,
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import declarative_base, sessionmaker
 
-from .models import Ingredient, Recipe, TrustScore
+from . import similarity
+from .models import ExtractionCall, ExtractionRecord, Ingredient, Recipe, TrustScore, Usage
+from .utils import canonicalize_url, get_data_dir, query_key
 
 Base = declarative_base()
 
+T = TypeVar("T")
+
 _engine = None
 _SessionLocal = None
 
+# Connection settings for concurrent use: WAL lets readers run alongside the
+# writer, NORMAL sync is durable across application crashes in WAL mode, and
+# the busy timeout makes other processes wait for the write lock instead of
+# failing with "database is locked".
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 10_000,
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64 * 1024,  # negative means KiB: 64 MiB
+    "temp_store": "MEMORY",
+}
+
+# Most queued writes applied in one transaction
+MAX_WRITE_BATCH = 64
+
+# Rows read per query when streaming the whole library
+STREAM_CHUNK_SIZE = 500
+
+# Recipes per page of `list`
+DEFAULT_PAGE_SIZE = 20
+
 
 def _get_db_path() -> Path:
     """Return the path to the SQLite database file, creating parent dirs if needed."""
-    db_path = Path.home() / ".local" / "share" / "uncluttered" / "uncluttered.db"
-    db_path.parent.mkdir(parents=True, exist_ok=True)
-    return db_path
+    return get_data_dir() / "uncluttered.db"
 
 
 def _get_engine():
@@ -26,9 +73,18 @@ def _get_engine():
     global _engine
     if _engine is None:
         _engine = create_engine(f"sqlite:///{_get_db_path()}", echo=False)
+        event.listen(_engine, "connect", _set_sqlite_pragmas)
     return _engine
 
 
+def _set_sqlite_pragmas(dbapi_connection, _connection_record) -> None:
+    """Apply SQLITE_PRAGMAS to every new connection."""
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+
 def _get_session():
     """Return a new session from the lazily-initialized sessionmaker."""
     global _SessionLocal
@@ -37,10 +93,73 @@ def _get_session():
     return _SessionLocal()
 
 
+class _Writer:
+    """A dedicated thread that applies all recipe and statistics writes.
+
+    Callers from any thread submit a function taking a session and block
+    until it is committed. Writes queued while a commit is in progress are
+    applied together in the next transaction, so concurrent extraction
+    workers share commits instead of contending for SQLite's write lock.
+    If a grouped transaction fails, its writes are retried one by one so
+    only the failing write reports an error.
+    """
+
+    def __init__(self):
+        self._queue: queue.SimpleQueue[tuple[Callable, Future]] = queue.SimpleQueue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def submit(self, write: Callable[..., T]) -> T:
+        """Apply write(session) in a committed transaction and return its result."""
+        return self.post(write).result()
+
+    def post(self, write: Callable[..., T]) -> Future[T]:
+        """Queue write(session) without waiting; the future resolves once it is committed."""
+        future: Future = Future()
+        self._queue.put((write, future))
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="database-writer", daemon=True
+                )
+                self._thread.start()
+        return future
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < MAX_WRITE_BATCH:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._apply_batch(batch)
+
+    def _apply_batch(self, batch: list[tuple[Callable, Future]]) -> None:
+        try:
+            with _get_session() as session:
+                results = [write(session) for write, _ in batch]
+                session.commit()
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0][1].set_exception(e)
+                return
+            for item in batch:
+                self._apply_batch([item])
+            return
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+
+_writer = _Writer()
+
+
 class RecipeTable(Base):
     """SQLAlchemy table for recipes."""
 
     __tablename__ = "recipes"
+    # Serves the (trust score, ID) order of paged listings without a sort
+    __table_args__ = (Index("ix_recipes_trust_score_id", "trust_score", "id"),)
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     title = Column(String(255), nullable=False)
@@ -54,37 +173,551 @@ class RecipeTable(Base):
     trust_score = Column(Integer, nullable=True)
     trust_reasoning = Column(Text, nullable=True)
     slug = Column(String(255), nullable=True, unique=True, index=True)
+    # The search term that first found this recipe; all terms live in recipe_search_terms
     search_term = Column(String(255), nullable=True, index=True)
+    canonical_url = Column(String(500), nullable=True, unique=True, index=True)
+    # SHA-256 of the archived page text the recipe was extracted from
+    content_hash = Column(String(64), nullable=True, index=True)
+    # The LLM call that produced the current fields (shared by packed recipes)
+    extraction_id = Column(Integer, ForeignKey("extraction_log.id"), nullable=True, index=True)
+    # When the source page was last fetched (None if unknown, e.g. imported recipes)
+    fetched_at = Column(DateTime, nullable=True, index=True)
+
+
+class RecipeSearchTermTable(Base):
+    """SQLAlchemy table linking recipes to every search term that found them."""
+
+    __tablename__ = "recipe_search_terms"
+    __table_args__ = (UniqueConstraint("recipe_id", "search_term"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    recipe_id = Column(Integer, ForeignKey("recipes.id"), nullable=False, index=True)
+    search_term = Column(String(255), nullable=False, index=True)
+
+
+class SlugCounterTable(Base):
+    """SQLAlchemy table tracking the highest numeric suffix issued per base slug."""
+
+    __tablename__ = "slug_counters"
+
+    base_slug = Column(String(255), primary_key=True)
+    last_suffix = Column(Integer, nullable=False, default=1)
+
+
+class SearchTermSummaryTable(Base):
+    """SQLAlchemy table summarizing each search term, maintained on every write.
+
+    Lets `list` read one row per term instead of aggregating the recipe table,
+    and indexes each term's query key so differently spelled queries can find
+    the terms they match.
+    """
+
+    __tablename__ = "search_term_summary"
+
+    search_term = Column(String(255), primary_key=True)
+    # utils.query_key(search_term)
+    query_key = Column(String(255), nullable=False, index=True)
+    recipe_count = Column(Integer, nullable=False)
+    max_trust_score = Column(Integer, nullable=True)
+    updated_at = Column(DateTime, nullable=False)
+
+
+class ProviderStatTable(Base):
+    """SQLAlchemy table of named counters per LLM provider and model."""
+
+    __tablename__ = "provider_stats"
+
+    provider = Column(String(50), primary_key=True)
+    model = Column(String(255), primary_key=True)
+    metric = Column(String(100), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class ExtractionLogTable(Base):
+    """SQLAlchemy table with one row per extraction call: token usage, latency and outcome.
+
+    Costs are computed when reporting, so price changes apply to old rows too.
+    """
+
+    __tablename__ = "extraction_log"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    created_at = Column(DateTime, nullable=False, index=True)
+    provider = Column(String(50), nullable=False)
+    model = Column(String(255), nullable=False)
+    # LLM requests made, including repair follow-ups but not SDK-level retries
+    requests = Column(Integer, nullable=False, default=0)
+    input_tokens = Column(Integer, nullable=False, default=0)
+    output_tokens = Column(Integer, nullable=False, default=0)
+    cached_tokens = Column(Integer, nullable=False, default=0)
+    latency_ms = Column(Integer, nullable=False)
+    # ok, invalid (no valid output) or error (the provider call failed)
+    outcome = Column(String(20), nullable=False)
 
 
 def create_tables() -> None:
-    """Create all database tables."""
-    Base.metadata.create_all(_get_engine())
-
-
-def add_recipe(recipe: Recipe) -> Recipe:
-    """Save a recipe to the database and return it with its ID."""
-    with _get_session() as session:
-        db_recipe = RecipeTable(
-            title=recipe.title,
-            description=recipe.description,
-            ingredients_json=json.dumps([ing.model_dump() for ing in recipe.ingredients]),
-            instructions_json=json.dumps(recipe.instructions),
-            prep_time=recipe.prep_time,
-            cook_time=recipe.cook_time,
-            serving_yield=recipe.serving_yield,
-            source_url=recipe.source_url,
-            trust_score=recipe.trust_score.score if recipe.trust_score else None,
-            trust_reasoning=recipe.trust_score.reasoning if recipe.trust_score else None,
-            slug=recipe.slug,
-            search_term=recipe.search_term,
-        )
-        session.add(db_recipe)
-        session.commit()
-        session.refresh(db_recipe)
-
-        # Return the recipe with its new ID
-        return _row_to_recipe(db_recipe)
+    """Create all database tables and upgrade databases from older versions."""
+    engine = _get_engine()
+    existing_tables = set(inspect(engine).get_table_names())
+    Base.metadata.create_all(engine)
+    if "recipes" in existing_tables:
+        _migrate(engine, existing_tables)
+
+
+def _migrate(engine, existing_tables: set[str]) -> None:
+    """Add columns and backfill tables introduced after the database was created."""
+    recipe_columns = {col["name"] for col in inspect(engine).get_columns("recipes")}
+
+    with engine.begin() as conn:
+        if "canonical_url" not in recipe_columns:
+            conn.execute(text("ALTER TABLE recipes ADD COLUMN canonical_url VARCHAR(500)"))
+            # Older databases may hold the same page twice; only the first copy
+            # gets the canonical URL so the unique index can be built.
+            seen: set[str] = set()
+            rows = conn.execute(
+                text("SELECT id, source_url FROM recipes WHERE source_url IS NOT NULL ORDER BY id")
+            )
+            for recipe_id, source_url in rows.all():
+                canonical = canonicalize_url(source_url)
+                if canonical in seen:
+                    continue
+                seen.add(canonical)
+                conn.execute(
+                    text("UPDATE recipes SET canonical_url = :url WHERE id = :id"),
+                    {"url": canonical, "id": recipe_id},
+                )
+            conn.execute(
+                text(
+                    "CREATE UNIQUE INDEX IF NOT EXISTS ix_recipes_canonical_url "
+                    "ON recipes (canonical_url)"
+                )
+            )
+
+        if "recipe_search_terms" not in existing_tables:
+            conn.execute(
+                text(
+                    "INSERT INTO recipe_search_terms (recipe_id, search_term) "
+                    "SELECT id, search_term FROM recipes WHERE search_term IS NOT NULL"
+                )
+            )
+
+        if "content_hash" not in recipe_columns:
+            conn.execute(text("ALTER TABLE recipes ADD COLUMN content_hash VARCHAR(64)"))
+            conn.execute(
+                text("CREATE INDEX IF NOT EXISTS ix_recipes_content_hash ON recipes (content_hash)")
+            )
+
+        if "extraction_id" not in recipe_columns:
+            conn.execute(
+                text(
+                    "ALTER TABLE recipes ADD COLUMN extraction_id INTEGER "
+                    "REFERENCES extraction_log (id)"
+                )
+            )
+            conn.execute(
+                text(
+                    "CREATE INDEX IF NOT EXISTS ix_recipes_extraction_id ON recipes (extraction_id)"
+                )
+            )
+
+        if "fetched_at" not in recipe_columns:
+            conn.execute(text("ALTER TABLE recipes ADD COLUMN fetched_at DATETIME"))
+            conn.execute(
+                text("CREATE INDEX IF NOT EXISTS ix_recipes_fetched_at ON recipes (fetched_at)")
+            )
+
+        conn.execute(
+            text(
+                "CREATE INDEX IF NOT EXISTS ix_recipes_trust_score_id ON recipes (trust_score, id)"
+            )
+        )
+
+    if "search_term_summary" not in existing_tables:
+        rebuild_search_term_summary()
+        return
+
+    summary_columns = {col["name"] for col in inspect(engine).get_columns("search_term_summary")}
+    if "query_key" not in summary_columns:
+        with engine.begin() as conn:
+            conn.execute(
+                text(
+                    "ALTER TABLE search_term_summary "
+                    "ADD COLUMN query_key VARCHAR(255) NOT NULL DEFAULT ''"
+                )
+            )
+            terms = conn.execute(text("SELECT search_term FROM search_term_summary")).scalars()
+            conn.execute(
+                text("UPDATE search_term_summary SET query_key = :key WHERE search_term = :term"),
+                [{"key": query_key(term), "term": term} for term in terms.all()],
+            )
+            conn.execute(
+                text(
+                    "CREATE INDEX IF NOT EXISTS ix_search_term_summary_query_key "
+                    "ON search_term_summary (query_key)"
+                )
+            )
+
+
+def add_recipe(recipe: Recipe, content_hash: str | None = None) -> Recipe:
+    """Save a recipe to the database and return it with its ID.
+
+    content_hash references the archived page text the recipe was extracted from.
+
+    The recipe's slug is treated as a base slug: if it is taken, a numeric suffix
+    is allocated inside the insert transaction (e.g. "carbonara-2").
+
+    If a recipe from the same canonical source URL already exists, it is linked
+    to this recipe's search term instead and the existing recipe is returned.
+    """
+    saved, created = _writer.submit(lambda session: _add_recipe(session, recipe, content_hash))
+    if created:
+        similarity.index_recipe(saved)
+    return saved
+
+
+def _add_recipe(session, recipe: Recipe, content_hash: str | None) -> tuple[Recipe, bool]:
+    """Insert or link a recipe; returns the saved recipe and whether it is new."""
+    canonical_url = canonicalize_url(recipe.source_url) if recipe.source_url else None
+    if canonical_url is not None:
+        existing = (
+            session.query(RecipeTable).filter(RecipeTable.canonical_url == canonical_url).first()
+        )
+        if existing is not None:
+            _link(session, existing.id, recipe.search_term)
+            return _row_to_recipe(existing), False
+
+    slug = _allocate_slug(session, recipe.slug) if recipe.slug is not None else None
+    db_recipe = _recipe_row(recipe, slug, canonical_url, content_hash)
+    db_recipe.fetched_at = datetime.now(UTC).replace(tzinfo=None)
+    session.add(db_recipe)
+    session.flush()
+    _link(session, db_recipe.id, recipe.search_term)
+
+    # Return the recipe with its new ID
+    return _row_to_recipe(db_recipe), True
+
+
+def _recipe_row(
+    recipe: Recipe, slug: str | None, canonical_url: str | None, content_hash: str | None
+) -> RecipeTable:
+    """Build a new recipe row."""
+    return RecipeTable(
+        title=recipe.title,
+        description=recipe.description,
+        ingredients_json=json.dumps([ing.model_dump() for ing in recipe.ingredients]),
+        instructions_json=json.dumps(recipe.instructions),
+        prep_time=recipe.prep_time,
+        cook_time=recipe.cook_time,
+        serving_yield=recipe.serving_yield,
+        source_url=recipe.source_url,
+        trust_score=recipe.trust_score.score if recipe.trust_score else None,
+        trust_reasoning=recipe.trust_score.reasoning if recipe.trust_score else None,
+        slug=slug,
+        search_term=recipe.search_term,
+        canonical_url=canonical_url,
+        content_hash=content_hash,
+        extraction_id=recipe.extraction_id,
+    )
+
+
+def import_recipes(records: list[tuple[Recipe, list[str]]]) -> list[Recipe | None]:
+    """Save a batch of recipes with their search terms in one transaction.
+
+    A record is a duplicate if a saved recipe (or an earlier record) has the
+    same canonical source URL or, for recipes without a source URL, the same
+    slug. Duplicates only gain the record's search terms. Recipes are saved
+    without an extraction ID, since the extraction log is not carried over.
+
+    Returns:
+        The saved recipe for each new record, or None for each duplicate
+    """
+    saved = _writer.submit(lambda session: _import_recipes(session, records))
+    similarity.index_recipes([recipe for recipe in saved if recipe is not None])
+    return saved
+
+
+def _import_recipes(session, records: list[tuple[Recipe, list[str]]]) -> list[Recipe | None]:
+    """Insert a batch with a few set-based queries instead of several per recipe.
+
+    Existing URLs and slugs are looked up once for the batch, new rows are
+    inserted in one flush, and slug counters and summaries are updated once.
+    Only a slug collision falls back to per-recipe allocation.
+    """
+    urls = [canonicalize_url(r.source_url) if r.source_url else None for r, _ in records]
+    slugs = {recipe.slug for recipe, _ in records if recipe.slug is not None}
+    existing: dict[tuple[str, str], int | RecipeTable] = {}
+    for row_id, url in session.query(RecipeTable.id, RecipeTable.canonical_url).filter(
+        RecipeTable.canonical_url.in_({url for url in urls if url is not None})
+    ):
+        existing["url", url] = row_id
+    taken_slugs = set()
+    for row_id, slug, url in session.query(
+        RecipeTable.id, RecipeTable.slug, RecipeTable.canonical_url
+    ).filter(RecipeTable.slug.in_(slugs)):
+        taken_slugs.add(slug)
+        if url is None:
+            existing["slug", slug] = row_id
+
+    new_rows: list[RecipeTable | None] = []
+    new_links: dict[RecipeTable, list[str]] = {}
+    duplicate_links: set[tuple[int, str]] = set()
+    fresh_slugs: list[str] = []
+    for (recipe, search_terms), url in zip(records, urls):
+        key = ("url", url) if url is not None else ("slug", recipe.slug)
+        match = existing.get(key) if key[1] is not None else None
+        if isinstance(match, RecipeTable):
+            new_links[match] = list(dict.fromkeys(new_links[match] + search_terms))
+            new_rows.append(None)
+            continue
+        if match is not None:
+            duplicate_links.update((match, term) for term in search_terms)
+            new_rows.append(None)
+            continue
+
+        slug = recipe.slug
+        if slug is not None:
+            if slug in taken_slugs:
+                session.add_all(new_links)  # visible to the collision checks
+                slug = _allocate_slug(session, slug)
+            else:
+                fresh_slugs.append(slug)
+            taken_slugs.add(slug)
+        recipe = recipe.model_copy(update={"extraction_id": None})
+        row = _recipe_row(recipe, slug, url, None)
+        new_links[row] = list(dict.fromkeys(search_terms))
+        new_rows.append(row)
+        if key[1] is not None:
+            existing[key] = row
+
+    if fresh_slugs:
+        session.execute(
+            sqlite_insert(SlugCounterTable)
+            .values([{"base_slug": slug, "last_suffix": 1} for slug in fresh_slugs])
+            .on_conflict_do_update(
+                index_elements=[SlugCounterTable.base_slug],
+                set_={"last_suffix": SlugCounterTable.last_suffix + 1},
+            )
+        )
+    session.add_all(new_links)
+    session.flush()
+    session.add_all(
+        RecipeSearchTermTable(recipe_id=row.id, search_term=term)
+        for row, terms in new_links.items()
+        for term in terms
+    )
+    if duplicate_links:
+        linked = set(
+            session.query(RecipeSearchTermTable.recipe_id, RecipeSearchTermTable.search_term)
+            .filter(RecipeSearchTermTable.recipe_id.in_({i for i, _ in duplicate_links}))
+            .all()
+        )
+        session.add_all(
+            RecipeSearchTermTable(recipe_id=recipe_id, search_term=term)
+            for recipe_id, term in duplicate_links - linked
+        )
+
+    # One summary refresh per term for the whole batch instead of one per link
+    touched_terms = {term for _, terms in records for term in terms}
+    _refresh_summary(session, list(touched_terms))
+    return [_row_to_recipe(row) if row is not None else None for row in new_rows]
+
+
+def update_recipe(recipe_id: int, recipe: Recipe, content_hash: str | None = None) -> Recipe | None:
+    """Replace the extracted fields of a saved recipe, keeping its slug, URL and search terms.
+
+    Returns the updated recipe, or None if no recipe has that ID.
+    """
+    updated = _writer.submit(
+        lambda session: _update_recipe(session, recipe_id, recipe, content_hash)
+    )
+    if updated is not None:
+        similarity.index_recipe(updated)
+    return updated
+
+
+def _update_recipe(
+    session, recipe_id: int, recipe: Recipe, content_hash: str | None
+) -> Recipe | None:
+    db_recipe = session.query(RecipeTable).filter(RecipeTable.id == recipe_id).first()
+    if db_recipe is None:
+        return None
+    db_recipe.title = recipe.title
+    db_recipe.description = recipe.description
+    db_recipe.ingredients_json = json.dumps([ing.model_dump() for ing in recipe.ingredients])
+    db_recipe.instructions_json = json.dumps(recipe.instructions)
+    db_recipe.prep_time = recipe.prep_time
+    db_recipe.cook_time = recipe.cook_time
+    db_recipe.serving_yield = recipe.serving_yield
+    db_recipe.trust_score = recipe.trust_score.score if recipe.trust_score else None
+    db_recipe.trust_reasoning = recipe.trust_score.reasoning if recipe.trust_score else None
+    if content_hash is not None:
+        db_recipe.content_hash = content_hash
+    if recipe.extraction_id is not None:
+        db_recipe.extraction_id = recipe.extraction_id
+    session.flush()
+    _refresh_summary_for_recipe(session, recipe_id)
+    return _row_to_recipe(db_recipe)
+
+
+def _allocate_slug(session, base_slug: str) -> str:
+    """Reserve a unique slug for base_slug within the session's transaction.
+
+    Bumping the per-base counter is a write, so SQLite's write lock serializes
+    concurrent allocators until the recipe row is committed. Every candidate is
+    checked with a lookup on the unique slug index, so allocation never scans
+    the table.
+    """
+    session.execute(
+        sqlite_insert(SlugCounterTable)
+        .values(base_slug=base_slug, last_suffix=1)
+        .on_conflict_do_update(
+            index_elements=[SlugCounterTable.base_slug],
+            set_={"last_suffix": SlugCounterTable.last_suffix + 1},
+        )
+    )
+    if not _slug_exists(session, base_slug):
+        return base_slug
+
+    suffix = session.get(SlugCounterTable, base_slug, populate_existing=True).last_suffix
+    suffix = max(suffix, 2)
+    while _slug_exists(session, f"{base_slug}-{suffix}"):
+        suffix += 1
+    session.query(SlugCounterTable).filter(SlugCounterTable.base_slug == base_slug).update(
+        {"last_suffix": suffix}
+    )
+    return f"{base_slug}-{suffix}"
+
+
+def _slug_exists(session, slug: str) -> bool:
+    """Return True if a recipe already uses slug."""
+    return session.query(RecipeTable.id).filter(RecipeTable.slug == slug).first() is not None
+
+
+def link_recipe_to_search_term(recipe_id: int, search_term: str) -> Recipe | None:
+    """Associate an existing recipe with another search term and return it."""
+    return _writer.submit(lambda session: _link_recipe(session, recipe_id, search_term))
+
+
+def _link_recipe(session, recipe_id: int, search_term: str) -> Recipe | None:
+    db_recipe = session.query(RecipeTable).filter(RecipeTable.id == recipe_id).first()
+    if db_recipe is None:
+        return None
+    _link(session, recipe_id, search_term)
+    return _row_to_recipe(db_recipe)
+
+
+def _link(session, recipe_id: int, search_term: str | None) -> None:
+    """Add a recipe/search-term link within session unless it already exists."""
+    if search_term is None:
+        return
+    exists = (
+        session.query(RecipeSearchTermTable.id)
+        .filter(RecipeSearchTermTable.recipe_id == recipe_id)
+        .filter(RecipeSearchTermTable.search_term == search_term)
+        .first()
+    )
+    if exists is None:
+        session.add(RecipeSearchTermTable(recipe_id=recipe_id, search_term=search_term))
+        _refresh_summary(session, [search_term])
+
+
+def _summary_query(session):
+    """Return a query aggregating (search_term, recipe count, max trust score) from the links."""
+    return (
+        session.query(
+            RecipeSearchTermTable.search_term,
+            func.count(RecipeSearchTermTable.recipe_id),
+            func.max(RecipeTable.trust_score),
+        )
+        .join(RecipeTable, RecipeTable.id == RecipeSearchTermTable.recipe_id)
+        .group_by(RecipeSearchTermTable.search_term)
+    )
+
+
+def _refresh_summary(session, search_terms: list[str]) -> None:
+    """Recompute the summary rows for search_terms within the session's transaction.
+
+    Each term is aggregated through the search-term index, so the cost depends on
+    the number of recipes for that term, not the size of the library.
+    """
+    now = datetime.now(UTC).replace(tzinfo=None)
+    for search_term in set(search_terms):
+        row = (
+            _summary_query(session).filter(RecipeSearchTermTable.search_term == search_term).first()
+        )
+        if row is None:
+            session.query(SearchTermSummaryTable).filter(
+                SearchTermSummaryTable.search_term == search_term
+            ).delete()
+            continue
+        values = {"recipe_count": row[1], "max_trust_score": row[2], "updated_at": now}
+        session.execute(
+            sqlite_insert(SearchTermSummaryTable)
+            .values(search_term=search_term, query_key=query_key(search_term), **values)
+            .on_conflict_do_update(index_elements=[SearchTermSummaryTable.search_term], set_=values)
+        )
+
+
+def _refresh_summary_for_recipe(session, recipe_id: int) -> None:
+    """Recompute the summary rows for every search term linked to a recipe."""
+    terms = [
+        row[0]
+        for row in session.query(RecipeSearchTermTable.search_term)
+        .filter(RecipeSearchTermTable.recipe_id == recipe_id)
+        .all()
+    ]
+    _refresh_summary(session, terms)
+
+
+def rebuild_search_term_summary() -> int:
+    """Rebuild the search-term summary from the recipe links. Returns the number of terms."""
+    return _writer.submit(_rebuild_search_term_summary)
+
+
+def _rebuild_search_term_summary(session) -> int:
+    now = datetime.now(UTC).replace(tzinfo=None)
+    session.query(SearchTermSummaryTable).delete()
+    rows = _summary_query(session).all()
+    session.add_all(
+        SearchTermSummaryTable(
+            search_term=row[0],
+            query_key=query_key(row[0]),
+            recipe_count=row[1],
+            max_trust_score=row[2],
+            updated_at=now,
+        )
+        for row in rows
+    )
+    return len(rows)
+
+
+def check_search_term_summary() -> list[str]:
+    """Compare the search-term summary with the recipe links.
+
+    Returns:
+        A description of each inconsistent search term (empty if consistent).
+    """
+    with _get_session() as session:
+        expected = {row[0]: (row[1], row[2]) for row in _summary_query(session).all()}
+        summary = session.query(SearchTermSummaryTable).all()
+        actual = {row.search_term: (row.recipe_count, row.max_trust_score) for row in summary}
+        stale_keys = sorted(
+            row.search_term for row in summary if row.query_key != query_key(row.search_term)
+        )
+
+    problems = []
+    for term in sorted(expected.keys() | actual.keys()):
+        if term not in actual:
+            problems.append(f'"{term}": missing from summary')
+        elif term not in expected:
+            problems.append(f'"{term}": summarized but has no recipes')
+        elif expected[term] != actual[term]:
+            problems.append(
+                f'"{term}": summary has {actual[term][0]} recipe(s), max score {actual[term][1]}; '
+                f"expected {expected[term][0]}, max score {expected[term][1]}"
+            )
+    problems.extend(f'"{term}": outdated query key' for term in stale_keys)
+    return problems
 
 
 def get_recipe(recipe_id: int) -> Recipe | None:
@@ -96,6 +729,30 @@ def get_recipe(recipe_id: int) -> Recipe | None:
         return _row_to_recipe(db_recipe)
 
 
+def get_recipes_by_ids(recipe_ids: list[int]) -> list[Recipe]:
+    """Retrieve recipes by ID in the given order, skipping IDs that no longer exist."""
+    with _get_session() as session:
+        rows = session.query(RecipeTable).filter(RecipeTable.id.in_(recipe_ids)).all()
+        by_id = {row.id: _row_to_recipe(row) for row in rows}
+        return [by_id[recipe_id] for recipe_id in recipe_ids if recipe_id in by_id]
+
+
+def count_recipes(search_term: str | None = None) -> int:
+    """Return the number of saved recipes, or of recipes for a search term (case-insensitive).
+
+    A search term's count is read from the search-term summary.
+    """
+    with _get_session() as session:
+        if search_term is None:
+            return session.query(func.count(RecipeTable.id)).scalar()
+        count = (
+            session.query(SearchTermSummaryTable.recipe_count)
+            .filter(SearchTermSummaryTable.search_term == search_term.lower())
+            .scalar()
+        )
+        return count or 0
+
+
 def get_all_recipes() -> list[Recipe]:
     """Retrieve all recipes from the database."""
     with _get_session() as session:
@@ -103,6 +760,39 @@ def get_all_recipes() -> list[Recipe]:
         return [_row_to_recipe(row) for row in rows]
 
 
+def iter_recipes(chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[tuple[Recipe, list[str]]]:
+    """Yield every saved recipe with all of its search terms, oldest first.
+
+    Rows are read in chunks of chunk_size by ID, each chunk in its own short
+    session, so memory use does not grow with the library and writers are
+    not held up for the length of the whole read.
+    """
+    last_id = 0
+    while True:
+        with _get_session() as session:
+            rows = (
+                session.query(RecipeTable)
+                .filter(RecipeTable.id > last_id)
+                .order_by(RecipeTable.id)
+                .limit(chunk_size)
+                .all()
+            )
+            if not rows:
+                return
+            ids = [row.id for row in rows]
+            terms: dict[int, list[str]] = defaultdict(list)
+            links = (
+                session.query(RecipeSearchTermTable.recipe_id, RecipeSearchTermTable.search_term)
+                .filter(RecipeSearchTermTable.recipe_id.in_(ids))
+                .order_by(RecipeSearchTermTable.id)
+            )
+            for recipe_id, search_term in links:
+                terms[recipe_id].append(search_term)
+            chunk = [(_row_to_recipe(row), terms[row.id]) for row in rows]
+        yield from chunk
+        last_id = ids[-1]
+
+
 def _row_to_recipe(row: RecipeTable) -> Recipe:
     """Convert a database row to a Recipe model."""
     ingredients = [Ingredient(**ing) for ing in json.loads(row.ingredients_json)]
@@ -123,6 +813,7 @@ def _row_to_recipe(row: RecipeTable) -> Recipe:
         trust_score=trust_score,
         slug=row.slug,
         search_term=row.search_term,
+        extraction_id=row.extraction_id,
     )
 
 
@@ -135,82 +826,381 @@ def get_recipe_by_slug(slug: str) -> Recipe | None:
         return _row_to_recipe(db_recipe)
 
 
+def _query_by_search_term(session, search_term: str):
+    """Return a recipe query joined to the links for a search term.
+
+    Search terms are always stored lowercase, so an exact match on the
+    lowercased input is case-insensitive and can use the index.
+    """
+    return (
+        session.query(RecipeTable)
+        .join(RecipeSearchTermTable, RecipeSearchTermTable.recipe_id == RecipeTable.id)
+        .filter(RecipeSearchTermTable.search_term == search_term.lower())
+    )
+
+
 def get_recipes_by_search_term(search_term: str) -> list[Recipe]:
     """Retrieve all recipes for a given search term (case-insensitive)."""
     with _get_session() as session:
         rows = (
-            session.query(RecipeTable)
-            .filter(func.lower(RecipeTable.search_term) == search_term.lower())
+            _query_by_search_term(session, search_term)
             .order_by(RecipeTable.trust_score.desc())
             .all()
         )
         return [_row_to_recipe(row) for row in rows]
 
 
+def get_recipes_by_query_key(
+    key: str, min_trust_score: int | None = None, limit: int | None = None
+) -> list[Recipe]:
+    """Retrieve recipes filed under any search term with the given query key.
+
+    The search terms are found through the summary's query-key index, so
+    "chocolate-chip cookies" finds recipes saved for "Chocolate chip cookie".
+    A recipe filed under several matching terms is returned once.
+
+    Args:
+        key: A key from utils.query_key
+        min_trust_score: Only return recipes scored at least this high
+        limit: Maximum number of recipes to return
+
+    Returns:
+        Recipes, highest trust score first, then newest first
+    """
+    with _get_session() as session:
+        terms = session.query(SearchTermSummaryTable.search_term).filter(
+            SearchTermSummaryTable.query_key == key
+        )
+        recipe_ids = session.query(RecipeSearchTermTable.recipe_id).filter(
+            RecipeSearchTermTable.search_term.in_(terms.scalar_subquery())
+        )
+        query = session.query(RecipeTable).filter(RecipeTable.id.in_(recipe_ids.scalar_subquery()))
+        if min_trust_score is not None:
+            query = query.filter(RecipeTable.trust_score >= min_trust_score)
+        query = query.order_by(RecipeTable.trust_score.desc().nulls_last(), RecipeTable.id.desc())
+        if limit is not None:
+            query = query.limit(limit)
+        return [_row_to_recipe(row) for row in query.all()]
+
+
+def get_recipes_page(
+    search_term: str | None = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    after: tuple[int | None, int] | None = None,
+) -> tuple[list[Recipe], bool]:
+    """Retrieve one page of recipes, highest trust score first, then newest first.
+
+    Pages are addressed by keyset: after is the (trust score, ID) of the last
+    recipe on the previous page, so a page is fetched by seeking past it
+    rather than with an OFFSET that reads every earlier row. Only the page's
+    rows are loaded. Recipes without a trust score come last.
+
+    Args:
+        search_term: Only list recipes for this search term (case-insensitive)
+        page_size: Maximum number of recipes to return
+        after: The (trust score, ID) of the last recipe on the previous page
+
+    Returns:
+        The page's recipes and whether more recipes follow
+    """
+    with _get_session() as session:
+        if search_term is not None:
+            query = _query_by_search_term(session, search_term)
+        else:
+            query = session.query(RecipeTable)
+        after_score, after_id = after if after is not None else (None, None)
+
+        rows = []
+        # Scored recipes first; a row-value comparison lets SQLite seek the index
+        if after is None or after_score is not None:
+            scored = query.filter(RecipeTable.trust_score.isnot(None))
+            if after is not None:
+                scored = scored.filter(
+                    tuple_(RecipeTable.trust_score, RecipeTable.id) < (after_score, after_id)
+                )
+            rows = (
+                scored.order_by(RecipeTable.trust_score.desc(), RecipeTable.id.desc())
+                .limit(page_size + 1)
+                .all()
+            )
+        if len(rows) <= page_size:
+            unscored = query.filter(RecipeTable.trust_score.is_(None))
+            if after_id is not None and after_score is None:
+                unscored = unscored.filter(RecipeTable.id < after_id)
+            rows += unscored.order_by(RecipeTable.id.desc()).limit(page_size + 1 - len(rows)).all()
+
+        return [_row_to_recipe(row) for row in rows[:page_size]], len(rows) > page_size
+
+
+def get_archived_recipes(
+    slug: str | None = None,
+    search_term: str | None = None,
+) -> list[tuple[Recipe, str]]:
+    """Get recipes with archived source content, paired with their content hashes.
+
+    Filters by slug or search term (case-insensitive) when given; otherwise
+    returns every archived recipe.
+    """
+    with _get_session() as session:
+        if search_term is not None:
+            query = _query_by_search_term(session, search_term)
+        else:
+            query = session.query(RecipeTable)
+        if slug is not None:
+            query = query.filter(RecipeTable.slug == slug)
+        rows = query.filter(RecipeTable.content_hash.isnot(None)).order_by(RecipeTable.id).all()
+        return [(_row_to_recipe(row), row.content_hash) for row in rows]
+
+
+def get_stale_recipes(
+    fetched_before: datetime,
+    slug: str | None = None,
+    search_term: str | None = None,
+) -> list[tuple[Recipe, str | None]]:
+    """Get recipes whose source page was last fetched before a cutoff.
+
+    Recipes never fetched (such as imported ones) count as stale; recipes
+    without a source URL are skipped. Filters by slug or search term
+    (case-insensitive) when given.
+
+    Returns:
+        Recipes paired with their stored content hash, least recently fetched first
+    """
+    with _get_session() as session:
+        if search_term is not None:
+            query = _query_by_search_term(session, search_term)
+        else:
+            query = session.query(RecipeTable)
+        if slug is not None:
+            query = query.filter(RecipeTable.slug == slug)
+        rows = (
+            query.filter(RecipeTable.source_url.isnot(None))
+            .filter((RecipeTable.fetched_at.is_(None)) | (RecipeTable.fetched_at < fetched_before))
+            .order_by(RecipeTable.fetched_at.asc().nulls_first(), RecipeTable.id)
+            .all()
+        )
+        return [(_row_to_recipe(row), row.content_hash) for row in rows]
+
+
+def mark_recipes_fetched(recipe_ids: list[int]) -> None:
+    """Record that the source pages of these recipes were fetched just now."""
+    if not recipe_ids:
+        return
+    now = datetime.now(UTC).replace(tzinfo=None)
+    _writer.submit(
+        lambda session: (
+            session.query(RecipeTable)
+            .filter(RecipeTable.id.in_(recipe_ids))
+            .update({"fetched_at": now}, synchronize_session=False)
+        )
+    )
+
+
+def get_recipes_by_source_urls(urls: list[str]) -> dict[str, Recipe]:
+    """Map canonical source URLs to already-saved recipes for any of the given URLs."""
+    canonical_urls = {canonicalize_url(url) for url in urls}
+    if not canonical_urls:
+        return {}
+    with _get_session() as session:
+        rows = (
+            session.query(RecipeTable).filter(RecipeTable.canonical_url.in_(canonical_urls)).all()
+        )
+        return {row.canonical_url: _row_to_recipe(row) for row in rows}
+
+
 def get_saved_urls_by_search_term(search_term: str) -> list[str]:
     """Get all source URLs for a given search term (case-insensitive)."""
     with _get_session() as session:
         rows = (
-            session.query(RecipeTable.source_url)
-            .filter(func.lower(RecipeTable.search_term) == search_term.lower())
+            _query_by_search_term(session, search_term)
+            .with_entities(RecipeTable.source_url)
             .filter(RecipeTable.source_url.isnot(None))
             .all()
         )
         return [row[0] for row in rows]
 
 
-def get_all_search_terms() -> list[str]:
-    """Get all unique search terms from the database."""
-    with _get_session() as session:
-        rows = session.query(RecipeTable.search_term).distinct().all()
-        return [row[0] for row in rows if row[0] is not None]
-
-
 def get_search_term_counts() -> list[tuple[str, int]]:
-    """Get all search terms with recipe counts."""
+    """Get all search terms with recipe counts, read from the search-term summary."""
     with _get_session() as session:
         rows = (
             session.query(
-                RecipeTable.search_term,
-                func.count(RecipeTable.id),
+                SearchTermSummaryTable.search_term,
+                SearchTermSummaryTable.recipe_count,
             )
-            .filter(RecipeTable.search_term.isnot(None))
-            .group_by(RecipeTable.search_term)
+            .order_by(SearchTermSummaryTable.search_term)
             .all()
         )
         return [(row[0], row[1]) for row in rows]
 
 
-def get_all_slugs() -> set[str]:
-    """Get all existing slugs from the database."""
+def increment_provider_stat(provider: str, model: str, metric: str, amount: int = 1) -> None:
+    """Add amount to a named counter for a provider and model."""
+    _writer.submit(lambda session: _increment_stat(session, provider, model, metric, amount))
+
+
+def _increment_stat(session, provider: str, model: str, metric: str, amount: int = 1) -> None:
+    session.execute(
+        sqlite_insert(ProviderStatTable)
+        .values(provider=provider, model=model, metric=metric, count=amount)
+        .on_conflict_do_update(
+            index_elements=[
+                ProviderStatTable.provider,
+                ProviderStatTable.model,
+                ProviderStatTable.metric,
+            ],
+            set_={"count": ProviderStatTable.count + amount},
+        )
+    )
+
+
+def get_provider_stats() -> dict[tuple[str, str], dict[str, int]]:
+    """Get all provider counters, grouped by (provider, model)."""
     with _get_session() as session:
-        rows = session.query(RecipeTable.slug).all()
-        return {row[0] for row in rows if row[0] is not None}
+        rows = session.query(ProviderStatTable).order_by(
+            ProviderStatTable.provider, ProviderStatTable.model
+        )
+        stats: dict[tuple[str, str], dict[str, int]] = {}
+        for row in rows:
+            stats.setdefault((row.provider, row.model), {})[row.metric] = row.count
+        return stats
+
+
+def log_extraction(call: ExtractionCall) -> Future[int]:
+    """Queue an extraction call's log row and provider counters without waiting.
+
+    Returns:
+        A future resolving to the log row's ID once it is committed
+    """
+    created_at = datetime.now(UTC).replace(tzinfo=None)
+
+    def insert(session) -> int:
+        row = ExtractionLogTable(
+            created_at=created_at,
+            provider=call.provider,
+            model=call.model,
+            requests=call.usage.requests,
+            input_tokens=call.usage.input_tokens,
+            output_tokens=call.usage.output_tokens,
+            cached_tokens=call.usage.cached_tokens,
+            latency_ms=call.latency_ms,
+            outcome=call.outcome,
+        )
+        session.add(row)
+        for metric in call.metrics:
+            _increment_stat(session, call.provider, call.model, metric)
+        session.flush()
+        return row.id
+
+    return _writer.post(insert)
+
+
+def get_extraction_records(since: datetime | None = None) -> list[ExtractionRecord]:
+    """Get logged extraction calls, oldest first, optionally only those after since (UTC)."""
+    with _get_session() as session:
+        query = session.query(ExtractionLogTable)
+        if since is not None:
+            query = query.filter(ExtractionLogTable.created_at >= since)
+        return [
+            ExtractionRecord(
+                id=row.id,
+                created_at=row.created_at,
+                provider=row.provider,
+                model=row.model,
+                usage=Usage(
+                    input_tokens=row.input_tokens,
+                    output_tokens=row.output_tokens,
+                    cached_tokens=row.cached_tokens,
+                    requests=row.requests,
+                ),
+                latency_ms=row.latency_ms,
+                outcome=row.outcome,
+            )
+            for row in query.order_by(ExtractionLogTable.created_at, ExtractionLogTable.id)
+        ]
 
 
 def delete_recipe_by_slug(slug: str) -> bool:
     """Delete a recipe by its slug. Returns True if deleted, False if not found."""
-    with _get_session() as session:
-        result = session.query(RecipeTable).filter(RecipeTable.slug == slug).delete()
-        session.commit()
-        return result > 0
+    recipe_id = _writer.submit(lambda session: _delete_recipe_by_slug(session, slug))
+    if recipe_id is None:
+        return False
+    similarity.remove_recipes([recipe_id])
+    return True
+
+
+def _delete_recipe_by_slug(session, slug: str) -> int | None:
+    db_recipe = session.query(RecipeTable).filter(RecipeTable.slug == slug).first()
+    if db_recipe is None:
+        return None
+    terms = [
+        row[0]
+        for row in session.query(RecipeSearchTermTable.search_term)
+        .filter(RecipeSearchTermTable.recipe_id == db_recipe.id)
+        .all()
+    ]
+    session.query(RecipeSearchTermTable).filter(
+        RecipeSearchTermTable.recipe_id == db_recipe.id
+    ).delete()
+    session.delete(db_recipe)
+    _refresh_summary(session, terms)
+    return db_recipe.id
 
 
 def delete_recipes_by_search_term(search_term: str) -> int:
-    """Delete all recipes for a search term (case-insensitive). Returns count of deleted recipes."""
-    with _get_session() as session:
-        result = (
-            session.query(RecipeTable)
-            .filter(func.lower(RecipeTable.search_term) == search_term.lower())
-            .delete()
-        )
-        session.commit()
-        return result
+    """Remove all recipes from a search term (case-insensitive). Returns count of recipes removed.
+
+    Recipes that are still linked to another search term are kept for that term.
+    """
+    removed, orphan_ids = _writer.submit(
+        lambda session: _delete_recipes_by_search_term(session, search_term.lower())
+    )
+    if orphan_ids:
+        similarity.remove_recipes(orphan_ids)
+    return removed
+
+
+def _delete_recipes_by_search_term(session, search_term: str) -> tuple[int, list[int]]:
+    """Unlink search_term and delete the recipes left without a term.
+
+    Returns the number of recipes unlinked and the IDs of those deleted.
+    """
+    recipe_ids = [
+        row[0]
+        for row in session.query(RecipeSearchTermTable.recipe_id)
+        .filter(RecipeSearchTermTable.search_term == search_term)
+        .all()
+    ]
+    if not recipe_ids:
+        return 0, []
+    session.query(RecipeSearchTermTable).filter(
+        RecipeSearchTermTable.search_term == search_term
+    ).delete()
+    still_linked = session.query(RecipeSearchTermTable.recipe_id).filter(
+        RecipeSearchTermTable.recipe_id.in_(recipe_ids)
+    )
+    orphan_ids = [
+        row[0]
+        for row in session.query(RecipeTable.id)
+        .filter(RecipeTable.id.in_(recipe_ids))
+        .filter(RecipeTable.id.not_in(still_linked))
+        .all()
+    ]
+    session.query(RecipeTable).filter(RecipeTable.id.in_(orphan_ids)).delete(
+        synchronize_session=False
+    )
+    _refresh_summary(session, [search_term])
+    return len(recipe_ids), orphan_ids
 
 
 def delete_all_recipes() -> int:
     """Delete all recipes from the database. Returns count of deleted recipes."""
-    with _get_session() as session:
-        result = session.query(RecipeTable).delete()
-        session.commit()
-        return result
+    deleted = _writer.submit(_delete_all_recipes)
+    similarity.clear_index()
+    return deleted
+
+
+def _delete_all_recipes(session) -> int:
+    session.query(SearchTermSummaryTable).delete()
+    session.query(RecipeSearchTermTable).delete()
+    return session.query(RecipeTable).delete()
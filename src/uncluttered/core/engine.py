@@ -1,81 +1,601 @@
 """Pipeline orchestrator for recipe search and extraction."""
 
-from .agent import extract_recipe
-from .database import add_recipe, get_all_slugs, get_saved_urls_by_search_term
-from .models import Recipe
-from .search import search_for_recipes
-from .utils import generate_slug, make_unique_slug
+import logging
+import os
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from .agent import extract_recipe, extract_recipes_packed
+from .archive import load_content, store_content
+from .database import (
+    add_recipe,
+    get_recipes_by_query_key,
+    get_recipes_by_source_urls,
+    get_saved_urls_by_search_term,
+    link_recipe_to_search_term,
+    log_extraction,
+    mark_recipes_fetched,
+    update_recipe,
+)
+from .models import ExtractionCall, Recipe
+from .providers import get_provider
+from .providers.base import CallRecorder
+from .resilience import Deadline, DeadlineExceeded
+from .screening import (
+    audit_rejection,
+    get_screener,
+    is_miss,
+    is_usable,
+    record_screening,
+    screen_page,
+)
+from .search import SearchResult, preprocess_pages, search_for_recipes
+from .search_providers import get_search_provider
+from .search_providers.base import FetchingSearchProvider
+from .singleflight import SingleFlight
+from .utils import (
+    canonicalize_url,
+    estimate_tokens,
+    generate_slug,
+    normalize_query,
+    query_key,
+)
+
+logger = logging.getLogger(__name__)
+
+# Most sources sent in one packed extraction request
+MAX_PACK_SOURCES = 4
+
+# Lowest trust score of a saved recipe served without searching (see find_saved_recipes)
+DEFAULT_OFFLINE_MIN_TRUST = 70
+
+# Source pages fetched per request when refreshing saved recipes
+REFRESH_BATCH_SIZE = 20
+
+
+@dataclass
+class _Extraction:
+    """One source's extraction outcome and the LLM call that produced it."""
+
+    outcome: Recipe | Exception
+    # The last LLM call made for the source, and its queued extraction log row
+    call: ExtractionCall | None = None
+    log: Future[int] | None = None
+
+    def extraction_id(self) -> int | None:
+        """Wait for the extraction log row and return its ID, or None if it was not written."""
+        if self.log is None:
+            return None
+        try:
+            return self.log.result()
+        except Exception:
+            return None
+
+    def tagged(self) -> Recipe:
+        """Return a copy of the extracted recipe carrying its extraction log ID.
+
+        Extractions may be shared with concurrent queries, so callers work on a copy.
+        """
+        return self.outcome.model_copy(deep=True, update={"extraction_id": self.extraction_id()})
+
+
+# Concurrent identical queries share one pipeline run, and concurrent
+# extractions of the same canonical source URL share one LLM call.
+_query_flight: SingleFlight[list[Recipe]] = SingleFlight()
+_source_flight: SingleFlight[_Extraction] = SingleFlight()
+
+
+def is_offline_first() -> bool:
+    """Return True if OFFLINE_FIRST is set, making offline-first the default mode."""
+    return os.getenv("OFFLINE_FIRST", "").lower() in ("1", "true", "yes", "on")
+
+
+def find_saved_recipes(query: str, count: int) -> list[Recipe] | None:
+    """
+    Return saved recipes for a query if the library already covers it well.
+
+    Saved search terms match when they have the same query key (see
+    utils.query_key), so "Chocolate-chip cookies" finds recipes saved for
+    "chocolate chip cookie". Coverage is enough when at least count of the
+    matching recipes have a trust score of OFFLINE_MIN_TRUST or more.
+
+    Args:
+        query: User's recipe search query
+        count: Number of recipes wanted
+
+    Returns:
+        The best count matching recipes, or None if the library has too few
+    """
+    min_trust = int(os.getenv("OFFLINE_MIN_TRUST", str(DEFAULT_OFFLINE_MIN_TRUST)))
+    recipes = get_recipes_by_query_key(query_key(query), min_trust_score=min_trust, limit=count)
+    return recipes if count > 0 and len(recipes) >= count else None
+
+
+@dataclass
+class QueryResult:
+    """What one process_query call returned."""
+
+    # Top recipes sorted by trust score, at most display_count
+    recipes: list[Recipe]
+    # True if the recipes came from the library without searching
+    from_library: bool = False
 
 
 def process_query(
     query: str,
     fetch_count: int = 5,
     display_count: int = 3,
-) -> list[Recipe]:
+    timeout: float | None = None,
+    on_recipe: Callable[[Recipe], None] | None = None,
+    offline_first: bool | None = None,
+) -> QueryResult:
     """
     Orchestrate the full multi-recipe pipeline: Search -> Extract -> Save.
 
+    Concurrent calls with the same normalized query are coalesced: the first
+    caller runs the pipeline (with its fetch_count and timeout) and every
+    caller receives the same saved recipes.
+
+    In offline-first mode, saved recipes matching the query are returned
+    without searching when the library covers it (see find_saved_recipes).
+
     Args:
         query: User's recipe search query (e.g., "Best Carbonara")
         fetch_count: Number of recipes to fetch and save (default 5)
         display_count: Number of top recipes to return for display (default 3)
+        timeout: Optional overall time budget in seconds. Provider retries stop
+            within it, and sources not extracted in time are skipped.
+        on_recipe: Optional callback receiving each saved recipe as soon as it
+            is saved, in production order and regardless of display_count
+        offline_first: Serve saved recipes when they cover the query; None
+            reads the OFFLINE_FIRST environment variable
 
     Returns:
-        Top recipes sorted by trust score for display
+        Top recipes sorted by trust score for display, and whether they were
+        served from the library
     """
+    if offline_first is None:
+        offline_first = is_offline_first()
+    if offline_first:
+        saved = find_saved_recipes(query, display_count)
+        if saved is not None:
+            if on_recipe is not None:
+                for recipe in saved:
+                    on_recipe(recipe)
+            return QueryResult(saved, from_library=True)
+
+    search_term = normalize_query(query)
+    deadline = Deadline(timeout)
+    led = False
+
+    def run() -> list[Recipe]:
+        nonlocal led
+        led = True
+        return _run_pipeline(query, search_term, fetch_count, deadline, on_recipe)
+
+    recipes = _query_flight.do(search_term, run)
+    # A coalesced caller did not see the recipes as they were saved
+    if on_recipe is not None and not led:
+        for recipe in recipes:
+            on_recipe(recipe)
+    return QueryResult(recipes[:display_count])
+
+
+def _run_pipeline(
+    query: str,
+    search_term: str,
+    fetch_count: int,
+    deadline: Deadline,
+    on_recipe: Callable[[Recipe], None] | None = None,
+) -> list[Recipe]:
+    """Search, extract and save recipes for one query, sorted by trust score."""
+    # Build the LLM client and open its connection while the search runs
+    threading.Thread(target=_warm_up_provider, name="provider-warm-up", daemon=True).start()
+
     # Step 1: Search for multiple recipe sources, excluding already-saved URLs
-    saved_urls = get_saved_urls_by_search_term(query.lower())
-    search_results = search_for_recipes(query, num_results=fetch_count, exclude_urls=saved_urls)
+    saved_urls = get_saved_urls_by_search_term(search_term)
+    search_results = search_for_recipes(
+        query, num_results=fetch_count, exclude_urls=saved_urls, timeout=deadline.remaining()
+    )
 
     if not search_results:
         raise ValueError(f"No search results found for: {query}")
 
-    # Get existing slugs to ensure uniqueness
-    existing_slugs = get_all_slugs()
+    # Pages already extracted under another search term are linked, not re-extracted
+    known_recipes = get_recipes_by_source_urls([result.url for result in search_results])
+
+    screener = get_screener()
 
-    # Step 2: Extract recipes from each source
+    # Step 2: Decide which sources need extraction
     recipes: list[Recipe] = []
     errors: list[str] = []
+    pending: list[tuple[SearchResult, str, bool]] = []
     for rank, result in enumerate(search_results, 1):
+        canonical_url = canonicalize_url(result.url)
         try:
-            # Build context from search result with search metadata
-            context = (
-                f"--- Source: {result.url} ---\n"
-                f"Title: {result.title}\n"
-                f"Search rank: {rank} of {len(search_results)}"
-                f" | Relevance: {result.score:.2f}\n\n"
-                f"{result.content}\n"
-            )
+            known = known_recipes.get(canonical_url)
+            linked = None
+            if known is not None:
+                linked = link_recipe_to_search_term(known.id, search_term)
+        except Exception as e:
+            errors.append(f"{result.url}: {e}")
+            continue
+        if linked is not None:
+            recipes.append(linked)
+            if on_recipe is not None:
+                on_recipe(linked)
+            continue
 
-            # Extract structured recipe
-            recipe = extract_recipe(context)
+        # Optionally skip pages a cheap screener considers unlikely to hold a recipe
+        passed = True
+        if screener is not None:
+            passed = screen_page(screener, result.title, result.content)
+            if not passed and not audit_rejection():
+                record_screening(passed, hit=None)
+                errors.append(f"{result.url}: screened out as unlikely to contain a recipe")
+                continue
 
-            # Generate unique slug
-            base_slug = generate_slug(recipe.title)
-            unique_slug = make_unique_slug(base_slug, existing_slugs)
-            existing_slugs.add(unique_slug)
+        # Build context from search result with search metadata
+        context = (
+            f"--- Source: {result.url} ---\n"
+            f"Title: {result.title}\n"
+            f"Search rank: {rank} of {len(search_results)}"
+            f" | Relevance: {result.score:.2f}\n\n"
+            f"{result.content}\n"
+        )
+        pending.append((result, context, passed))
 
-            # Add metadata
-            recipe.slug = unique_slug
-            recipe.search_term = query.lower()
+    # Step 3: Extract structured recipes
+    extractions = _extract_all(
+        [(canonicalize_url(r.url), context) for r, context, _ in pending], deadline
+    )
+
+    # Step 4: Save each extracted recipe
+    for (result, _, passed), extraction in zip(pending, extractions):
+        outcome = extraction.outcome
+        try:
+            if isinstance(outcome, Exception):
+                # Validation failures mean the page had no extractable recipe
+                if screener is not None and is_miss(outcome):
+                    record_screening(passed, hit=False, call=extraction.call)
+                raise outcome
+            if screener is not None:
+                record_screening(passed, hit=is_usable(outcome), call=extraction.call)
+
+            recipe = extraction.tagged()
+
+            # Add metadata; the database makes the slug unique when saving
+            recipe.slug = generate_slug(recipe.title)
+            recipe.search_term = search_term
             recipe.source_url = result.url
 
-            # Save to database
-            saved_recipe = add_recipe(recipe)
+            # Archive the page text so the recipe can be re-extracted offline,
+            # then save to database
+            content_hash = store_content(result.content, result.content_hash)
+            saved_recipe = add_recipe(recipe, content_hash=content_hash)
             recipes.append(saved_recipe)
 
         except Exception as e:
             errors.append(f"{result.url}: {e}")
             continue
 
+        if on_recipe is not None:
+            on_recipe(saved_recipe)
+
     if not recipes:
         error_detail = "; ".join(errors[:3])
         raise ValueError(f"Failed to extract any recipes for: {query} ({error_detail})")
 
-    # Step 3: Sort by trust score and return top N for display
+    # Step 5: Sort by trust score
     recipes.sort(
         key=lambda r: r.trust_score.score if r.trust_score else 0,
         reverse=True,
     )
 
-    return recipes[:display_count]
+    return recipes
+
+
+def _warm_up_provider() -> None:
+    """Construct the provider and let it preconnect; failures surface later, at extraction."""
+    try:
+        get_provider().warm_up()
+    except Exception as e:
+        logger.info("Provider warm-up failed: %s", e)
+
+
+def _plan_packs(contexts: list[str]) -> list[list[int]]:
+    """Group short contexts into packs of 2+ that fit within PACK_TOKEN_BUDGET.
+
+    Packing is disabled when PACK_TOKEN_BUDGET is unset or 0. Only contexts
+    of at most half the budget are packed; longer ones are extracted alone.
+    """
+    budget = int(os.getenv("PACK_TOKEN_BUDGET", "0"))
+    if budget <= 0:
+        return []
+
+    packs: list[list[int]] = []
+    current: list[int] = []
+    used = 0
+    for index, context in enumerate(contexts):
+        tokens = estimate_tokens(context)
+        if tokens > budget // 2:
+            continue
+        if current and (used + tokens > budget or len(current) == MAX_PACK_SOURCES):
+            packs.append(current)
+            current, used = [], 0
+        current.append(index)
+        used += tokens
+    packs.append(current)
+    return [pack for pack in packs if len(pack) > 1]
+
+
+def _extract_all(
+    sources: list[tuple[str, str]],
+    deadline: Deadline | None = None,
+    concurrency: int | None = None,
+) -> list[_Extraction]:
+    """
+    Extract a recipe from each (key, context) source.
+
+    Sources not started before the deadline get a DeadlineExceeded outcome.
+    Every LLM call is queued for the extraction log without waiting for it
+    to be written.
+
+    Extractions are coalesced by key (the canonical URL): each source's
+    flight is claimed up front, so another query extracting the same page
+    at the same moment waits for this call instead of paying for its own,
+    and sources another query has already claimed wait for its result.
+    Short claimed sources are packed into shared requests when packing is
+    enabled; sources a packed response fails on are retried alone. Single
+    extractions run `concurrency` (or EXTRACTION_CONCURRENCY, default 1) at
+    a time.
+
+    Returns:
+        The extraction of each source, in order
+    """
+    extractions: list[_Extraction | None] = [None] * len(sources)
+    claimed = [index for index, (key, _) in enumerate(sources) if _source_flight.claim(key)]
+    unresolved = set(claimed)
+    joined = [index for index in range(len(sources)) if index not in unresolved]
+
+    def settle(index: int, extraction: _Extraction) -> _Extraction:
+        """Store a claimed source's extraction and hand it to queries waiting on it."""
+        extractions[index] = extraction
+        unresolved.discard(index)
+        _source_flight.resolve(sources[index][0], extraction)
+        return extraction
+
+    def expired() -> _Extraction | None:
+        if deadline is not None and deadline.expired:
+            return _Extraction(DeadlineExceeded("query deadline exceeded before extraction"))
+        return None
+
+    def attempt(index: int) -> _Extraction:
+        context = sources[index][1]
+        return expired() or _extract(
+            lambda record: extract_recipe(context, deadline=deadline, record=record)
+        )
+
+    def extract_claimed(index: int) -> _Extraction:
+        return settle(index, attempt(index))
+
+    def extract_joined(index: int) -> _Extraction:
+        key = sources[index][0]
+        extraction = _source_flight.do(key, lambda: attempt(index))
+        if isinstance(extraction.outcome, DeadlineExceeded) and extraction.call is None:
+            # The other query ran out of time before calling the LLM; try within ours
+            extraction = _source_flight.do(key, lambda: attempt(index))
+        return extraction
+
+    try:
+        for pack in _plan_packs([sources[index][1] for index in claimed]):
+            if expired():
+                break
+            members = [claimed[position] for position in pack]
+            calls: list[ExtractionCall] = []
+            try:
+                packed = extract_recipes_packed(
+                    [sources[index][1] for index in members], deadline=deadline, record=calls.append
+                )
+            except Exception as e:
+                _record_calls(calls)
+                logger.info(
+                    "Packed extraction of %d sources failed, retrying alone: %s", len(members), e
+                )
+                continue
+            call, log = calls[-1] if calls else None, _record_calls(calls)
+            for index, recipe in zip(members, packed):
+                if recipe is not None:
+                    settle(index, _Extraction(recipe, call, log))
+
+        # Claimed sources are finished before waiting on other queries' flights
+        remaining = [index for index in claimed if extractions[index] is None]
+        for indices, extract in ((remaining, extract_claimed), (joined, extract_joined)):
+            for index, extraction in zip(indices, _map(extract, indices, concurrency)):
+                extractions[index] = extraction
+    finally:
+        # Never leave another query waiting on a flight this call claimed
+        for index in list(unresolved):
+            _source_flight.resolve(
+                sources[index][0], error=RuntimeError("extraction was abandoned")
+            )
+
+    return extractions
+
+
+def _map(
+    fn: Callable[[int], _Extraction], indices: list[int], concurrency: int | None
+) -> list[_Extraction]:
+    """Apply fn to each index, `concurrency` (or EXTRACTION_CONCURRENCY) at a time."""
+    if concurrency is None:
+        concurrency = int(os.getenv("EXTRACTION_CONCURRENCY", "1"))
+    workers = min(concurrency, len(indices))
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(fn, indices))
+    return [fn(index) for index in indices]
+
+
+def _extract(extract: Callable[[CallRecorder], Recipe]) -> _Extraction:
+    """Run one extraction, queueing its LLM calls for the log, and capture its outcome."""
+    calls: list[ExtractionCall] = []
+    try:
+        outcome: Recipe | Exception = extract(calls.append)
+    except Exception as e:
+        outcome = e
+    return _Extraction(outcome, calls[-1] if calls else None, _record_calls(calls))
+
+
+def _record_calls(calls: list[ExtractionCall]) -> Future[int] | None:
+    """Queue log rows for calls and return the future ID of the last one.
+
+    Logging is best-effort: a failed write is reported as a warning and
+    never fails the extraction.
+    """
+    log = None
+    for call in calls:
+        log = log_extraction(call)
+        log.add_done_callback(_warn_if_not_logged)
+    return log
+
+
+def _warn_if_not_logged(log: Future[int]) -> None:
+    if log.exception() is not None:
+        logger.warning("Could not log extraction: %s", log.exception())
+
+
+def reextract_recipes(archived: list[tuple[Recipe, str]]) -> tuple[list[Recipe], list[str]]:
+    """
+    Re-run extraction for saved recipes using only their archived source content.
+
+    No search is performed. Each recipe keeps its slug, source URL and search terms.
+
+    Args:
+        archived: Saved recipes paired with the content hash of their source page
+
+    Returns:
+        The updated recipes and a list of per-recipe error messages
+    """
+    updated: list[Recipe] = []
+    errors: list[str] = []
+    pending: list[tuple[Recipe, str]] = []
+    for saved, content_hash in archived:
+        content = load_content(content_hash)
+        if content is None:
+            errors.append(f"{saved.slug}: archived content is missing")
+            continue
+        pending.append(
+            (saved, f"--- Source: {saved.source_url} ---\nTitle: {saved.title}\n\n{content}\n")
+        )
+
+    extractions = _extract_all([(f"recipe:{saved.id}", context) for saved, context in pending])
+    for (saved, _), extraction in zip(pending, extractions):
+        try:
+            if isinstance(extraction.outcome, Exception):
+                raise extraction.outcome
+            recipe = update_recipe(saved.id, extraction.tagged())
+            if recipe is not None:
+                updated.append(recipe)
+        except Exception as e:
+            errors.append(f"{saved.slug}: {e}")
+
+    return updated, errors
+
+
+@dataclass
+class RefreshResult:
+    """What one refresh_recipes run did."""
+
+    # Source pages fetched and compared with the stored content hash
+    fetched: int = 0
+    # Pages whose text had not changed, so no extraction call was made
+    unchanged: int = 0
+    # Pages that could not be fetched or were empty
+    unavailable: int = 0
+    updated: list[Recipe] = field(default_factory=list)
+    errors: list[str] = field(default_factory=list)
+
+
+def refresh_recipes(
+    stale: list[tuple[Recipe, str | None]], concurrency: int | None = None
+) -> RefreshResult:
+    """
+    Re-fetch the source pages of saved recipes and re-extract only the ones that changed.
+
+    Pages are fetched REFRESH_BATCH_SIZE at a time with the search provider,
+    cleaned like search results, and fingerprinted. A page whose content hash
+    matches the stored one is only marked as fetched. A changed page (or one
+    with no stored hash) is archived and extracted again; the recipe keeps its
+    slug, source URL and search terms. Recipes whose page cannot be fetched
+    or extracted are left as they are, so a later refresh tries them again.
+
+    Args:
+        stale: Saved recipes paired with their stored content hash
+        concurrency: Extractions run at once (default EXTRACTION_CONCURRENCY)
+
+    Returns:
+        Counts of fetched, unchanged and unavailable pages, the updated
+        recipes and a list of per-recipe error messages
+    """
+    provider = get_search_provider()
+    if not isinstance(provider, FetchingSearchProvider):
+        raise ValueError(f"The {provider.name} search provider cannot fetch pages")
+
+    result = RefreshResult()
+    for start in range(0, len(stale), REFRESH_BATCH_SIZE):
+        batch = stale[start : start + REFRESH_BATCH_SIZE]
+        try:
+            fetched = provider.fetch([saved.source_url for saved, _ in batch])
+        except Exception as e:
+            result.unavailable += len(batch)
+            result.errors.append(f"Could not fetch {len(batch)} source page(s): {e}")
+            continue
+
+        available = [
+            (saved, stored_hash, fetched[saved.source_url])
+            for saved, stored_hash in batch
+            if saved.source_url in fetched
+        ]
+        pages = preprocess_pages([raw for _, _, raw in available])
+
+        fetched_ids: list[int] = []
+        changed: list[tuple[Recipe, str, str]] = []
+        for (saved, stored_hash, _), (text, digest) in zip(available, pages):
+            if not text:
+                continue
+            result.fetched += 1
+            if digest == stored_hash:
+                result.unchanged += 1
+                fetched_ids.append(saved.id)
+            else:
+                changed.append((saved, text, digest))
+        result.unavailable += len(batch) - len(fetched_ids) - len(changed)
+
+        extractions = _extract_all(
+            [
+                (
+                    f"recipe:{saved.id}",
+                    f"--- Source: {saved.source_url} ---\nTitle: {saved.title}\n\n{text}\n",
+                )
+                for saved, text, _ in changed
+            ],
+            concurrency=concurrency,
+        )
+        for (saved, text, digest), extraction in zip(changed, extractions):
+            try:
+                if isinstance(extraction.outcome, Exception):
+                    raise extraction.outcome
+                recipe = update_recipe(
+                    saved.id, extraction.tagged(), content_hash=store_content(text, digest)
+                )
+                if recipe is not None:
+                    result.updated.append(recipe)
+                    fetched_ids.append(saved.id)
+            except Exception as e:
+                result.errors.append(f"{saved.slug}: {e}")
+
+        mark_recipes_fetched(fetched_ids)
+
+    return result
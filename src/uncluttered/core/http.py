@@ -0,0 +1,67 @@
+"""Shared, tuned HTTP connection pools for the search and LLM clients.
+
+Every LLM SDK client is built on one httpx.Client, so a connection opened
+by a warm-up request is reused by the first extraction. Tavily's client
+uses requests, so it gets its own pooled requests.Session. Both keep idle
+connections alive between calls.
+"""
+
+import logging
+import threading
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Enough connections for concurrent extractions plus packed and repair calls
+MAX_CONNECTIONS = 20
+MAX_KEEPALIVE_CONNECTIONS = 10
+KEEPALIVE_EXPIRY = 90.0
+
+# SDKs pass their own per-request timeouts; this only applies to direct calls
+DEFAULT_TIMEOUT = httpx.Timeout(600.0, connect=10.0)
+
+_lock = threading.Lock()
+_http_client: httpx.Client | None = None
+_http_session: requests.Session | None = None
+
+
+def get_http_client() -> httpx.Client:
+    """Get the shared httpx client used by all LLM providers (cached singleton)."""
+    global _http_client
+    with _lock:
+        if _http_client is None:
+            _http_client = httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=MAX_CONNECTIONS,
+                    max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=KEEPALIVE_EXPIRY,
+                ),
+                timeout=DEFAULT_TIMEOUT,
+            )
+        return _http_client
+
+
+def get_http_session() -> requests.Session:
+    """Get the shared requests session used for search (cached singleton)."""
+    global _http_session
+    with _lock:
+        if _http_session is None:
+            _http_session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=MAX_KEEPALIVE_CONNECTIONS)
+            _http_session.mount("https://", adapter)
+            _http_session.mount("http://", adapter)
+        return _http_session
+
+
+def preconnect(url: str, timeout: float = 5.0) -> None:
+    """Open a pooled connection to url's host (DNS, TCP and TLS) ahead of real requests.
+
+    The response itself is ignored; connection errors are logged, not raised.
+    """
+    try:
+        get_http_client().head(url, timeout=timeout)
+    except httpx.HTTPError as e:
+        logger.info("Preconnect to %s failed: %s", url, e)
@@ -1,6 +1,9 @@
 """Pydantic models for recipe data."""
 
+from datetime import datetime
+
 from pydantic import BaseModel, Field
+from pydantic.json_schema import SkipJsonSchema
 
 
 class Ingredient(BaseModel):
@@ -33,7 +36,64 @@ class Recipe(BaseModel):
     trust_score: TrustScore | None = None
     slug: str | None = None
     search_term: str | None = None
+    # The extraction log row the recipe came from; hidden from the schema sent to the LLM
+    extraction_id: SkipJsonSchema[int | None] = None
 
     model_config = {
         "populate_by_name": True,
     }
+
+
+class PackedRecipe(BaseModel):
+    """A recipe extracted from one source of a multi-source request."""
+
+    source_index: int = Field(..., description="The number N of the '=== Source N ===' block")
+    recipe: Recipe
+
+
+class PackedRecipes(BaseModel):
+    """Recipes extracted from several sources in a single request."""
+
+    recipes: list[PackedRecipe]
+
+
+class Usage(BaseModel):
+    """Token usage of one or more LLM requests."""
+
+    input_tokens: int = 0
+    output_tokens: int = 0
+    # Input tokens served from the provider's prompt cache (included in input_tokens)
+    cached_tokens: int = 0
+    requests: int = 0
+
+    def add(self, other: "Usage") -> None:
+        """Accumulate another request's usage into this one."""
+        self.input_tokens += other.input_tokens
+        self.output_tokens += other.output_tokens
+        self.cached_tokens += other.cached_tokens
+        self.requests += other.requests
+
+
+class ExtractionCall(BaseModel):
+    """One extraction call to an LLM backend, reported by the provider for the caller to record."""
+
+    provider: str
+    model: str
+    usage: Usage
+    latency_ms: int
+    # ok, invalid (output could not be validated), timeout or error
+    outcome: str
+    # provider_stats counters to increment for this provider and model (e.g. parse_ok, routed)
+    metrics: list[str] = []
+
+
+class ExtractionRecord(BaseModel):
+    """One logged extraction call with its usage, latency and outcome."""
+
+    id: int
+    created_at: datetime
+    provider: str
+    model: str
+    usage: Usage
+    latency_ms: int
+    outcome: str
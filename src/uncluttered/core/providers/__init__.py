@@ -1,29 +1,65 @@
 """Pluggable LLM provider factory for recipe extraction."""
 
 import os
+import threading
 
-from .base import RecipeProvider
+from .base import LLMProvider, RecipeProvider
+
+PROVIDER_NAMES = ("gemini", "openai", "anthropic", "ollama")
 
 _provider: RecipeProvider | None = None
+_provider_lock = threading.Lock()
 
 
 def get_provider() -> RecipeProvider:
     """Get the configured LLM provider (cached singleton).
 
     Reads LLM_PROVIDER and LLM_MODEL from environment variables.
-    Defaults to Gemini if LLM_PROVIDER is not set.
+    Defaults to Gemini if LLM_PROVIDER is not set. LLM_PROVIDER=router
+    builds a RouterProvider over the backends listed in LLM_ROUTES.
+
+    Thread-safe: the provider may be built by a background warm-up while
+    another thread asks for it.
     """
-    global _provider
     if _provider is not None:
         return _provider
+    with _provider_lock:
+        if _provider is None:
+            _build_provider()
+    return _provider
 
+
+def _build_provider() -> None:
+    """Build the configured provider into the module singleton."""
+    global _provider
     provider_name = os.getenv("LLM_PROVIDER", "gemini").lower()
     model = os.getenv("LLM_MODEL") or None
 
+    if provider_name == "router":
+        from .router import RouterProvider, parse_routes
+
+        routes = parse_routes(os.getenv("LLM_ROUTES", ""))
+        _provider = RouterProvider(
+            [(create_provider(name, route_model), weight) for name, route_model, weight in routes]
+        )
+    else:
+        _provider = create_provider(provider_name, model)
+
+
+def create_provider(provider_name: str, model: str | None = None) -> LLMProvider:
+    """Create a new provider instance by name.
+
+    Args:
+        provider_name: One of gemini, openai, anthropic, ollama
+        model: Model override, or None for the provider's default
+
+    Returns:
+        An uncached LLMProvider
+    """
     if provider_name == "gemini":
         from .gemini import GeminiProvider
 
-        _provider = GeminiProvider(model=model)
+        return GeminiProvider(model=model)
     elif provider_name == "openai":
         try:
             from .openai import OpenAIProvider
@@ -32,7 +68,7 @@ def get_provider() -> RecipeProvider:
                 "The 'openai' package is required for the OpenAI provider. "
                 'Install with: pip install "uncluttered[openai]"'
             ) from None
-        _provider = OpenAIProvider(model=model)
+        return OpenAIProvider(model=model)
     elif provider_name == "anthropic":
         try:
             from .anthropic import AnthropicProvider
@@ -41,20 +77,18 @@ def get_provider() -> RecipeProvider:
                 "The 'anthropic' package is required for the Anthropic provider. "
                 'Install with: pip install "uncluttered[anthropic]"'
             ) from None
-        _provider = AnthropicProvider(model=model)
+        return AnthropicProvider(model=model)
     elif provider_name == "ollama":
         try:
             from .ollama import OllamaProvider
         except ImportError:
             raise ImportError(
-                "The 'openai' package is required for the Ollama provider. "
+                "The 'httpx' package is required for the Ollama provider. "
                 'Install with: pip install "uncluttered[ollama]"'
             ) from None
-        _provider = OllamaProvider(model=model)
+        return OllamaProvider(model=model)
     else:
         raise ValueError(
             f"Unknown LLM_PROVIDER: '{provider_name}'. "
-            f"Must be one of: gemini, openai, anthropic, ollama"
+            f"Must be one of: {', '.join(PROVIDER_NAMES)}, router"
         )
-
-    return _provider
@@ -6,15 +6,18 @@ import os
 import anthropic
 from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential_jitter
 
-from ..models import Recipe
-from .base import RecipeProvider
+from ..http import get_http_client
+from ..models import Recipe, Usage
+from ..resilience import Deadline, stop_before_deadline, timeout_kwargs
+from .base import LLMProvider, ModelT, schema_name
 
 logger = logging.getLogger(__name__)
 
 
 def _log_retry(retry_state):
-    """Log retry attempts."""
+    """Log retry attempts and record the rate limit on the provider."""
     sleep_time = retry_state.next_action.sleep
+    retry_state.args[0].note_rate_limit(sleep_time)
     logger.info(
         "Anthropic rate limited. Retrying in %.1fs (attempt %d/10)",
         sleep_time,
@@ -22,9 +25,27 @@ def _log_retry(retry_state):
     )
 
 
-class AnthropicProvider(RecipeProvider):
+def _usage(response) -> Usage:
+    """Read token usage from an Anthropic response.
+
+    Anthropic reports cache reads and writes separately from input_tokens;
+    they are folded into input_tokens here so all providers count alike.
+    """
+    usage = response.usage
+    cache_read = usage.cache_read_input_tokens or 0
+    cache_write = usage.cache_creation_input_tokens or 0
+    return Usage(
+        input_tokens=usage.input_tokens + cache_read + cache_write,
+        output_tokens=usage.output_tokens,
+        cached_tokens=cache_read,
+        requests=1,
+    )
+
+
+class AnthropicProvider(LLMProvider):
     """Recipe extraction using Anthropic Claude."""
 
+    name = "anthropic"
     DEFAULT_MODEL = "claude-sonnet-4-5-20250929"
 
     def __init__(self, model: str | None = None):
@@ -34,32 +55,42 @@ class AnthropicProvider(RecipeProvider):
                 "ANTHROPIC_API_KEY environment variable is required. "
                 "Get your key at: https://console.anthropic.com/settings/keys"
             )
-        self._client = anthropic.Anthropic(api_key=api_key)
+        self._client = anthropic.Anthropic(api_key=api_key, http_client=get_http_client())
         self._model = model or self.DEFAULT_MODEL
+        self.warm_up_url = str(self._client.base_url)
 
     @retry(
         retry=retry_if_exception_type(anthropic.RateLimitError),
         wait=wait_exponential_jitter(initial=2, max=60, jitter=5),
-        stop=stop_after_attempt(10),
+        stop=stop_after_attempt(10) | stop_before_deadline,
         before_sleep=_log_retry,
     )
-    def extract_recipe(self, system_prompt: str, context: str) -> Recipe:
-        schema = Recipe.model_json_schema()
+    def _complete(
+        self,
+        system_prompt: str,
+        context: str,
+        response_model: type[ModelT],
+        deadline: Deadline | None = None,
+    ) -> tuple[dict, Usage]:
+        schema = response_model.model_json_schema()
+        tool_name = f"save_{schema_name(response_model)}"
         response = self._client.messages.create(
             model=self._model,
-            max_tokens=4096,
+            **timeout_kwargs(deadline),
+            # Packed responses hold several recipes, so allow a longer output
+            max_tokens=4096 if response_model is Recipe else 16384,
             system=system_prompt,
             messages=[{"role": "user", "content": context}],
             tools=[
                 {
-                    "name": "save_recipe",
+                    "name": tool_name,
                     "description": "Save the extracted recipe data.",
                     "input_schema": schema,
                 }
             ],
-            tool_choice={"type": "tool", "name": "save_recipe"},
+            tool_choice={"type": "tool", "name": tool_name},
         )
         for block in response.content:
             if block.type == "tool_use":
-                return Recipe.model_validate(block.input)
+                return block.input, _usage(response)
         raise ValueError("No tool_use block found in Anthropic response")
@@ -1,22 +1,307 @@
-"""Abstract base class for LLM recipe providers."""
+"""Base classes for recipe providers."""
 
+import json
+import logging
+import re
+import time
 from abc import ABC, abstractmethod
+from collections.abc import Callable
+from functools import cached_property
+from typing import TypeVar
 
-from ..models import Recipe
+from pydantic import BaseModel
+
+from ..http import preconnect
+from ..models import ExtractionCall, Recipe, Usage
+from ..repair import repair, validation_summary
+from ..resilience import CircuitBreaker, Deadline, DeadlineExceeded
+
+logger = logging.getLogger(__name__)
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+# Callback receiving each call a provider makes to an LLM backend
+CallRecorder = Callable[[ExtractionCall], None]
+
+REPAIR_PROMPT = (
+    "You fix JSON documents that failed schema validation. Correct only the listed "
+    "problems and return the complete corrected document. Keep all existing content "
+    "and do not invent values that are not in the document."
+)
+
+
+def schema_name(response_model: type[BaseModel]) -> str:
+    """Return a snake_case name for a response model (e.g. PackedRecipes -> packed_recipes)."""
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", response_model.__name__).lower()
 
 
 class RecipeProvider(ABC):
-    """Base class for LLM providers that extract recipes."""
+    """Base class for providers that extract recipes."""
 
-    @abstractmethod
-    def extract_recipe(self, system_prompt: str, context: str) -> Recipe:
+    # Short provider name used in configuration and statistics (e.g. "gemini")
+    name: str = ""
+
+    _model: str
+
+    @property
+    def model(self) -> str:
+        """The model name used for extraction."""
+        return self._model
+
+    def warm_up(self) -> None:
+        """Prepare for the first request; safe to call repeatedly. Does nothing by default."""
+
+    def extract_recipe(
+        self,
+        system_prompt: str,
+        context: str,
+        deadline: Deadline | None = None,
+        record: CallRecorder | None = None,
+    ) -> Recipe:
         """Extract a structured Recipe from context using an LLM.
 
         Args:
             system_prompt: The system instructions for the LLM.
             context: The user message with recipe content to extract.
+            deadline: Optional time limit for the call, including retries.
+            record: Optional callback receiving each LLM call made.
 
         Returns:
             A validated Recipe object.
         """
+        return self.extract_structured(
+            system_prompt, context, Recipe, deadline=deadline, record=record
+        )
+
+    @abstractmethod
+    def extract_structured(
+        self,
+        system_prompt: str,
+        context: str,
+        response_model: type[ModelT],
+        deadline: Deadline | None = None,
+        record: CallRecorder | None = None,
+    ) -> ModelT:
+        """Extract structured output matching response_model from context using an LLM.
+
+        Providers do not store anything themselves: every call that reaches an
+        LLM is passed to record as an ExtractionCall, and the caller decides
+        how to log it.
+
+        Args:
+            system_prompt: The system instructions for the LLM.
+            context: The user message with recipe content to extract.
+            response_model: The Pydantic model the response must validate against.
+            deadline: Optional time limit for the call, including retries.
+            record: Optional callback receiving each LLM call made.
+
+        Returns:
+            A validated instance of response_model.
+        """
+        ...
+
+
+class LLMProvider(RecipeProvider):
+    """A provider that calls one LLM backend directly.
+
+    Subclasses implement _complete. This class validates and repairs the
+    output, guards calls with a circuit breaker, tracks rate limiting and
+    reports every call to the caller's recorder.
+    """
+
+    # Monotonic time until which the provider is known to be rate limited
+    _rate_limited_until: float = 0.0
+
+    # API URL to preconnect to before the first request, if any
+    warm_up_url: str | None = None
+
+    def warm_up(self) -> None:
+        """Prepare for the first request, e.g. by opening a pooled connection to the API.
+
+        Called in the background while search runs; safe to call repeatedly.
+        """
+        if self.warm_up_url is not None:
+            preconnect(self.warm_up_url)
+
+    @property
+    def rate_limit_wait(self) -> float:
+        """Seconds until the provider is expected to accept requests again (0 if now)."""
+        return max(0.0, self._rate_limited_until - time.monotonic())
+
+    def note_rate_limit(self, retry_in: float) -> None:
+        """Record that the provider rate limited a request and is retried in `retry_in` seconds."""
+        self._rate_limited_until = max(self._rate_limited_until, time.monotonic() + retry_in)
+
+    @cached_property
+    def breaker(self) -> CircuitBreaker:
+        """The circuit breaker guarding calls to this provider."""
+        return CircuitBreaker()
+
+    def extract_structured(
+        self,
+        system_prompt: str,
+        context: str,
+        response_model: type[ModelT],
+        deadline: Deadline | None = None,
+        record: CallRecorder | None = None,
+    ) -> ModelT:
+        """Extract structured output matching response_model from context using an LLM.
+
+        Raises DeadlineExceeded if the deadline has already passed, and
+        CircuitOpenError without calling the LLM while the provider is failing.
+        Every call that reaches the LLM is passed to record with its token
+        usage, latency, outcome and statistics counters.
+
+        Args:
+            system_prompt: The system instructions for the LLM.
+            context: The user message with recipe content to extract.
+            response_model: The Pydantic model the response must validate against.
+            deadline: Optional time limit for the call, including retries.
+            record: Optional callback receiving the call's ExtractionCall.
+
+        Returns:
+            A validated instance of response_model.
+        """
+        if deadline is not None:
+            deadline.check()
+        self.breaker.before_call()
+        usage = Usage()
+        metrics: list[str] = []
+        started = time.monotonic()
+        try:
+            result = self._extract_structured(
+                system_prompt, context, response_model, deadline, usage, metrics
+            )
+        except ValueError:
+            # Invalid output is a problem with the page, not with the provider
+            self.breaker.record_success()
+            self._report(record, usage, started, "invalid", metrics)
+            raise
+        except DeadlineExceeded:
+            # Running out of the caller's time budget says nothing about the provider
+            self.breaker.record_abandoned()
+            self._report(record, usage, started, "timeout", metrics)
+            raise
+        except Exception:
+            self.breaker.record_failure()
+            self._report(record, usage, started, "error", metrics)
+            raise
+        self.breaker.record_success()
+        self._report(record, usage, started, "ok", metrics)
+        return result
+
+    def _report(
+        self,
+        record: CallRecorder | None,
+        usage: Usage,
+        started: float,
+        outcome: str,
+        metrics: list[str],
+    ) -> None:
+        """Pass one finished call to record, if the caller asked for it."""
+        if record is None:
+            return
+        latency_ms = round((time.monotonic() - started) * 1000)
+        record(
+            ExtractionCall(
+                provider=self.name,
+                model=self.model,
+                usage=usage,
+                latency_ms=latency_ms,
+                outcome=outcome,
+                metrics=metrics,
+            )
+        )
+
+    def _extract_structured(
+        self,
+        system_prompt: str,
+        context: str,
+        response_model: type[ModelT],
+        deadline: Deadline | None,
+        usage: Usage,
+        metrics: list[str],
+    ) -> ModelT:
+        """Call the LLM and validate its output, repairing it if needed.
+
+        Output that fails validation is first repaired locally. Only if that
+        fails is a short follow-up request sent with the validation errors
+        and the broken output (not the source page). The outcome is added to
+        metrics as parse_ok, repair_local, repair_followup or repair_failed.
+        Token usage of every request is added to usage.
+        """
+        raw = self._request(system_prompt, context, response_model, deadline, usage)
+        try:
+            result = _validate(raw, response_model)
+            metrics.append("parse_ok")
+            return result
+        except ValueError as e:
+            error = e
+
+        try:
+            result = repair(raw, response_model)
+            metrics.append("repair_local")
+            logger.info("Repaired %s output locally: %s", self.name, error)
+            return result
+        except ValueError as e:
+            error = e
+
+        if deadline is not None and deadline.expired:
+            metrics.append("repair_failed")
+            raise error
+        broken = raw if isinstance(raw, str) else json.dumps(raw)
+        followup = self._request(
+            REPAIR_PROMPT,
+            f"Validation errors:\n{validation_summary(error)}\n\nJSON to fix:\n{broken}",
+            response_model,
+            deadline,
+            usage,
+        )
+        try:
+            result = repair(followup, response_model)
+        except ValueError:
+            metrics.append("repair_failed")
+            raise
+        metrics.append("repair_followup")
+        return result
+
+    def _request(
+        self,
+        system_prompt: str,
+        context: str,
+        response_model: type[ModelT],
+        deadline: Deadline | None,
+        usage: Usage,
+    ) -> str | dict:
+        """Make one LLM request and add its token usage to usage."""
+        raw, request_usage = self._complete(
+            system_prompt, context, response_model, deadline=deadline
+        )
+        usage.add(request_usage)
+        return raw
+
+    @abstractmethod
+    def _complete(
+        self,
+        system_prompt: str,
+        context: str,
+        response_model: type[ModelT],
+        deadline: Deadline | None = None,
+    ) -> tuple[str | dict, Usage]:
+        """Request output for response_model from the LLM, with provider-specific retries.
+
+        Implementations must stop retrying before the deadline and limit each
+        request to its remaining time.
+
+        Returns:
+            The unvalidated output, as JSON text or a parsed object, and the
+            request's token usage (with requests=1).
+        """
         ...
+
+
+def _validate(raw: str | dict, response_model: type[ModelT]) -> ModelT:
+    """Validate raw output strictly, without any repair."""
+    if isinstance(raw, str):
+        return response_model.model_validate_json(raw)
+    return response_model.model_validate(raw)
@@ -8,8 +8,10 @@ from google.genai import types
 from google.genai.errors import ClientError
 from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential_jitter
 
-from ..models import Recipe
-from .base import RecipeProvider
+from ..http import get_http_client
+from ..models import Usage
+from ..resilience import Deadline, stop_before_deadline
+from .base import LLMProvider, ModelT
 
 logger = logging.getLogger(__name__)
 
@@ -25,8 +27,9 @@ def _is_resource_exhausted(exception: BaseException) -> bool:
 
 
 def _log_retry(retry_state):
-    """Log retry attempts."""
+    """Log retry attempts and record the rate limit on the provider."""
     sleep_time = retry_state.next_action.sleep
+    retry_state.args[0].note_rate_limit(sleep_time)
     logger.info(
         "Gemini rate limited. Retrying in %.1fs (attempt %d/10)",
         sleep_time,
@@ -34,10 +37,25 @@ def _log_retry(retry_state):
     )
 
 
-class GeminiProvider(RecipeProvider):
+def _usage(response) -> Usage:
+    """Read token usage from a Gemini response."""
+    meta = response.usage_metadata
+    if meta is None:
+        return Usage(requests=1)
+    return Usage(
+        input_tokens=meta.prompt_token_count or 0,
+        output_tokens=meta.candidates_token_count or 0,
+        cached_tokens=meta.cached_content_token_count or 0,
+        requests=1,
+    )
+
+
+class GeminiProvider(LLMProvider):
     """Recipe extraction using Google Gemini."""
 
+    name = "gemini"
     DEFAULT_MODEL = "gemini-2.0-flash"
+    warm_up_url = "https://generativelanguage.googleapis.com/"
 
     def __init__(self, model: str | None = None):
         api_key = os.getenv("GEMINI_API_KEY")
@@ -46,23 +64,37 @@ class GeminiProvider(RecipeProvider):
                 "GEMINI_API_KEY environment variable is required. "
                 "Get your key at: https://aistudio.google.com/apikey"
             )
-        self._client = genai.Client(api_key=api_key)
+        self._client = genai.Client(
+            api_key=api_key, http_options=types.HttpOptions(httpx_client=get_http_client())
+        )
         self._model = model or self.DEFAULT_MODEL
 
     @retry(
         retry=retry_if_exception(_is_resource_exhausted),
         wait=wait_exponential_jitter(initial=2, max=60, jitter=5),
-        stop=stop_after_attempt(10),
+        stop=stop_after_attempt(10) | stop_before_deadline,
         before_sleep=_log_retry,
     )
-    def extract_recipe(self, system_prompt: str, context: str) -> Recipe:
+    def _complete(
+        self,
+        system_prompt: str,
+        context: str,
+        response_model: type[ModelT],
+        deadline: Deadline | None = None,
+    ) -> tuple[str, Usage]:
+        remaining = deadline.remaining() if deadline is not None else None
         response = self._client.models.generate_content(
             model=self._model,
             contents=context,
             config=types.GenerateContentConfig(
                 system_instruction=system_prompt,
                 response_mime_type="application/json",
-                response_schema=Recipe,
+                response_schema=response_model,
+                http_options=(
+                    types.HttpOptions(timeout=max(int(remaining * 1000), 1000))
+                    if remaining is not None
+                    else None
+                ),
             ),
         )
-        return Recipe.model_validate_json(response.text)
+        return response.text, _usage(response)
@@ -1,18 +1,23 @@
-"""Ollama recipe provider (local LLM via OpenAI-compatible API)."""
+"""Ollama recipe provider (local LLM via Ollama's native chat API)."""
 
-import json
 import logging
 import os
+import threading
 
-from openai import APIConnectionError, OpenAI
+import httpx
 from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential_jitter
 
-from ..models import Recipe
-from .base import RecipeProvider
+from ..http import get_http_client
+from ..models import Usage
+from ..resilience import Deadline, DeadlineExceeded, stop_before_deadline, timeout_kwargs
+from .base import LLMProvider, ModelT
 
 logger = logging.getLogger(__name__)
 
-DEFAULT_BASE_URL = "http://localhost:11434/v1"
+DEFAULT_BASE_URL = "http://localhost:11434"
+
+# How long the server keeps the model loaded after a request
+DEFAULT_KEEP_ALIVE = "30m"
 
 
 def _log_retry(retry_state):
@@ -25,41 +30,116 @@ def _log_retry(retry_state):
     )
 
 
-class OllamaProvider(RecipeProvider):
+def _int_env(name: str) -> int | None:
+    """Read an optional integer environment variable."""
+    value = os.getenv(name)
+    return int(value) if value else None
+
+
+class OllamaProvider(LLMProvider):
     """Recipe extraction using a local Ollama model.
 
-    Uses Ollama's OpenAI-compatible API with JSON object mode.
-    The recipe JSON schema is included in the system prompt for guidance.
+    Uses the native /api/chat endpoint with the response model's JSON schema
+    as `format`, so the server constrains decoding to valid output and the
+    schema does not need to be repeated in the prompt. `keep_alive` keeps
+    the model loaded between calls, and warm_up() loads it ahead of the
+    first extraction. Requests go through the shared HTTP client.
+
+    Configured with OLLAMA_BASE_URL, OLLAMA_KEEP_ALIVE, OLLAMA_NUM_CTX,
+    OLLAMA_NUM_PREDICT and OLLAMA_NUM_PARALLEL. Concurrent calls from this
+    process are limited to OLLAMA_NUM_PARALLEL (default 1), which should
+    match the server's parallel request slots so extra requests wait here
+    instead of queueing on the server past their deadline.
     """
 
-    def __init__(self, model: str | None = None):
+    name = "ollama"
+
+    def __init__(
+        self,
+        model: str | None = None,
+        base_url: str | None = None,
+        num_parallel: int | None = None,
+    ):
         if not model:
             raise ValueError(
                 "LLM_MODEL environment variable is required for Ollama. "
                 "Set it to a model you have pulled (e.g. llama3.1, mistral)."
             )
-        base_url = os.getenv("OLLAMA_BASE_URL", DEFAULT_BASE_URL)
-        self._client = OpenAI(base_url=base_url, api_key="ollama")
+        base_url = base_url or os.getenv("OLLAMA_BASE_URL", DEFAULT_BASE_URL)
+        # Older configurations point at the OpenAI-compatible /v1 endpoint
+        base_url = base_url.rstrip("/").removesuffix("/v1")
+        self._base_url = base_url
         self._model = model
+        self._keep_alive = os.getenv("OLLAMA_KEEP_ALIVE", DEFAULT_KEEP_ALIVE)
+        self._options = {
+            key: value
+            for key, value in (
+                ("num_ctx", _int_env("OLLAMA_NUM_CTX")),
+                ("num_predict", _int_env("OLLAMA_NUM_PREDICT")),
+            )
+            if value is not None
+        }
+        if num_parallel is None:
+            num_parallel = _int_env("OLLAMA_NUM_PARALLEL") or 1
+        self._slots = threading.BoundedSemaphore(max(num_parallel, 1))
+
+    def warm_up(self) -> None:
+        """Load the model into memory so the first extraction skips the load time.
+
+        A generate request without a prompt only loads the model and applies
+        keep_alive.
+        """
+        try:
+            get_http_client().post(
+                f"{self._base_url}/api/generate",
+                json={"model": self._model, "keep_alive": self._keep_alive},
+            )
+        except httpx.HTTPError as e:
+            logger.info("Ollama warm-up failed: %s", e)
 
     @retry(
-        retry=retry_if_exception_type(APIConnectionError),
+        retry=retry_if_exception_type(httpx.ConnectError),
         wait=wait_exponential_jitter(initial=2, max=60, jitter=5),
-        stop=stop_after_attempt(10),
+        stop=stop_after_attempt(10) | stop_before_deadline,
         before_sleep=_log_retry,
     )
-    def extract_recipe(self, system_prompt: str, context: str) -> Recipe:
-        schema = Recipe.model_json_schema()
-        schema_instruction = (
-            "You MUST respond with valid JSON matching this schema:\n"
-            f"```json\n{json.dumps(schema, indent=2)}\n```"
-        )
-        response = self._client.chat.completions.create(
-            model=self._model,
-            messages=[
-                {"role": "system", "content": f"{system_prompt}\n\n{schema_instruction}"},
+    def _complete(
+        self,
+        system_prompt: str,
+        context: str,
+        response_model: type[ModelT],
+        deadline: Deadline | None = None,
+    ) -> tuple[str, Usage]:
+        payload = {
+            "model": self._model,
+            "messages": [
+                {"role": "system", "content": f"{system_prompt}\n\nRespond only with JSON."},
                 {"role": "user", "content": context},
             ],
-            response_format={"type": "json_object"},
+            "format": response_model.model_json_schema(),
+            "stream": False,
+            "keep_alive": self._keep_alive,
+            "options": {"temperature": 0, **self._options},
+        }
+        remaining = deadline.remaining() if deadline is not None else None
+        if not self._slots.acquire(timeout=remaining):
+            raise DeadlineExceeded("Query deadline exceeded waiting for a free Ollama slot")
+        try:
+            response = get_http_client().post(
+                f"{self._base_url}/api/chat", json=payload, **timeout_kwargs(deadline)
+            )
+        finally:
+            self._slots.release()
+        if response.status_code == 404:
+            raise RuntimeError(
+                f"Ollama model '{self._model}' not found. Pull it with: ollama pull {self._model}"
+            )
+        response.raise_for_status()
+        data = response.json()
+        if data.get("done_reason") == "length":
+            logger.info("Ollama output hit num_predict; it may be truncated")
+        return data["message"]["content"], Usage(
+            input_tokens=data.get("prompt_eval_count", 0),
+            output_tokens=data.get("eval_count", 0),
+            requests=1,
         )
-        return Recipe.model_validate_json(response.choices[0].message.content)
@@ -6,15 +6,18 @@ import os
 from openai import OpenAI, RateLimitError
 from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential_jitter
 
-from ..models import Recipe
-from .base import RecipeProvider
+from ..http import get_http_client
+from ..models import Usage
+from ..resilience import Deadline, stop_before_deadline, timeout_kwargs
+from .base import LLMProvider, ModelT, schema_name
 
 logger = logging.getLogger(__name__)
 
 
 def _log_retry(retry_state):
-    """Log retry attempts."""
+    """Log retry attempts and record the rate limit on the provider."""
     sleep_time = retry_state.next_action.sleep
+    retry_state.args[0].note_rate_limit(sleep_time)
     logger.info(
         "OpenAI rate limited. Retrying in %.1fs (attempt %d/10)",
         sleep_time,
@@ -22,9 +25,24 @@ def _log_retry(retry_state):
     )
 
 
-class OpenAIProvider(RecipeProvider):
+def _usage(response) -> Usage:
+    """Read token usage, including prompt-cache hits, from an OpenAI response."""
+    usage = response.usage
+    if usage is None:
+        return Usage(requests=1)
+    details = usage.prompt_tokens_details
+    return Usage(
+        input_tokens=usage.prompt_tokens,
+        output_tokens=usage.completion_tokens,
+        cached_tokens=(details.cached_tokens or 0) if details else 0,
+        requests=1,
+    )
+
+
+class OpenAIProvider(LLMProvider):
     """Recipe extraction using OpenAI."""
 
+    name = "openai"
     DEFAULT_MODEL = "gpt-4o-mini"
 
     def __init__(self, model: str | None = None):
@@ -34,19 +52,27 @@ class OpenAIProvider(RecipeProvider):
                 "OPENAI_API_KEY environment variable is required. "
                 "Get your key at: https://platform.openai.com/api-keys"
             )
-        self._client = OpenAI(api_key=api_key)
+        self._client = OpenAI(api_key=api_key, http_client=get_http_client())
         self._model = model or self.DEFAULT_MODEL
+        self.warm_up_url = str(self._client.base_url)
 
     @retry(
         retry=retry_if_exception_type(RateLimitError),
         wait=wait_exponential_jitter(initial=2, max=60, jitter=5),
-        stop=stop_after_attempt(10),
+        stop=stop_after_attempt(10) | stop_before_deadline,
         before_sleep=_log_retry,
     )
-    def extract_recipe(self, system_prompt: str, context: str) -> Recipe:
-        schema = Recipe.model_json_schema()
+    def _complete(
+        self,
+        system_prompt: str,
+        context: str,
+        response_model: type[ModelT],
+        deadline: Deadline | None = None,
+    ) -> tuple[str, Usage]:
+        schema = response_model.model_json_schema()
         response = self._client.chat.completions.create(
             model=self._model,
+            **timeout_kwargs(deadline),
             messages=[
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": context},
@@ -54,10 +80,10 @@ class OpenAIProvider(RecipeProvider):
             response_format={
                 "type": "json_schema",
                 "json_schema": {
-                    "name": "recipe",
+                    "name": schema_name(response_model),
                     "strict": True,
                     "schema": schema,
                 },
             },
         )
-        return Recipe.model_validate_json(response.choices[0].message.content)
+        return response.choices[0].message.content, _usage(response)
@@ -0,0 +1,217 @@
+"""Routing provider that sends each extraction to the backend expected to finish soonest.
+
+Configured with LLM_PROVIDER=router and LLM_ROUTES, a comma-separated list of
+`provider[:model][@weight]` entries, e.g.
+
+    LLM_ROUTES=gemini:gemini-2.0-flash,openai:gpt-4o-mini@1.5,ollama:llama3.1@3
+
+For every backend the router keeps an exponentially weighted moving average
+(EWMA) of call latency and error rate, and watches rate-limit retries. A
+call's expected time is
+
+    (rate-limit wait + EWMA latency) / (1 - EWMA error rate) * weight
+
+and backends are tried in order of expected time, falling back to the next
+one when a call fails or returns output that cannot be validated or
+repaired. Weights above 1 make a backend less preferred. Backends with no
+measurements yet are tried first, in listed order, so each gets measured.
+Every routing decision is logged, and each backend call is reported with a
+`routed` / `route_fallback` counter for the caller to add to provider_stats.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+
+from ..models import ExtractionCall
+from ..resilience import CircuitOpenError, Deadline, DeadlineExceeded
+from .base import CallRecorder, LLMProvider, ModelT, RecipeProvider
+
+logger = logging.getLogger(__name__)
+
+# Weight of the newest observation in the moving averages
+EWMA_ALPHA = 0.3
+
+# Error rates are capped so a failing backend stays reachable as a fallback
+_MAX_ERROR_RATE = 0.95
+
+
+def parse_routes(spec: str) -> list[tuple[str, str | None, float]]:
+    """Parse an LLM_ROUTES value into (provider, model, weight) entries.
+
+    Raises:
+        ValueError: If the spec is empty or an entry is malformed
+    """
+    routes = []
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        target, _, weight = entry.partition("@")
+        name, _, model = target.partition(":")
+        try:
+            weight_value = float(weight) if weight else 1.0
+        except ValueError:
+            raise ValueError(f"Invalid weight in LLM_ROUTES entry: '{entry}'") from None
+        if weight_value <= 0:
+            raise ValueError(f"LLM_ROUTES weights must be positive: '{entry}'")
+        routes.append((name.strip().lower(), model.strip() or None, weight_value))
+
+    if not routes:
+        raise ValueError(
+            "LLM_ROUTES environment variable is required for LLM_PROVIDER=router, "
+            "e.g. LLM_ROUTES=gemini,openai:gpt-4o-mini@1.5"
+        )
+    return routes
+
+
+@dataclass
+class Route:
+    """A backend provider with its routing weight and live measurements."""
+
+    provider: LLMProvider
+    weight: float = 1.0
+    latency: float | None = None
+    error_rate: float = 0.0
+
+    @property
+    def label(self) -> str:
+        return f"{self.provider.name}:{self.provider.model}"
+
+    def expected_seconds(self) -> float:
+        """Expected time for a call to succeed on this backend, scaled by its weight."""
+        seconds = self.provider.rate_limit_wait + (self.latency or 0.0)
+        return seconds / (1 - self.error_rate) * self.weight
+
+    def record(self, seconds: float | None, failed: bool) -> None:
+        """Fold one call's outcome into the moving averages."""
+        if seconds is not None:
+            self.latency = (
+                seconds
+                if self.latency is None
+                else EWMA_ALPHA * seconds + (1 - EWMA_ALPHA) * self.latency
+            )
+        self.error_rate = min(
+            _MAX_ERROR_RATE, EWMA_ALPHA * failed + (1 - EWMA_ALPHA) * self.error_rate
+        )
+
+
+class RouterProvider(RecipeProvider):
+    """Recipe extraction routed across several providers by expected latency."""
+
+    name = "router"
+
+    def __init__(self, routes: list[tuple[LLMProvider, float]]):
+        if not routes:
+            raise ValueError("RouterProvider needs at least one backend")
+        self._routes = [Route(provider, weight) for provider, weight in routes]
+        self._model = ",".join(route.label for route in self._routes)
+        self._lock = threading.Lock()
+
+    @property
+    def routes(self) -> list[Route]:
+        """The configured backends, in listed order."""
+        return list(self._routes)
+
+    def warm_up(self) -> None:
+        """Warm up every backend; a failing backend does not stop the others."""
+        for route in self._routes:
+            try:
+                route.provider.warm_up()
+            except Exception as e:
+                logger.info("Warm-up of %s failed: %s", route.label, e)
+
+    def ranked_routes(self) -> list[Route]:
+        """Return backends whose circuit is closed, soonest expected finish first."""
+        with self._lock:
+            available = [route for route in self._routes if not route.provider.breaker.is_open]
+            # sorted() is stable, so ties keep the configured order
+            return sorted(available, key=Route.expected_seconds)
+
+    def extract_structured(
+        self,
+        system_prompt: str,
+        context: str,
+        response_model: type[ModelT],
+        deadline: Deadline | None = None,
+        record: CallRecorder | None = None,
+    ) -> ModelT:
+        """Route the call; each backend applies its own circuit breaker and reports its calls."""
+        if deadline is not None:
+            deadline.check()
+        return self._route(system_prompt, context, response_model, deadline, record)
+
+    def _route(
+        self,
+        system_prompt: str,
+        context: str,
+        response_model: type[ModelT],
+        deadline: Deadline | None,
+        record: CallRecorder | None,
+    ) -> ModelT:
+        ranked = self.ranked_routes()
+        if not ranked:
+            raise CircuitOpenError("All routed providers are unavailable")
+
+        last_error: Exception | None = None
+        for attempt, route in enumerate(ranked):
+            logger.info(
+                "Routing extraction to %s (expected %.1fs, latency %s, error rate %.0f%%)%s",
+                route.label,
+                route.expected_seconds(),
+                f"{route.latency:.1f}s" if route.latency is not None else "unmeasured",
+                route.error_rate * 100,
+                f" after {attempt} failed" if attempt else "",
+            )
+            started = time.monotonic()
+            try:
+                result = route.provider.extract_structured(
+                    system_prompt,
+                    context,
+                    response_model,
+                    deadline=deadline,
+                    record=_count_route(record, "route_fallback" if attempt else "routed"),
+                )
+            except ValueError as e:
+                # Invalid or unrepairable output; another model may read the page
+                # correctly. Like the breaker, this is not counted as a backend error
+                with self._lock:
+                    route.record(time.monotonic() - started, failed=False)
+                logger.info("Routed provider %s returned no valid output: %s", route.label, e)
+                last_error = e
+                if deadline is not None and deadline.expired:
+                    break
+                continue
+            except DeadlineExceeded:
+                raise
+            except CircuitOpenError as e:
+                last_error = e
+                continue
+            except Exception as e:
+                with self._lock:
+                    route.record(None, failed=True)
+                logger.warning("Routed provider %s failed: %s", route.label, e)
+                last_error = e
+                if deadline is not None and deadline.expired:
+                    break
+                continue
+
+            with self._lock:
+                route.record(time.monotonic() - started, failed=False)
+            return result
+
+        assert last_error is not None
+        raise last_error
+
+
+def _count_route(record: CallRecorder | None, metric: str) -> CallRecorder | None:
+    """Wrap record so the backend's call also counts the routing decision."""
+    if record is None:
+        return None
+
+    def counted(call: ExtractionCall) -> None:
+        call.metrics.append(metric)
+        record(call)
+
+    return counted
@@ -0,0 +1,208 @@
+"""Local repair of malformed or near-miss structured LLM output.
+
+Models, especially local ones in JSON mode, often return output that is
+almost right: wrapped in a code fence, with trailing commas, cut off before
+the closing brackets, or with `yield`/`servings` instead of `serving_yield`
+and numbers where strings are expected. Rather than discard the whole LLM
+call, the output is repaired locally and validated again.
+"""
+
+import json
+from typing import Any, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+# Keys models use for a recipe's yield, mapped onto Recipe.serving_yield
+_YIELD_KEYS = ("yield", "yields", "servings", "serves", "serving_size", "portions")
+
+# How many cut points to try when closing truncated output
+_MAX_TRUNCATION_CUTS = 50
+
+
+class UnrepairableOutputError(ValueError):
+    """Raised when LLM output cannot be parsed as JSON, even after repair."""
+
+
+def _from_json_start(text: str) -> str:
+    """Drop code fences and prose before the first JSON object or array."""
+    starts = [i for i in (text.find("{"), text.find("[")) if i != -1]
+    return text[min(starts) :] if starts else text.strip()
+
+
+def _strip_trailing_commas(text: str) -> str:
+    """Remove commas directly before a closing bracket, outside of strings."""
+    out: list[str] = []
+    in_string = escaped = False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "}]":
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+        out.append(char)
+    return "".join(out)
+
+
+def _close_truncated(text: str) -> list[str]:
+    """Return candidate completions of a document that was cut off mid-way.
+
+    The first candidate closes the open string and brackets as they are; the
+    rest drop the trailing partial element back to each earlier comma.
+    """
+    stack: list[str] = []
+    cuts: list[tuple[int, str]] = []
+    in_string = escaped = False
+    for i, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]":
+            if stack:
+                stack.pop()
+        elif char == ",":
+            cuts.append((i, "".join(reversed(stack))))
+
+    if not stack and not in_string:
+        return []
+    candidates = [text + ('"' if in_string else "") + "".join(reversed(stack))]
+    for position, closers in reversed(cuts[-_MAX_TRUNCATION_CUTS:]):
+        candidates.append(text[:position] + closers)
+    return candidates
+
+
+def parse_lenient(raw: str) -> Any:
+    """Parse JSON, tolerating fences, surrounding prose, trailing commas and truncation.
+
+    Raises:
+        UnrepairableOutputError: If no repair yields valid JSON
+    """
+    text = _strip_trailing_commas(_from_json_start(raw))
+    try:
+        # raw_decode ignores anything after the value, such as a closing fence
+        return json.JSONDecoder().raw_decode(text)[0]
+    except json.JSONDecodeError as e:
+        error = e
+    for candidate in _close_truncated(text.rstrip().removesuffix("```").rstrip()):
+        try:
+            return json.loads(_strip_trailing_commas(candidate))
+        except json.JSONDecodeError:
+            continue
+    raise UnrepairableOutputError(f"Output is not repairable JSON: {error}")
+
+
+def _as_text(value: Any) -> Any:
+    """Render numbers as strings; leave everything else alone."""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int | float):
+        return f"{value:g}"
+    return value
+
+
+def _normalize_ingredient(item: Any) -> Any:
+    if isinstance(item, str):
+        return {"name": item, "quantity": ""}
+    if not isinstance(item, dict):
+        return item
+    item = dict(item)
+    if "name" not in item:
+        for key in ("ingredient", "item"):
+            if key in item:
+                item["name"] = item.pop(key)
+                break
+    if "quantity" not in item and "amount" in item:
+        item["quantity"] = item.pop("amount")
+    quantity = item.get("quantity")
+    item["quantity"] = "" if quantity is None else _as_text(quantity)
+    return item
+
+
+def _normalize_instruction(step: Any) -> Any:
+    if isinstance(step, dict):
+        for key in ("text", "step", "instruction", "description"):
+            if isinstance(step.get(key), str):
+                return step[key]
+    return step
+
+
+def _normalize_recipe(data: dict) -> dict:
+    """Map common near-miss keys and value types onto the Recipe schema."""
+    data = dict(data)
+    if "serving_yield" not in data:
+        for key in _YIELD_KEYS:
+            if key in data:
+                data["serving_yield"] = data.pop(key)
+                break
+    for key in ("serving_yield", "prep_time", "cook_time"):
+        if key in data:
+            data[key] = _as_text(data[key])
+
+    ingredients = data.get("ingredients")
+    if isinstance(ingredients, list):
+        data["ingredients"] = [_normalize_ingredient(item) for item in ingredients]
+
+    instructions = data.get("instructions")
+    if isinstance(instructions, str):
+        instructions = [line.strip() for line in instructions.splitlines() if line.strip()]
+    if isinstance(instructions, list):
+        data["instructions"] = [_normalize_instruction(step) for step in instructions]
+
+    if data.get("description") is None:
+        data["description"] = ""
+    return data
+
+
+def normalize_fields(data: Any) -> Any:
+    """Recursively normalize every recipe-shaped object in parsed output."""
+    if isinstance(data, list):
+        return [normalize_fields(item) for item in data]
+    if not isinstance(data, dict):
+        return data
+    data = {key: normalize_fields(value) for key, value in data.items()}
+    if "title" in data and "ingredients" in data:
+        data = _normalize_recipe(data)
+    return data
+
+
+def repair(raw: str | dict, response_model: type[ModelT]) -> ModelT:
+    """Repair raw LLM output locally and validate it against response_model.
+
+    Args:
+        raw: The model's output, as JSON text or an already-parsed object
+        response_model: The Pydantic model the output must validate against
+
+    Raises:
+        ValueError: If the output cannot be repaired (ValidationError included)
+    """
+    data = parse_lenient(raw) if isinstance(raw, str) else raw
+    return response_model.model_validate(normalize_fields(data))
+
+
+def validation_summary(error: ValueError, limit: int = 10) -> str:
+    """Describe a validation error compactly for a follow-up repair request."""
+    if not isinstance(error, ValidationError):
+        return str(error)
+    lines = [
+        f"- {'.'.join(str(part) for part in e['loc']) or '(root)'}: {e['msg']}"
+        for e in error.errors()[:limit]
+    ]
+    return "\n".join(lines)
@@ -0,0 +1,126 @@
+"""Per-query deadlines and a circuit breaker for LLM providers."""
+
+import os
+import threading
+import time
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a query's time budget runs out before work could start."""
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a provider that has been failing repeatedly."""
+
+
+class Deadline:
+    """A point in time by which a query must finish; None means no limit."""
+
+    def __init__(self, seconds: float | None = None):
+        self._expires_at = time.monotonic() + seconds if seconds is not None else None
+
+    def remaining(self) -> float | None:
+        """Seconds left before the deadline (never negative), or None if unbounded."""
+        if self._expires_at is None:
+            return None
+        return max(0.0, self._expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        """True once no time is left."""
+        return self._expires_at is not None and time.monotonic() >= self._expires_at
+
+    def check(self) -> None:
+        """Raise DeadlineExceeded if the deadline has passed."""
+        if self.expired:
+            raise DeadlineExceeded("Query deadline exceeded")
+
+
+def stop_before_deadline(retry_state) -> bool:
+    """Tenacity stop condition: give up if the next sleep would overrun the deadline.
+
+    Reads the `deadline` keyword argument of the retried call; calls without one
+    are not limited.
+    """
+    deadline = retry_state.kwargs.get("deadline")
+    if deadline is None:
+        return False
+    remaining = deadline.remaining()
+    return remaining is not None and remaining <= retry_state.upcoming_sleep
+
+
+def timeout_kwargs(deadline: Deadline | None) -> dict[str, float]:
+    """Return SDK keyword arguments limiting one request to the deadline's remaining time.
+
+    Empty when there is no deadline, so the SDK keeps its own default timeout.
+    """
+    remaining = deadline.remaining() if deadline is not None else None
+    return {"timeout": max(remaining, 1.0)} if remaining is not None else {}
+
+
+class CircuitBreaker:
+    """Fail fast after repeated provider errors, then probe again after a cooldown.
+
+    Closed: calls go through. After `failure_threshold` consecutive failures the
+    circuit opens and calls raise CircuitOpenError for `cooldown` seconds. Then
+    one trial call is let through (half-open): success closes the circuit,
+    failure opens it for another cooldown.
+    """
+
+    def __init__(self, failure_threshold: int | None = None, cooldown: float | None = None):
+        if failure_threshold is None:
+            failure_threshold = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+        if cooldown is None:
+            cooldown = float(os.getenv("CIRCUIT_COOLDOWN", "30"))
+        self._failure_threshold = failure_threshold
+        self._cooldown = cooldown
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial_in_flight = False
+
+    @property
+    def is_open(self) -> bool:
+        """True while calls are being rejected."""
+        with self._lock:
+            return self._opened_at is not None and (
+                self._trial_in_flight or time.monotonic() - self._opened_at < self._cooldown
+            )
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError unless a call may proceed now."""
+        with self._lock:
+            if self._opened_at is None:
+                return
+            waited = time.monotonic() - self._opened_at
+            if waited < self._cooldown or self._trial_in_flight:
+                retry_in = max(0.0, self._cooldown - waited)
+                raise CircuitOpenError(
+                    f"Provider circuit is open after {self._failures} consecutive failures; "
+                    f"retrying in {retry_in:.0f}s"
+                )
+            self._trial_in_flight = True
+
+    def record_success(self) -> None:
+        """Close the circuit after a successful call."""
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_abandoned(self) -> None:
+        """End a call that gave no verdict on the provider, such as one cut off by its deadline.
+
+        The failure count is unchanged; a half-open trial is released so the
+        next call can probe again.
+        """
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        """Count a failed call, opening the circuit at the threshold."""
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._opened_at is not None or self._failures >= self._failure_threshold:
+                self._opened_at = time.monotonic()
@@ -0,0 +1,169 @@
+"""Cheap pre-extraction screening of search results.
+
+Pages without a usable recipe (roundups, forum threads, paywalls) are only
+discovered to be useless after paying for a full LLM extraction. A screener
+looks at a trimmed excerpt of each page and forwards only likely hits to the
+configured RecipeProvider.
+
+Screening is off unless RECIPE_SCREENING is set. A fraction of rejected pages
+(SCREENING_AUDIT_RATE, default 0.1) is extracted anyway so recall can be
+estimated. Outcomes are counted under the backend provider and model that
+extracted the page, so routed setups get per-model figures:
+
+- screen_pass_hit / screen_pass_miss: forwarded pages that did / did not yield a recipe
+- screen_reject_hit / screen_reject_miss: audited rejections that did / did not yield a recipe
+- screen_reject_skipped: rejections that were not extracted
+"""
+
+import logging
+import os
+import random
+import re
+
+from pydantic import ValidationError
+
+from .database import increment_provider_stat
+from .models import ExtractionCall, Recipe
+from .providers import get_provider
+from .providers.router import RouterProvider
+from .repair import UnrepairableOutputError
+
+logger = logging.getLogger(__name__)
+
+# Characters of page text the screener looks at
+EXCERPT_CHARS = 20_000
+
+_QUANTITY_RE = re.compile(
+    r"\b\d+(?:[./]\d+)?\s*(?:cups?|tbsp|tsp|tablespoons?|teaspoons?|g|grams?|kg|ml|l|oz|"
+    r"ounces?|lbs?|pounds?|cloves?|pinch(?:es)?|sticks?|cans?)\b",
+    re.IGNORECASE,
+)
+_INGREDIENTS_RE = re.compile(r"\bingredients\b", re.IGNORECASE)
+_METHOD_RE = re.compile(r"\b(?:instructions|directions|method|preparation)\b", re.IGNORECASE)
+_STEP_RE = re.compile(r"^\s*(?:step\s*)?\d+[.):]\s+\w", re.IGNORECASE | re.MULTILINE)
+_ROUNDUP_RE = re.compile(r"\b\d+\s+(?:\w+\s+){0,3}(?:recipes|ideas|dishes)\b", re.IGNORECASE)
+_PAYWALL_RE = re.compile(
+    r"subscribe to (?:continue|read)|already a subscriber|sign in to (?:continue|read)|"
+    r"create a free account to",
+    re.IGNORECASE,
+)
+_FORUM_RE = re.compile(r"\b(?:reply|replies|posted by|upvotes?|original poster)\b", re.IGNORECASE)
+
+
+class HeuristicScreener:
+    """Local keyword/pattern classifier; costs no tokens."""
+
+    name = "heuristic"
+
+    def __init__(self, threshold: int = 3):
+        self._threshold = threshold
+
+    def score(self, title: str, content: str) -> int:
+        """Return a recipe-likelihood score; higher means more recipe-like."""
+        excerpt = content[:EXCERPT_CHARS]
+        score = min(len(_QUANTITY_RE.findall(excerpt)), 6) // 2
+        if _INGREDIENTS_RE.search(excerpt):
+            score += 2
+        if _METHOD_RE.search(excerpt):
+            score += 1
+        if len(_STEP_RE.findall(excerpt)) >= 2:
+            score += 1
+        if _ROUNDUP_RE.search(title):
+            score -= 3
+        if _PAYWALL_RE.search(excerpt):
+            score -= 2
+        if len(_FORUM_RE.findall(excerpt)) >= 3:
+            score -= 2
+        return score
+
+    def screen(self, title: str, content: str) -> bool:
+        """Return True if the page is worth a full extraction."""
+        return self.score(title, content) >= self._threshold
+
+
+def get_screener() -> HeuristicScreener | None:
+    """Get the screener configured by RECIPE_SCREENING, or None if screening is off."""
+    name = os.getenv("RECIPE_SCREENING", "off").lower()
+    if name in ("", "off", "none"):
+        return None
+    if name == "heuristic":
+        return HeuristicScreener()
+    raise ValueError(f"Unknown RECIPE_SCREENING: '{name}'. Must be one of: off, heuristic")
+
+
+def screen_page(screener: HeuristicScreener, title: str, content: str) -> bool:
+    """Return the screener's verdict on a page, keeping the page if screening fails."""
+    try:
+        return screener.screen(title, content)
+    except Exception as e:
+        logger.warning("Screening failed for %r, keeping the page: %s", title, e)
+        return True
+
+
+def audit_rejection() -> bool:
+    """Return True if a rejected page should be extracted anyway to measure recall."""
+    return random.random() < float(os.getenv("SCREENING_AUDIT_RATE", "0.1"))
+
+
+def is_usable(recipe: Recipe) -> bool:
+    """Return True if an extracted recipe has ingredients and instructions."""
+    return bool(recipe.ingredients) and bool(recipe.instructions)
+
+
+def is_miss(error: Exception) -> bool:
+    """Return True if an extraction error means the page yielded no usable recipe.
+
+    Only output that failed validation counts. Configuration, network and
+    other errors say nothing about the page, so they are not screening outcomes.
+    """
+    return isinstance(error, ValidationError | UnrepairableOutputError)
+
+
+def record_screening(passed: bool, hit: bool | None, call: ExtractionCall | None = None) -> None:
+    """Count a screening outcome for the backend that extracted the page.
+
+    Args:
+        passed: Whether the screener forwarded the page
+        hit: Whether extraction yielded a usable recipe, or None if it was skipped
+        call: The LLM call that produced the outcome. Without one (skipped
+            pages), the outcome goes to the backend that would extract the
+            page now: the configured provider, or the top-ranked route.
+    """
+    if call is not None:
+        provider, model = call.provider, call.model
+    else:
+        provider, model = _expected_backend()
+    if hit is None:
+        metric = "screen_reject_skipped"
+    else:
+        metric = f"screen_{'pass' if passed else 'reject'}_{'hit' if hit else 'miss'}"
+    increment_provider_stat(provider, model, metric)
+
+
+def _expected_backend() -> tuple[str, str]:
+    """Return the (provider, model) the next extraction would most likely go to."""
+    provider = get_provider()
+    if isinstance(provider, RouterProvider):
+        ranked = provider.ranked_routes() or provider.routes
+        provider = ranked[0].provider
+    return provider.name, provider.model
+
+
+def screening_rates(counts: dict[str, int]) -> tuple[float | None, float | None]:
+    """Compute (precision, estimated recall) from a provider's screening counters.
+
+    Recall scales the hits found among audited rejections up to all rejections.
+    Either value is None when there is not yet enough data.
+    """
+    pass_hit = counts.get("screen_pass_hit", 0)
+    pass_miss = counts.get("screen_pass_miss", 0)
+    reject_hit = counts.get("screen_reject_hit", 0)
+    audited = reject_hit + counts.get("screen_reject_miss", 0)
+    rejected = audited + counts.get("screen_reject_skipped", 0)
+
+    precision = pass_hit / (pass_hit + pass_miss) if pass_hit + pass_miss else None
+    recall = None
+    if audited and pass_hit + reject_hit:
+        missed_hits = reject_hit * rejected / audited
+        recall = pass_hit / (pass_hit + missed_hits)
+    return precision, recall
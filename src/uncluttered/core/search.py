@@ -1,11 +1,21 @@
-"""Search service using Tavily API."""
+"""Search service: find recipe pages with the configured search provider, then clean them."""
 
+import atexit
+import logging
+import multiprocessing
 import os
 import re
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from dataclasses import dataclass
 from urllib.parse import urlparse
 
-from tavily import TavilyClient
+from .archive import content_hash
+from .resilience import Deadline
+from .search_providers import get_search_provider
+from .search_providers.base import FetchingSearchProvider, SearchHit, SearchProvider
+from .utils import canonicalize_url
+
+logger = logging.getLogger(__name__)
 
 # Domains that rarely contain extractable recipe text (video/social platforms).
 # URLs matching these are filtered out before LLM extraction to save cost.
@@ -18,91 +28,370 @@ EXCLUDED_DOMAINS = {
     "pinterest.com",
 }
 
-# Cached client (singleton)
-_tavily_client: TavilyClient | None = None
+# How page text is retrieved: with the search results, or afterwards for selected URLs
+SEARCH_MODES = ("single", "two-phase")
 
+# Search calls per query, counting the original and its variants (see query_variants)
+DEFAULT_MAX_SEARCHES = 3
 
-def _get_tavily_client() -> TavilyClient:
-    """Get or create the cached TavilyClient."""
-    global _tavily_client
-    if _tavily_client is None:
-        api_key = os.getenv("TAVILY_API_KEY")
-        if not api_key:
-            raise ValueError(
-                "TAVILY_API_KEY environment variable is required. Get your key at: https://tavily.com"
-            )
-        _tavily_client = TavilyClient(api_key=api_key)
-    return _tavily_client
+# Words dropped from a query to broaden its variants
+_QUERY_MODIFIERS = {
+    "authentic", "best", "classic", "easy", "homemade", "perfect", "quick",
+    "recipe", "recipes", "simple", "traditional", "ultimate",
+}  # fmt: skip
+
+# Worker processes for page preprocessing, reused across queries (see preprocess_pages)
+_preprocess_pool: ProcessPoolExecutor | None = None
 
 
 @dataclass
 class SearchResult:
-    """A single search result from Tavily."""
+    """A cleaned search result, ready for extraction."""
 
     url: str
     title: str
     content: str
     score: float = 0.0
+    content_hash: str | None = None
+
+
+# Maximum characters of cleaned page text passed to the LLM
+MAX_CONTENT_CHARS = 40_000
+
+# Raw page text is cleaned in chunks of roughly this many characters
+_CHUNK_CHARS = 16_384
+
+# Largest slice of a raw page sent to a preprocessing worker
+_MAX_PAYLOAD_CHARS = 10 * MAX_CONTENT_CHARS
+
+_URL_RE = re.compile(r"https?://\S+")
+_NEWLINES_RE = re.compile(r"\n{3,}")
+_SPACES_RE = re.compile(r" {2,}")
+_LAST_WHITESPACE_RE = re.compile(r"\s\S*\Z")
+_WHITESPACE_RE = re.compile(r"\s")
+
+
+def _cut_after_whitespace(text: str, start: int, end: int) -> int:
+    """Return the index just after the last whitespace in text[start:end].
+
+    Only the last 1k characters are scanned first, since pages rarely go that
+    long without whitespace. A token longer than the whole range is kept whole
+    by cutting after the next whitespace instead.
+    """
+    match = _LAST_WHITESPACE_RE.search(text, max(start, end - 1024), end)
+    if match is None:
+        match = _LAST_WHITESPACE_RE.search(text, start, end)
+    if match is None:
+        match = _WHITESPACE_RE.search(text, end)
+        return match.start() + 1 if match is not None else len(text)
+    return match.start() + 1
+
+
+def _collapse_whitespace(text: str) -> str:
+    """Collapse runs of 3+ newlines to a blank line and runs of spaces to one space."""
+    return _SPACES_RE.sub(" ", _NEWLINES_RE.sub("\n\n", text))
+
+
+def _clean_content(text: str, limit: int = MAX_CONTENT_CHARS) -> str:
+    """Strip URLs, collapse whitespace, and cap length to reduce LLM input bloat.
+
+    Raw pages can be megabytes long, so the text is cleaned in chunks and
+    cleaning stops as soon as `limit` characters of output are final. Chunks
+    end just after a whitespace character, so a URL never spans two chunks.
+    The final run of spaces or newlines is carried into the next chunk, so
+    whitespace collapses exactly as if the whole page were cleaned at once.
+    """
+    pieces: list[str] = []
+    size = 0
+    carry = ""
+    pos = 0
+    end_of_text = len(text)
+
+    while pos < end_of_text and size < limit:
+        end = min(pos + _CHUNK_CHARS, end_of_text)
+        if end < end_of_text:
+            end = _cut_after_whitespace(text, pos, end)
+
+        cleaned = _collapse_whitespace(carry + _URL_RE.sub("", text[pos:end]))
+        last_char = cleaned[-1:]
+        tail = len(cleaned.rstrip(last_char)) if last_char in (" ", "\n") else len(cleaned)
+        carry = cleaned[tail:]
+        pieces.append(cleaned[:tail])
+        size += tail
+        pos = end
+
+    if pos >= end_of_text:
+        pieces.append(carry)
+    return "".join(pieces)[:limit]
+
 
+def _preprocess(raw: str) -> tuple[str, str]:
+    """Clean a raw page and fingerprint the cleaned text."""
+    text = _clean_content(raw)
+    return text, content_hash(text)
+
+
+def _compact_payload(raw: str) -> str:
+    """Trim a raw page to at most _MAX_PAYLOAD_CHARS, ending just after whitespace.
+
+    Ending on whitespace keeps every token whole, so if the trimmed page still
+    fills the output budget its cleaned text is identical to the full page's.
+    """
+    if len(raw) <= _MAX_PAYLOAD_CHARS:
+        return raw
+    return raw[: _cut_after_whitespace(raw, 0, _MAX_PAYLOAD_CHARS)]
 
-def _clean_content(text: str) -> str:
-    """Strip URLs, collapse whitespace, and cap length to reduce LLM input bloat."""
-    text = re.sub(r"https?://\S+", "", text)
-    text = re.sub(r"\n{3,}", "\n\n", text)
-    text = re.sub(r" {2,}", " ", text)
-    return text[:40_000]
+
+def _get_preprocess_pool() -> ProcessPoolExecutor | None:
+    """Get or create the worker pool configured by PREPROCESS_WORKERS (0 = in-process)."""
+    global _preprocess_pool
+    workers = int(os.getenv("PREPROCESS_WORKERS", "0"))
+    if workers <= 0:
+        return None
+    if _preprocess_pool is None:
+        # Spawn rather than fork: the parent runs worker threads and holds
+        # database connections that a forked child must not inherit
+        _preprocess_pool = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        atexit.register(_shutdown_preprocess_pool)
+    return _preprocess_pool
+
+
+def _shutdown_preprocess_pool() -> None:
+    """Stop the worker pool, if one was started."""
+    global _preprocess_pool
+    if _preprocess_pool is not None:
+        _preprocess_pool.shutdown(cancel_futures=True)
+        _preprocess_pool = None
+
+
+def preprocess_pages(raw_pages: list[str]) -> list[tuple[str, str]]:
+    """
+    Clean and fingerprint raw pages, offloading to worker processes if configured.
+
+    With PREPROCESS_WORKERS set, pages are cleaned in a process pool so the CPU
+    work does not hold the GIL while LLM calls are in flight. Workers receive
+    only a trimmed slice of each page; the rare page whose slice does not fill
+    the output budget is finished in-process from the full text.
+
+    Args:
+        raw_pages: Raw page text, one entry per search result
+
+    Returns:
+        A (cleaned text, content hash) pair for each page, in order
+    """
+    pool = _get_preprocess_pool()
+    if pool is None or len(raw_pages) < 2:
+        return [_preprocess(raw) for raw in raw_pages]
+
+    payloads = [_compact_payload(raw) for raw in raw_pages]
+    results = list(pool.map(_preprocess, payloads))
+    for i, (raw, payload) in enumerate(zip(raw_pages, payloads)):
+        if len(payload) < len(raw) and len(results[i][0]) < MAX_CONTENT_CHARS:
+            results[i] = _preprocess(raw)
+    return results
+
+
+def _search_mode(provider: SearchProvider) -> str:
+    """Return the SEARCH_MODE to use with provider: single (default) or two-phase."""
+    mode = os.getenv("SEARCH_MODE", "single").lower()
+    if mode not in SEARCH_MODES:
+        raise ValueError(
+            f"Unknown SEARCH_MODE: '{mode}'. Must be one of: {', '.join(SEARCH_MODES)}"
+        )
+    return mode if isinstance(provider, FetchingSearchProvider) else "single"
+
+
+def _collect_results(
+    hits: list[SearchHit],
+    raw_pages: list[str],
+    seen_urls: set[str],
+    seen_hashes: set[str],
+) -> list[SearchResult]:
+    """Clean and fingerprint pages, skipping empty ones and ones already seen."""
+    results = []
+    for hit, (text, digest) in zip(hits, preprocess_pages(raw_pages)):
+        canonical = canonicalize_url(hit.url)
+        # Skip empty pages and pages mirrored under another URL
+        if text and canonical not in seen_urls and digest not in seen_hashes:
+            seen_urls.add(canonical)
+            seen_hashes.add(digest)
+            results.append(
+                SearchResult(
+                    url=hit.url,
+                    title=hit.title,
+                    content=text,
+                    score=hit.score,
+                    content_hash=digest,
+                )
+            )
+    return results
+
+
+def query_variants(query: str) -> list[str]:
+    """
+    Return the query followed by rephrasings that may find other recipe pages.
+
+    The variants drop modifiers such as "best" or "quick", and add "easy" or
+    "authentic" to what remains. Duplicates (ignoring case) are removed.
+
+    Args:
+        query: The user's recipe query (e.g., "Best Carbonara")
+
+    Returns:
+        The original query first, then its variants
+    """
+    words = query.split()
+    core = [word for word in words if word.lower().strip(".,!?") not in _QUERY_MODIFIERS]
+    base = " ".join(core) or query
+    variants: dict[str, str] = {}
+    for variant in (query, base, f"easy {base}", f"authentic {base}"):
+        variants.setdefault(variant.lower(), variant)
+    return list(variants.values())
+
+
+def _max_searches() -> int:
+    """Return the cap on search calls per query from SEARCH_MAX_CALLS (at least 1)."""
+    return max(1, int(os.getenv("SEARCH_MAX_CALLS", str(DEFAULT_MAX_SEARCHES))))
+
+
+def _search_variants(
+    provider: SearchProvider,
+    variants: list[str],
+    max_results: int,
+    exclude_domains: list[str],
+    deadline: Deadline,
+    include_content: bool,
+) -> list[SearchHit]:
+    """Run the variant searches in parallel and return all of their hits.
+
+    A failed variant is logged and skipped: the original query already
+    produced results, so this only loses some extra candidates.
+    """
+
+    def run(variant: str) -> list[SearchHit]:
+        return provider.search(
+            variant,
+            max_results=max_results,
+            exclude_domains=exclude_domains,
+            timeout=deadline.remaining(),
+            include_content=include_content,
+        )
+
+    hits: list[SearchHit] = []
+    with ThreadPoolExecutor(max_workers=len(variants)) as pool:
+        futures = {pool.submit(run, variant): variant for variant in variants}
+        for future in futures:
+            try:
+                hits.extend(future.result())
+            except Exception as e:
+                logger.warning("Search for '%s' failed: %s", futures[future], e)
+    return hits
 
 
 def search_for_recipes(
     query: str,
     num_results: int = 5,
     exclude_urls: list[str] | None = None,
+    timeout: float | None = None,
 ) -> list[SearchResult]:
     """
-    Search for recipe sources using Tavily API.
+    Search for recipe sources with the configured search provider (see SEARCH_PROVIDER).
+
+    In single mode (the default) every page's raw text comes with the
+    search results. In two-phase mode (SEARCH_MODE=two-phase, if the
+    provider supports it) the search returns only URLs and snippets.
+    Candidates are filtered and ranked locally, and full pages are fetched,
+    in one parallel batch, only for the best num_results of them. If some
+    of those pages turn out empty or duplicates, the next candidates are
+    fetched in their place.
+
+    If filtering leaves fewer than num_results, variants of the query (see
+    query_variants) are searched in parallel, up to SEARCH_MAX_CALLS search
+    calls in total. Their hits are merged with the first search's, ignoring
+    URLs already seen, and the results are ranked by relevance score.
 
     Args:
         query: The search query (e.g., "Best Carbonara recipe")
         num_results: Number of results to return (default 5)
         exclude_urls: URLs to exclude from results (e.g., already-saved recipes)
+        timeout: Optional limit in seconds for searching and fetching together
 
     Returns:
-        List of SearchResult objects with URL, title, and content.
+        List of SearchResult objects with URL, title, and content, best first.
     """
-    client = _get_tavily_client()
-    excluded = set(exclude_urls) if exclude_urls else set()
+    provider = get_search_provider()
+    two_phase = _search_mode(provider) == "two-phase"
+    deadline = Deadline(timeout)
+    excluded = {canonicalize_url(u) for u in exclude_urls} if exclude_urls else set()
 
-    # Extract domains from excluded URLs so Tavily never returns results
+    # Extract domains from excluded URLs so the provider never returns results
     # from sites the user already has recipes from.
     exclude_domains = list(
         {(urlparse(u).hostname or "").removeprefix("www.").removeprefix("m.") for u in excluded}
         - {""}
     )
 
-    response = client.search(
-        query=f"{query} recipe ingredients instructions",
-        search_depth="basic",
-        max_results=min(num_results + 3, 20),
-        include_raw_content=True,
-        exclude_domains=exclude_domains if exclude_domains else None,
+    hits = provider.search(
+        query,
+        max_results=num_results + 3,
+        exclude_domains=exclude_domains,
+        timeout=deadline.remaining(),
+        include_content=not two_phase,
     )
 
-    results = []
-    for result in response.get("results", []):
-        url = result.get("url", "")
-        title = result.get("title", "Untitled")
-        raw_content = result.get("raw_content", "")
-        content = result.get("content", "")
-        relevance = result.get("score", 0.0)
+    seen_urls: set[str] = set()
+    seen_hashes: set[str] = set()
+    candidate_urls: set[str] = set()
+    results: list[SearchResult] = []
+    variants = query_variants(query)[1 : _max_searches()]
+    while True:
+        # Filter on URL first so excluded pages are never cleaned (or fetched)
+        candidates = []
+        for hit in hits:
+            url = hit.url
+
+            # Strip www./m. prefixes to match against EXCLUDED_DOMAINS
+            domain = urlparse(url).hostname or ""
+            domain = domain.removeprefix("www.").removeprefix("m.")
 
-        # Prefer raw_content if available, then clean for LLM extraction
-        text = _clean_content(raw_content if raw_content else content)
+            # Compare canonical URLs so http/https, tracking-param and trailing-slash
+            # variants of the same page are treated as one
+            canonical = canonicalize_url(url) if url else ""
+            if canonical and canonical not in excluded and domain not in EXCLUDED_DOMAINS:
+                if canonical in candidate_urls:
+                    continue
+                candidate_urls.add(canonical)
+                candidates.append(hit)
 
-        # Strip www./m. prefixes to match against EXCLUDED_DOMAINS
-        domain = urlparse(url).hostname or ""
-        domain = domain.removeprefix("www.").removeprefix("m.")
+        if two_phase:
+            # Best first; the sort is stable, so equal scores keep the provider's order
+            candidates.sort(key=lambda hit: hit.score, reverse=True)
+            position = 0
+            while len(results) < num_results and position < len(candidates):
+                if deadline.expired:
+                    break
+                batch = candidates[position : position + num_results - len(results)]
+                position += len(batch)
+                fetched = provider.fetch([hit.url for hit in batch], timeout=deadline.remaining())
+                pages = [fetched.get(hit.url, "") for hit in batch]
+                results.extend(_collect_results(batch, pages, seen_urls, seen_hashes))
+        else:
+            pages = [hit.content for hit in candidates]
+            results.extend(_collect_results(candidates, pages, seen_urls, seen_hashes))
 
-        if text and url and url not in excluded and domain not in EXCLUDED_DOMAINS:
-            results.append(SearchResult(url=url, title=title, content=text, score=relevance))
+        if len(results) >= num_results or not variants or deadline.expired:
+            break
+        hits = _search_variants(
+            provider,
+            variants,
+            max_results=num_results - len(results) + 3,
+            exclude_domains=exclude_domains,
+            deadline=deadline,
+            include_content=not two_phase,
+        )
+        variants = []
 
+    results.sort(key=lambda result: result.score, reverse=True)
     return results[:num_results]
@@ -0,0 +1,52 @@
+"""Pluggable search provider factory for finding recipe pages."""
+
+import os
+import threading
+
+from .base import SearchProvider
+
+SEARCH_PROVIDER_NAMES = ("tavily", "local")
+
+_search_provider: SearchProvider | None = None
+_search_provider_lock = threading.Lock()
+
+
+def get_search_provider() -> SearchProvider:
+    """Get the configured search provider (cached singleton).
+
+    Reads SEARCH_PROVIDER from the environment: tavily (default) searches
+    the web, local searches the corpus built with `uncluttered index`.
+    """
+    global _search_provider
+    if _search_provider is not None:
+        return _search_provider
+    with _search_provider_lock:
+        if _search_provider is None:
+            _search_provider = create_search_provider(
+                os.getenv("SEARCH_PROVIDER", "tavily").lower()
+            )
+    return _search_provider
+
+
+def create_search_provider(provider_name: str) -> SearchProvider:
+    """Create a new search provider instance by name.
+
+    Args:
+        provider_name: One of tavily, local
+
+    Returns:
+        An uncached SearchProvider
+    """
+    if provider_name == "tavily":
+        from .tavily import TavilySearchProvider
+
+        return TavilySearchProvider()
+    elif provider_name == "local":
+        from .local import LocalSearchProvider
+
+        return LocalSearchProvider()
+    else:
+        raise ValueError(
+            f"Unknown SEARCH_PROVIDER: '{provider_name}'. "
+            f"Must be one of: {', '.join(SEARCH_PROVIDER_NAMES)}"
+        )
@@ -0,0 +1,69 @@
+"""Abstract base class for search providers."""
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+
+
+@dataclass
+class SearchHit:
+    """A page found by a search provider, before cleaning and deduplication."""
+
+    url: str
+    title: str
+    # Raw page text, or only a snippet when the search skipped page content
+    content: str
+    # Relevance from 0 to 1, higher is better
+    score: float = 0.0
+
+
+class SearchProvider(ABC):
+    """Base class for providers that find candidate recipe pages for a query."""
+
+    # Short provider name used in configuration (e.g. "tavily")
+    name: str = ""
+
+    @abstractmethod
+    def search(
+        self,
+        query: str,
+        max_results: int,
+        exclude_domains: list[str] | None = None,
+        timeout: float | None = None,
+        include_content: bool = True,
+    ) -> list[SearchHit]:
+        """
+        Find pages for a recipe query, best match first.
+
+        Args:
+            query: The user's recipe query (e.g., "Best Carbonara")
+            max_results: Maximum number of hits to return
+            exclude_domains: Domains (without "www.") whose pages must not be returned
+            timeout: Optional limit in seconds for the search
+            include_content: Return each page's raw text; if False, hits carry
+                only a snippet and the text is fetched later with fetch()
+
+        Returns:
+            Up to max_results hits
+        """
+
+
+class FetchingSearchProvider(SearchProvider):
+    """Search provider that can also fetch pages by URL.
+
+    A search can then skip page content (two-phase mode), and saved recipes
+    can be refreshed from their source pages.
+    """
+
+    @abstractmethod
+    def fetch(self, urls: list[str], timeout: float | None = None) -> dict[str, str]:
+        """
+        Fetch the raw text of pages returned by an earlier search.
+
+        Args:
+            urls: Page URLs, as returned in SearchHit.url
+            timeout: Optional limit in seconds for the whole fetch
+
+        Returns:
+            Raw text keyed by the requested URL; pages that could not be
+            fetched are missing
+        """
@@ -0,0 +1,37 @@
+"""Local search provider over the on-disk corpus index."""
+
+from ..corpus import CorpusIndex
+from .base import FetchingSearchProvider, SearchHit
+
+
+class LocalSearchProvider(FetchingSearchProvider):
+    """BM25 search over pages indexed with `uncluttered index`, without network access.
+
+    The timeout is ignored: queries are answered from the local index in
+    milliseconds.
+    """
+
+    name = "local"
+
+    def __init__(self, index: CorpusIndex | None = None):
+        self._index = index or CorpusIndex()
+        if self._index.page_count() == 0:
+            raise ValueError(
+                "The local search index is empty. "
+                "Index a directory of crawled pages with: uncluttered index <directory>"
+            )
+
+    def search(
+        self,
+        query: str,
+        max_results: int,
+        exclude_domains: list[str] | None = None,
+        timeout: float | None = None,
+        include_content: bool = True,
+    ) -> list[SearchHit]:
+        return self._index.search(
+            query, max_results, exclude_domains=exclude_domains, snippets=not include_content
+        )
+
+    def fetch(self, urls: list[str], timeout: float | None = None) -> dict[str, str]:
+        return self._index.get_pages(urls)
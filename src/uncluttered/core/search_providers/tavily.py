@@ -0,0 +1,106 @@
+"""Tavily web search provider."""
+
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from tavily import TavilyClient
+
+from ..http import get_http_session
+from ..utils import canonicalize_url
+from .base import FetchingSearchProvider, SearchHit
+
+# Longest Tavily request allowed, whatever the caller's time budget
+MAX_TIMEOUT = 60
+
+# Tavily returns at most this many results per request
+MAX_RESULTS = 20
+
+# Tavily extracts at most this many URLs per request
+MAX_EXTRACT_URLS = 20
+
+logger = logging.getLogger(__name__)
+
+
+class TavilySearchProvider(FetchingSearchProvider):
+    """Web search through the Tavily API.
+
+    Page text comes either with the search results (one request) or from
+    Tavily's extract endpoint for only the URLs that are still wanted after
+    filtering.
+    """
+
+    name = "tavily"
+
+    def __init__(self, api_key: str | None = None):
+        api_key = api_key or os.getenv("TAVILY_API_KEY")
+        if not api_key:
+            raise ValueError(
+                "TAVILY_API_KEY environment variable is required. Get your key at: https://tavily.com"
+            )
+        # Share the pooled keep-alive session with the rest of the application
+        self._client = TavilyClient(api_key=api_key, session=get_http_session())
+
+    def search(
+        self,
+        query: str,
+        max_results: int,
+        exclude_domains: list[str] | None = None,
+        timeout: float | None = None,
+        include_content: bool = True,
+    ) -> list[SearchHit]:
+        response = self._client.search(
+            query=f"{query} recipe ingredients instructions",
+            search_depth="basic",
+            max_results=min(max_results, MAX_RESULTS),
+            include_raw_content=include_content,
+            exclude_domains=exclude_domains or None,
+            timeout=_request_timeout(timeout),
+        )
+        return [
+            SearchHit(
+                url=result.get("url", ""),
+                title=result.get("title", "Untitled"),
+                # Prefer the full page over Tavily's snippet
+                content=result.get("raw_content") or result.get("content", ""),
+                score=result.get("score", 0.0),
+            )
+            for result in response.get("results", [])
+        ]
+
+    def fetch(self, urls: list[str], timeout: float | None = None) -> dict[str, str]:
+        if not urls:
+            return {}
+        batches = [urls[i : i + MAX_EXTRACT_URLS] for i in range(0, len(urls), MAX_EXTRACT_URLS)]
+        if len(batches) == 1:
+            return self._extract(batches[0], timeout)
+        pages: dict[str, str] = {}
+        with ThreadPoolExecutor(max_workers=len(batches)) as pool:
+            for batch_pages in pool.map(lambda batch: self._extract(batch, timeout), batches):
+                pages.update(batch_pages)
+        return pages
+
+    def _extract(self, urls: list[str], timeout: float | None) -> dict[str, str]:
+        """Fetch one batch of pages; Tavily downloads them concurrently.
+
+        Markdown matches the raw content a search returns, so a page has the
+        same content hash whichever way it was fetched.
+        """
+        response = self._client.extract(
+            urls=urls, extract_depth="basic", format="markdown", timeout=_request_timeout(timeout)
+        )
+        # Map Tavily's URLs back to the requested ones, which it may have normalized
+        requested = {canonicalize_url(url): url for url in urls}
+        pages = {}
+        for result in response.get("results", []):
+            url = requested.get(canonicalize_url(result.get("url", "")))
+            if url is not None and result.get("raw_content"):
+                pages[url] = result["raw_content"]
+        for failure in response.get("failed_results", []):
+            logger.info("Could not fetch %s: %s", failure.get("url"), failure.get("error"))
+        return pages
+
+
+def _request_timeout(timeout: float | None) -> float:
+    """Limit one request to the caller's time budget and to MAX_TIMEOUT."""
+    return min(timeout, MAX_TIMEOUT) if timeout is not None else MAX_TIMEOUT
@@ -0,0 +1,324 @@
+"""Local "more like this" index over saved recipes.
+
+Each recipe is turned into a hashed bag-of-words vector over its title and
+ingredient names: words are hashed into DIMENSIONS buckets with a random
+sign, with sublinear term frequency. Vectors are stored IDF-weighted and
+unit-length as fixed-size float32 records in one append-only file beside
+the database, so a query is one matrix-vector product over the file.
+Adding a recipe is a single append and deleting one overwrites its ID
+with a tombstone.
+
+The IDF weights are kept in a small file next to the records. New records
+are weighted with the stored weights. Once the library has doubled or
+halved since they were computed, the weights are recomputed and every
+record is re-weighted in one pass, so they track the library without
+costing anything per query.
+
+Requires the optional `numpy` package. Without it, index updates are
+skipped and `similar` asks for it to be installed; the index is rebuilt
+from the database when it falls out of step.
+"""
+
+import math
+import os
+import re
+import threading
+import zlib
+from collections import Counter
+from pathlib import Path
+
+from .models import Recipe
+from .utils import get_data_dir
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Hashed feature buckets; 256 float32 values make a record 1,032 bytes
+DIMENSIONS = 256
+
+# ID written over a deleted recipe's record
+_TOMBSTONE = -1
+
+# Rewrite the file once this share of records are tombstones
+_COMPACT_RATIO = 0.25
+
+# Re-weight every record once the live count moves this far from the count
+# the IDF weights were computed for
+_REWEIGHT_FACTOR = 2.0
+
+_STOPWORDS = {
+    "a", "an", "and", "best", "easy", "for", "fresh", "from", "in", "of", "on",
+    "or", "recipe", "the", "to", "with",
+}  # fmt: skip
+
+_WORD_RE = re.compile(r"[a-z]+")
+
+_lock = threading.Lock()
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError(
+            "The 'numpy' package is required for similarity search. "
+            'Install with: pip install "uncluttered[similar]"'
+        )
+
+
+def _record_dtype():
+    return np.dtype([("id", "<i8"), ("vector", "<f4", (DIMENSIONS,))])
+
+
+def _get_index_path() -> Path:
+    """Return the path of the vector file beside the database."""
+    return get_data_dir() / "similarity.idx"
+
+
+def _weights_path() -> Path:
+    """Return the path of the IDF weights stored next to the vector file."""
+    path = _get_index_path()
+    return path.with_name(path.name + ".npz")
+
+
+def _terms(recipe: Recipe) -> Counter:
+    """Count the normalized words of a recipe's title (weighted double) and ingredients."""
+    words: list[str] = []
+    title_words = _WORD_RE.findall(recipe.title.lower())
+    words.extend(title_words * 2)
+    for ingredient in recipe.ingredients:
+        words.extend(_WORD_RE.findall(ingredient.name.lower()))
+    counts: Counter = Counter()
+    for word in words:
+        if word in _STOPWORDS or len(word) < 3:
+            continue
+        # Crude plural folding so "tomatoes" and "tomato" share a bucket
+        if len(word) > 4 and word.endswith("es"):
+            word = word[:-2]
+        elif len(word) > 3 and word.endswith("s"):
+            word = word[:-1]
+        counts[word] += 1
+    return counts
+
+
+def vectorize(recipe: Recipe):
+    """Return the hashed term-frequency vector of a recipe (float32, unnormalized)."""
+    _require_numpy()
+    vector = np.zeros(DIMENSIONS, dtype=np.float32)
+    for word, count in _terms(recipe).items():
+        digest = zlib.crc32(word.encode("utf-8"))
+        sign = 1.0 if digest & 0x80000000 else -1.0
+        vector[digest % DIMENSIONS] += sign * (1.0 + math.log(count))
+    return vector
+
+
+def _normalize_rows(vectors):
+    """Scale each row to unit length in place (all-zero rows stay zero)."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    vectors /= norms
+
+
+def _idf(vectors):
+    """Return IDF weights from how many of the (unweighted) vectors use each bucket."""
+    document_frequency = np.count_nonzero(vectors, axis=0)
+    return (np.log((1 + len(vectors)) / (1 + document_frequency)) + 1.0).astype(np.float32)
+
+
+def _records(ids, vectors, weights):
+    """Build index records holding the weighted, unit-length vectors."""
+    records = np.zeros(len(ids), dtype=_record_dtype())
+    records["id"] = ids
+    weighted = vectors * weights
+    _normalize_rows(weighted)
+    records["vector"] = weighted
+    return records
+
+
+def _load_weights():
+    """Return (IDF weights, live count they were computed for), or None."""
+    try:
+        with np.load(_weights_path()) as stored:
+            return stored["weights"], int(stored["basis"])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _write(records, weights) -> None:
+    """Replace the vector file and its weights."""
+    path = _get_index_path()
+    tmp_path = path.with_suffix(".tmp")
+    records.tofile(tmp_path)
+    os.replace(tmp_path, path)
+    weights_path = _weights_path()
+    tmp_weights = weights_path.with_suffix(".tmp.npz")
+    with open(tmp_weights, "wb") as f:
+        np.savez(f, weights=weights, basis=np.int64(len(records)))
+    os.replace(tmp_weights, weights_path)
+
+
+def _reweight(ids, vectors) -> None:
+    """Rewrite the index with new IDF weights for the live records plus new vectors.
+
+    Stored rows are weighted and unit-length; dividing by the old weights
+    recovers each raw vector up to a scale, which cosine similarity ignores.
+    """
+    records = _load()
+    stored = _load_weights()
+    if records is not None and stored is not None:
+        live = np.asarray(records[records["id"] != _TOMBSTONE])
+        live = live[~np.isin(live["id"], ids)]
+        ids = np.concatenate([live["id"], ids])
+        vectors = np.concatenate([live["vector"] / stored[0], vectors])
+    weights = _idf(vectors)
+    _write(_records(ids, vectors, weights), weights)
+
+
+def _append(records) -> None:
+    """Append records in one write so concurrent appenders never interleave a record."""
+    path = _get_index_path()
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, records.tobytes())
+    finally:
+        os.close(fd)
+
+
+def _load():
+    """Return all records (including tombstones) as a read-only memory map, or None.
+
+    An index without stored weights (e.g. from an older version) counts as
+    missing, so `similar` rebuilds it.
+    """
+    path = _get_index_path()
+    if not path.exists() or path.stat().st_size == 0 or not _weights_path().exists():
+        return None
+    size = path.stat().st_size // _record_dtype().itemsize
+    return np.memmap(path, dtype=_record_dtype(), mode="r", shape=(size,))
+
+
+def _tombstone(recipe_ids: set[int]) -> None:
+    """Overwrite the IDs of the given recipes' records with the tombstone."""
+    records = _load()
+    if records is None:
+        return
+    positions = np.flatnonzero(np.isin(records["id"], list(recipe_ids)))
+    if positions.size == 0:
+        return
+    ids = np.memmap(
+        _get_index_path(),
+        dtype=np.dtype("<i8"),
+        mode="r+",
+        shape=(records.size, _record_dtype().itemsize // 8),
+    )
+    ids[positions, 0] = _TOMBSTONE
+    ids.flush()
+    if (records["id"] == _TOMBSTONE).sum() > _COMPACT_RATIO * records.size:
+        _compact()
+
+
+def _compact() -> None:
+    """Rewrite the file without tombstoned records."""
+    records = _load()
+    live = np.array(records[records["id"] != _TOMBSTONE])
+    path = _get_index_path()
+    tmp_path = path.with_suffix(".tmp")
+    live.tofile(tmp_path)
+    os.replace(tmp_path, path)
+    stored = _load_weights()
+    if stored is not None and len(live) * _REWEIGHT_FACTOR <= stored[1]:
+        _reweight(np.zeros(0, dtype=np.int64), np.zeros((0, DIMENSIONS), dtype=np.float32))
+
+
+def index_recipe(recipe: Recipe) -> None:
+    """Add or replace a saved recipe's vector. No-op without numpy."""
+    index_recipes([recipe])
+
+
+def index_recipes(recipes: list[Recipe]) -> None:
+    """Add or replace several saved recipes' vectors in one append. No-op without numpy."""
+    recipes = [recipe for recipe in recipes if recipe.id is not None]
+    if np is None or not recipes:
+        return
+    ids = np.array([recipe.id for recipe in recipes], dtype=np.int64)
+    vectors = np.array([vectorize(recipe) for recipe in recipes], dtype=np.float32)
+    with _lock:
+        records = _load()
+        stored = _load_weights()
+        live_count = 0 if records is None else int((records["id"] != _TOMBSTONE).sum())
+        if (
+            records is None
+            or stored is None
+            or (live_count + len(ids) >= _REWEIGHT_FACTOR * stored[1])
+        ):
+            _reweight(ids, vectors)
+            return
+        _tombstone(set(ids.tolist()))
+        # A compaction during the tombstoning may have re-weighted the file
+        weights, _ = _load_weights()
+        _append(_records(ids, vectors, weights))
+
+
+def remove_recipes(recipe_ids: list[int]) -> None:
+    """Remove recipes from the index. No-op without numpy."""
+    if np is None or not recipe_ids:
+        return
+    with _lock:
+        _tombstone(set(recipe_ids))
+
+
+def clear_index() -> None:
+    """Delete the whole index."""
+    with _lock:
+        _get_index_path().unlink(missing_ok=True)
+        _weights_path().unlink(missing_ok=True)
+
+
+def rebuild_index(recipes: list[Recipe]) -> int:
+    """Replace the index with vectors for recipes. Returns the number indexed."""
+    _require_numpy()
+    ids = np.array([recipe.id for recipe in recipes], dtype=np.int64)
+    vectors = np.zeros((len(recipes), DIMENSIONS), dtype=np.float32)
+    for i, recipe in enumerate(recipes):
+        vectors[i] = vectorize(recipe)
+    weights = _idf(vectors)
+    with _lock:
+        _write(_records(ids, vectors, weights), weights)
+    return len(recipes)
+
+
+def indexed_count() -> int:
+    """Return the number of live recipes in the index."""
+    _require_numpy()
+    records = _load()
+    return 0 if records is None else int((records["id"] != _TOMBSTONE).sum())
+
+
+def find_similar(recipe: Recipe, limit: int = 5) -> list[tuple[int, float]]:
+    """Find the saved recipes most similar to recipe by TF-IDF cosine similarity.
+
+    Returns:
+        Up to limit (recipe ID, similarity) pairs, most similar first,
+        excluding the recipe itself
+    """
+    _require_numpy()
+    if limit < 1:
+        return []
+    records = _load()
+    stored = _load_weights()
+    if records is None or stored is None:
+        return []
+
+    query = vectorize(recipe) * stored[0]
+    query_norm = np.linalg.norm(query)
+    if query_norm == 0:
+        return []
+    # Rows are already weighted and unit-length, so this is the cosine
+    scores = records["vector"] @ (query / query_norm)
+    ids = records["id"]
+    scores[(ids == _TOMBSTONE) | (ids == recipe.id)] = -np.inf
+
+    count = min(limit, ids.size)
+    top = np.argpartition(-scores, count - 1)[:count]
+    top = top[np.argsort(-scores[top])]
+    return [(int(ids[i]), float(scores[i])) for i in top if scores[i] > 0]
@@ -0,0 +1,75 @@
+"""Coalesce concurrent calls that share a key into a single execution."""
+
+import threading
+from collections.abc import Callable
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class _Call:
+    """State for one in-flight call, shared by its leader and any followers."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight(Generic[T]):
+    """Run at most one call per key at a time.
+
+    The first caller for a key (the leader) executes the function. Callers that
+    arrive with the same key while it is running wait for it and receive the
+    same result, or the same exception.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict[str, _Call] = {}
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        """Execute fn for key, or wait for the in-flight execution to finish."""
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not is_leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            result = fn()
+        except BaseException as e:
+            self.resolve(key, error=e)
+            raise
+        self.resolve(key, result)
+        return result
+
+    def claim(self, key: str) -> bool:
+        """Become the leader for key without running anything yet.
+
+        Returns:
+            True if the caller now leads key and must call resolve(key) exactly
+            once; False if a call for key is already in flight
+        """
+        with self._lock:
+            if key in self._calls:
+                return False
+            self._calls[key] = _Call()
+            return True
+
+    def resolve(
+        self, key: str, result: T | None = None, error: BaseException | None = None
+    ) -> None:
+        """Finish the in-flight call for key, handing result (or error) to its followers."""
+        with self._lock:
+            call = self._calls.pop(key)
+        call.result = result
+        call.error = error
+        call.done.set()
@@ -0,0 +1,121 @@
+"""Streaming JSONL export and import of the recipe library.
+
+An export has one recipe per line, with all of the search terms it is
+filed under. Files ending in `.gz` are gzip-compressed and files ending in
+`.zst` are zstd-compressed (this needs the optional `zstandard` package).
+Both directions stream: the library is read from the database in chunks
+and imported in batches, so memory use stays flat however large it is.
+"""
+
+import gzip
+import json
+import logging
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO
+
+from .database import import_recipes, iter_recipes
+from .models import Recipe
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# Recipes saved per transaction on import
+IMPORT_BATCH_SIZE = 500
+
+# Local references that mean nothing in another library
+_LOCAL_FIELDS = {"id", "extraction_id"}
+
+
+@dataclass
+class ImportResult:
+    """Counts of imported, duplicate and unreadable records."""
+
+    imported: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+
+
+def _open(path: Path, mode: str) -> IO[str]:
+    """Open a text stream, compressed according to the file suffix."""
+    if path.suffix == ".gz":
+        return gzip.open(path, f"{mode}t", encoding="utf-8", compresslevel=6)
+    if path.suffix == ".zst":
+        if zstandard is None:
+            raise ImportError(
+                "The 'zstandard' package is required for .zst files. "
+                'Install with: pip install "uncluttered[zstd]"'
+            )
+        return zstandard.open(path, f"{mode}t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def export_library(path: Path) -> int:
+    """Write every saved recipe to path as JSONL. Returns the number exported."""
+    count = 0
+    with _open(path, "w") as f:
+        for recipe, search_terms in iter_recipes():
+            record = recipe.model_dump(
+                mode="json", by_alias=True, exclude=_LOCAL_FIELDS, exclude_none=True
+            )
+            record["search_terms"] = search_terms
+            f.write(json.dumps(record, ensure_ascii=False))
+            f.write("\n")
+            count += 1
+    return count
+
+
+def _read_records(f: IO[str], result: ImportResult) -> Iterator[tuple[Recipe, list[str]]]:
+    """Parse recipes and search terms line by line, counting and skipping bad lines."""
+    for line_number, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+            search_terms = data.pop("search_terms", None) or []
+            for field in _LOCAL_FIELDS:
+                data.pop(field, None)
+            recipe = Recipe.model_validate(data)
+        except (ValueError, AttributeError) as e:  # bad JSON, not an object, or invalid recipe
+            logger.warning("Skipping line %d: %s", line_number, e)
+            result.invalid += 1
+            continue
+        # Search terms are stored lowercase
+        if recipe.search_term is not None:
+            recipe.search_term = recipe.search_term.lower()
+        search_terms = [term.lower() for term in search_terms if isinstance(term, str)]
+        if not search_terms and recipe.search_term is not None:
+            search_terms = [recipe.search_term]
+        yield recipe, search_terms
+
+
+def import_library(path: Path, batch_size: int = IMPORT_BATCH_SIZE) -> ImportResult:
+    """Save the recipes in a JSONL export, skipping ones already in the library.
+
+    Recipes are deduplicated by canonical source URL, or by slug when they
+    have no source URL; a duplicate is only linked to the export's search
+    terms. Unreadable lines are logged and counted, not fatal.
+    """
+    result = ImportResult()
+    with _open(path, "r") as f:
+        batch: list[tuple[Recipe, list[str]]] = []
+        for record in _read_records(f, result):
+            batch.append(record)
+            if len(batch) >= batch_size:
+                _import_batch(batch, result)
+                batch = []
+        if batch:
+            _import_batch(batch, result)
+    return result
+
+
+def _import_batch(batch: list[tuple[Recipe, list[str]]], result: ImportResult) -> None:
+    saved = import_recipes(batch)
+    new = sum(recipe is not None for recipe in saved)
+    result.imported += new
+    result.duplicates += len(saved) - new
@@ -2,6 +2,24 @@
 
 import re
 import unicodedata
+from datetime import timedelta
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+# Query parameters that identify a click or campaign rather than a page.
+TRACKING_PARAMS = {
+    "fbclid",
+    "gclid",
+    "dclid",
+    "msclkid",
+    "yclid",
+    "igshid",
+    "mc_cid",
+    "mc_eid",
+    "ref",
+    "ref_src",
+    "_ga",
+}
 
 
 def generate_slug(title: str) -> str:
@@ -32,22 +50,130 @@ def generate_slug(title: str) -> str:
     return slug
 
 
-def make_unique_slug(base_slug: str, existing_slugs: set[str]) -> str:
+def normalize_query(query: str) -> str:
+    """
+    Normalize a search query so equivalent spellings share one key.
+
+    Args:
+        query: The raw user query (e.g., "  Best   Carbonara ")
+
+    Returns:
+        A lowercase query with collapsed whitespace (e.g., "best carbonara")
+    """
+    return " ".join(query.lower().split())
+
+
+def _singular(word: str) -> str:
+    """Reduce a plural English word to a singular form.
+
+    The rules only need to map singular and plural to the same key, not to
+    produce real words: "cookie" and "cookies" both become "cooky".
     """
-    Ensure a slug is unique by appending a number if necessary.
+    if len(word) <= 3 or word.endswith(("ss", "us", "is")):
+        return word
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith("ie"):
+        return word[:-2] + "y"
+    if word.endswith(("ches", "shes", "sses", "xes", "zes", "oes")):
+        return word[:-2]
+    if word.endswith("s"):
+        return word[:-1]
+    return word
+
+
+def query_key(query: str) -> str:
+    """
+    Reduce a query to a key shared by spellings of the same request.
+
+    Case, accents, punctuation, plurals and word order are ignored, so
+    "Chocolate-chip cookies" and "chocolate chip cookie" have the same key.
 
     Args:
-        base_slug: The base slug to make unique
-        existing_slugs: Set of slugs that already exist
+        query: A user query or stored search term
 
     Returns:
-        A unique slug (e.g., "chocolate-chip-cookies-2" if original exists)
+        The sorted, singular, lowercase words (e.g., "chip chocolate cooky")
+    """
+    text = unicodedata.normalize("NFKD", query.lower())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    words = {_singular(word) for word in re.findall(r"[^\W_]+", text)}
+    return " ".join(sorted(words))
+
+
+def canonicalize_url(url: str) -> str:
     """
-    if base_slug not in existing_slugs:
-        return base_slug
+    Reduce a URL to a canonical form so the same page is stored only once.
 
-    counter = 2
-    while f"{base_slug}-{counter}" in existing_slugs:
-        counter += 1
+    Drops the scheme distinction, "www."/"m." host prefixes, default ports,
+    fragments, tracking parameters and trailing slashes, and sorts the
+    remaining query parameters.
 
-    return f"{base_slug}-{counter}"
+    Args:
+        url: A page URL (e.g., "http://www.example.com/pasta/?utm_source=x")
+
+    Returns:
+        The canonical URL (e.g., "https://example.com/pasta")
+    """
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").lower().removeprefix("www.").removeprefix("m.")
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    netloc = host if port in (None, 80, 443) else f"{host}:{port}"
+
+    path = re.sub(r"/{2,}", "/", parts.path).rstrip("/")
+    params = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    )
+    query = f"?{urlencode(params)}" if params else ""
+
+    return f"https://{netloc}{path}{query}"
+
+
+def get_data_dir() -> Path:
+    """Return the local data directory for the database and archives, creating it if needed."""
+    data_dir = Path.home() / ".local" / "share" / "uncluttered"
+    data_dir.mkdir(parents=True, exist_ok=True)
+    return data_dir
+
+
+def estimate_tokens(text: str) -> int:
+    """Roughly estimate the LLM token count of text (about 4 characters per token)."""
+    return len(text) // 4 + 1
+
+
+_DURATION_UNITS = {"m": "minutes", "h": "hours", "d": "days", "w": "weeks"}
+
+
+def parse_duration(text: str) -> timedelta:
+    """Parse a duration such as "30m", "24h", "7d" or "2w".
+
+    Raises:
+        ValueError: If text is not a positive number followed by m, h, d or w
+    """
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([mhdw])\s*", text.lower())
+    if match is None or float(match.group(1)) <= 0:
+        raise ValueError(f"Invalid duration: '{text}'. Use e.g. 30m, 24h, 7d or 2w")
+    return timedelta(**{_DURATION_UNITS[match.group(2)]: float(match.group(1))})
+
+
+def format_page_cursor(trust_score: int | None, recipe_id: int) -> str:
+    """Format the position after a listed recipe as "score:id" ("-:id" without a score)."""
+    return f"{'-' if trust_score is None else trust_score}:{recipe_id}"
+
+
+def parse_page_cursor(text: str) -> tuple[int | None, int]:
+    """Parse a cursor from format_page_cursor into (trust score, recipe ID).
+
+    Raises:
+        ValueError: If text is not "score:id" or "-:id"
+    """
+    match = re.fullmatch(r"\s*(-|\d+):(\d+)\s*", text)
+    if match is None:
+        raise ValueError(f"Invalid cursor: '{text}'. Use the score:id printed after a page")
+    score = None if match.group(1) == "-" else int(match.group(1))
+    return score, int(match.group(2))
@@ -0,0 +1,55 @@
+"""Fixtures and helpers shared by the test modules."""
+
+import pytest
+
+from uncluttered.core import database, similarity
+from uncluttered.core.models import Recipe, TrustScore
+
+
+@pytest.fixture
+def use_database(monkeypatch):
+    """Return a function that points the database layer at a fresh SQLite file in a directory.
+
+    Calling it again switches to another database, e.g. to import into an
+    empty library what was exported from this one.
+    """
+
+    def use(path):
+        monkeypatch.setattr(database, "_get_db_path", lambda: path / "test.db")
+        monkeypatch.setattr(similarity, "_get_index_path", lambda: path / "similarity.idx")
+        monkeypatch.setattr(database, "_engine", None)
+        monkeypatch.setattr(database, "_SessionLocal", None)
+        database.create_tables()
+
+    yield use
+    if database._engine is not None:
+        database._get_engine().dispose()
+
+
+@pytest.fixture
+def temp_db(tmp_path, use_database):
+    """Point the database layer at a fresh SQLite file for each test."""
+    use_database(tmp_path)
+
+
+def make_recipe(
+    title="Carbonara",
+    url="https://example.com/carbonara",
+    term="carbonara",
+    score=80,
+    ingredients=("pasta",),
+    recipe_id=None,
+):
+    """Build a saved-looking recipe; pass url, term or score as None to leave them unset."""
+    return Recipe(
+        id=recipe_id,
+        title=title,
+        description="A test",
+        ingredients=[{"name": name, "quantity": "200", "unit": "g"} for name in ingredients],
+        instructions=["Boil", "Toss"],
+        serving_yield="2 servings",
+        source_url=url,
+        trust_score=TrustScore(score=score, reasoning="ok") if score is not None else None,
+        slug=title.lower().replace(" ", "-"),
+        search_term=term,
+    )
@@ -0,0 +1,41 @@
+"""Tests for the content-addressed page archive."""
+
+import pytest
+
+from uncluttered.core import archive
+
+
+@pytest.fixture(autouse=True)
+def temp_archive(tmp_path, monkeypatch):
+    monkeypatch.setattr(archive, "get_data_dir", lambda: tmp_path)
+
+
+class TestArchive:
+    def test_round_trip(self):
+        text = "Ingredients\n- 200 g spaghetti\n" * 100
+        digest = archive.store_content(text)
+        assert digest == archive.content_hash(text)
+        assert archive.load_content(digest) == text
+
+    def test_store_is_idempotent(self):
+        first = archive.store_content("same page")
+        path = archive.load_path(first)
+        assert archive.store_content("same page") == first
+        assert archive.load_path(first) == path
+
+    def test_content_is_compressed(self):
+        text = "whisk the eggs " * 1000
+        path = archive.load_path(archive.store_content(text))
+        assert path.stat().st_size < len(text) / 10
+
+    def test_missing_hash(self):
+        assert archive.load_content("0" * 64) is None
+
+    def test_zstd_blob_without_extra_names_the_extra(self, monkeypatch):
+        monkeypatch.setattr(archive, "zstandard", None)
+        path = archive._blob_path("a" * 64, archive._ZSTD_SUFFIX)
+        path.parent.mkdir(parents=True)
+        path.write_bytes(b"not readable without zstandard")
+
+        with pytest.raises(ImportError, match=r"uncluttered\[zstd\]"):
+            archive.load_content("a" * 64)
@@ -0,0 +1,129 @@
+"""Tests for the local corpus index and search provider."""
+
+import gzip
+import os
+
+import pytest
+
+from uncluttered.core import corpus
+from uncluttered.core.corpus import CorpusIndex, read_pages
+from uncluttered.core.search_providers import create_search_provider
+from uncluttered.core.search_providers.local import LocalSearchProvider
+
+CARBONARA = """<html><head><title>Classic Carbonara</title>
+<link rel="canonical" href="https://www.example.com/carbonara">
+<script>var tracking = "guanciale";</script>
+<script type="application/ld+json">{"recipeIngredient": ["pecorino"]}</script>
+</head><body><p>Whisk eggs and cheese.</p><p>Toss with hot spaghetti.</p></body></html>"""
+
+
+def warc_record(url, status, body):
+    http = f"HTTP/1.1 {status}\r\nContent-Type: text/html; charset=utf-8\r\n\r\n".encode()
+    block = http + body.encode()
+    head = (
+        "WARC/1.0\r\nWARC-Type: response\r\n"
+        f"WARC-Target-URI: {url}\r\nContent-Type: application/http; msgtype=response\r\n"
+        f"Content-Length: {len(block)}\r\n\r\n"
+    ).encode()
+    return head + block + b"\r\n\r\n"
+
+
+@pytest.fixture
+def corpus_dir(tmp_path):
+    directory = tmp_path / "crawl"
+    directory.mkdir()
+    (directory / "carbonara.html").write_text(CARBONARA)
+    (directory / "notes.txt").write_text("Weeknight Dal\n\nSimmer red lentils with spices.")
+    with gzip.open(directory / "crawl.warc.gz", "wb") as f:
+        f.write(warc_record("https://recipes.test/pesto", "200 OK", "<title>Pesto</title>Basil"))
+        f.write(warc_record("https://recipes.test/gone", "404 Not Found", "<p>Missing</p>"))
+    (directory / "image.png").write_bytes(b"\x89PNG")
+    return directory
+
+
+@pytest.fixture
+def index(tmp_path):
+    return CorpusIndex(tmp_path / "corpus.db")
+
+
+def test_read_pages_extracts_text_and_canonical_url(corpus_dir):
+    (page,) = read_pages(corpus_dir / "carbonara.html")
+
+    assert page.url == "https://www.example.com/carbonara"
+    assert page.title == "Classic Carbonara"
+    assert "pecorino" in page.text
+    assert "guanciale" not in page.text
+    assert "Whisk eggs and cheese.\nToss with hot spaghetti." in page.text
+
+
+def test_build_reads_html_text_and_warc(corpus_dir, index):
+    stats = index.build(corpus_dir)
+
+    assert (stats.files, stats.pages, stats.failed) == (3, 3, 0)
+    assert [hit.url for hit in index.search("pesto", 5)] == ["https://recipes.test/pesto"]
+    assert index.search("missing", 5) == []
+    (dal,) = index.search("lentil", 5)
+    assert dal.title == "Weeknight Dal"
+    assert dal.url.startswith("file://")
+
+
+def test_search_ranks_title_matches_and_excludes_domains(tmp_path, index):
+    (tmp_path / "a.html").write_text(
+        "<title>Carbonara</title><link rel=canonical href=https://a.test/1>"
+        "<p>Spaghetti with eggs</p>"
+    )
+    (tmp_path / "b.html").write_text(
+        "<title>Pasta night</title><link rel=canonical href=https://www.b.test/2>"
+        "<p>Not a carbonara, but close</p>"
+    )
+    index.build(tmp_path)
+
+    hits = index.search('Carbonara "recipe" AND', 5)
+    assert [hit.url for hit in hits] == ["https://a.test/1", "https://www.b.test/2"]
+    assert hits[0].score == 1.0 > hits[1].score
+
+    hits = index.search("carbonara", 5, exclude_domains=["a.test"])
+    assert [hit.url for hit in hits] == ["https://www.b.test/2"]
+    assert [hit.url for hit in index.search("carbonara", 5, exclude_domains=["b.test"])] == [
+        "https://a.test/1"
+    ]
+
+
+def test_reindex_skips_unchanged_and_drops_deleted_files(corpus_dir, index):
+    index.build(corpus_dir)
+
+    (corpus_dir / "notes.txt").unlink()
+    carbonara = corpus_dir / "carbonara.html"
+    carbonara.write_text(CARBONARA.replace("Classic Carbonara", "Roman Carbonara"))
+    os.utime(carbonara, ns=(0, 1))
+    stats = index.build(corpus_dir)
+
+    assert (stats.files, stats.unchanged, stats.removed) == (1, 1, 1)
+    assert index.page_count() == 2
+    assert index.search("lentil", 5) == []
+    assert [hit.title for hit in index.search("carbonara", 5)] == ["Roman Carbonara"]
+
+    assert index.build(corpus_dir, rebuild=True).pages == 2
+
+
+def test_local_provider_requires_an_index(corpus_dir, index, monkeypatch):
+    with pytest.raises(ValueError, match="uncluttered index"):
+        LocalSearchProvider(index)
+
+    index.build(corpus_dir)
+    provider = LocalSearchProvider(index)
+    hits = provider.search("pesto basil", max_results=3)
+    assert hits[0].url == "https://recipes.test/pesto"
+
+    monkeypatch.setattr(corpus, "SNIPPET_WORDS", 4)
+    (hit,) = provider.search("spaghetti", max_results=3, include_content=False)
+    assert "spaghetti" in hit.content
+    assert "Whisk" not in hit.content
+    assert provider.fetch([hit.url, "https://missing.test/"]) == {
+        hit.url: next(read_pages(corpus_dir / "carbonara.html")).text
+    }
+
+
+def test_unknown_provider():
+    with pytest.raises(ValueError, match="Unknown SEARCH_PROVIDER"):
+        create_search_provider("bing")
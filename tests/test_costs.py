@@ -0,0 +1,56 @@
+"""Tests for token pricing and extraction summaries."""
+
+from datetime import datetime
+
+import pytest
+
+from uncluttered.core.costs import estimate_cost, percentile, summarize_extractions
+from uncluttered.core.models import ExtractionRecord, Usage
+
+
+def make_record(latency_ms: int, day: int = 1, model="gpt-4o-mini", outcome="ok"):
+    return ExtractionRecord(
+        id=latency_ms,
+        created_at=datetime(2025, 1, day, 12),
+        provider="openai",
+        model=model,
+        usage=Usage(input_tokens=1_000_000, cached_tokens=500_000, output_tokens=100_000),
+        latency_ms=latency_ms,
+        outcome=outcome,
+    )
+
+
+class TestEstimateCost:
+    def test_cached_tokens_billed_at_cached_price(self):
+        usage = Usage(input_tokens=1_000_000, cached_tokens=500_000, output_tokens=100_000)
+        # 0.5M * 0.15 + 0.5M * 0.075 + 0.1M * 0.60
+        assert estimate_cost("openai", "gpt-4o-mini", usage) == pytest.approx(0.1725)
+
+    def test_unknown_model_and_local(self):
+        assert estimate_cost("openai", "unknown-model", Usage()) is None
+        assert estimate_cost("ollama", "llama3.1", Usage(input_tokens=10)) == 0.0
+
+    def test_env_override(self, monkeypatch):
+        monkeypatch.setenv("LLM_PRICES", "my-model=1/0.5/2")
+        usage = Usage(input_tokens=1_000_000, output_tokens=1_000_000)
+        assert estimate_cost("openai", "my-model", usage) == pytest.approx(3.0)
+
+
+class TestSummaries:
+    def test_percentile(self):
+        values = list(range(1, 101))
+        assert percentile(values, 50) == 50
+        assert percentile(values, 99) == 99
+        assert percentile([], 50) is None
+
+    def test_daily_windows(self):
+        records = [make_record(100), make_record(300, outcome="error"), make_record(200, day=2)]
+        first, second = summarize_extractions(records, daily=True)
+        assert (first.window, first.calls, first.failed) == ("2025-01-01", 2, 1)
+        assert first.latency_percentile(50) == 100
+        assert first.cost == pytest.approx(0.345)
+        assert second.window == "2025-01-02"
+
+    def test_unknown_price_makes_cost_unknown(self):
+        [summary] = summarize_extractions([make_record(100, model="unknown-model")])
+        assert summary.cost is None
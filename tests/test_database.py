@@ -0,0 +1,295 @@
+"""Tests for the SQLite database layer."""
+
+import threading
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from uncluttered.core import database
+from uncluttered.core.models import ExtractionCall, Usage
+from uncluttered.core.utils import query_key
+
+from .conftest import make_recipe
+
+pytestmark = pytest.mark.usefixtures("temp_db")
+
+
+class TestCanonicalUrlLinking:
+    def test_same_page_is_linked_not_duplicated(self):
+        first = database.add_recipe(make_recipe())
+        second = database.add_recipe(
+            make_recipe(url="http://www.example.com/carbonara/", term="spaghetti carbonara")
+        )
+
+        assert second.id == first.id
+        assert len(database.get_recipes_by_search_term("carbonara")) == 1
+        assert len(database.get_recipes_by_search_term("Spaghetti Carbonara")) == 1
+
+    def test_lookup_by_source_url(self):
+        saved = database.add_recipe(make_recipe())
+        found = database.get_recipes_by_source_urls(["https://m.example.com/carbonara?utm_x=1"])
+        assert [r.id for r in found.values()] == [saved.id]
+
+    def test_delete_by_search_term_keeps_recipes_linked_elsewhere(self):
+        saved = database.add_recipe(make_recipe())
+        database.link_recipe_to_search_term(saved.id, "pasta")
+
+        assert database.delete_recipes_by_search_term("carbonara") == 1
+        assert database.get_recipe(saved.id) is not None
+        assert database.get_recipes_by_search_term("carbonara") == []
+
+        assert database.delete_recipes_by_search_term("pasta") == 1
+        assert database.get_recipe(saved.id) is None
+
+    def test_search_term_counts(self):
+        database.add_recipe(make_recipe())
+        database.add_recipe(make_recipe(title="Cacio", url="https://example.com/cacio"))
+        assert database.get_search_term_counts() == [("carbonara", 2)]
+
+
+class TestSlugAllocation:
+    def test_suffixes_allocated_in_order(self):
+        slugs = [
+            database.add_recipe(make_recipe(url=f"https://example.com/{i}")).slug for i in range(3)
+        ]
+        assert slugs == ["carbonara", "carbonara-2", "carbonara-3"]
+
+    def test_existing_suffixed_slugs_skipped(self):
+        database.add_recipe(make_recipe(title="Carbonara-2", url="https://example.com/a"))
+        database.add_recipe(make_recipe(url="https://example.com/b"))
+        saved = database.add_recipe(make_recipe(url="https://example.com/c"))
+        assert saved.slug == "carbonara-3"
+
+    def test_parallel_inserts_get_unique_slugs(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            saved = list(
+                pool.map(
+                    lambda i: database.add_recipe(make_recipe(url=f"https://example.com/{i}")),
+                    range(16),
+                )
+            )
+        assert len({r.slug for r in saved}) == 16
+
+
+class TestSearchTermSummary:
+    def test_summary_tracks_writes(self):
+        database.add_recipe(make_recipe(score=60))
+        database.add_recipe(make_recipe(title="Cacio", url="https://example.com/cacio", score=90))
+        assert database.get_search_term_counts() == [("carbonara", 2)]
+        assert database.check_search_term_summary() == []
+
+        database.delete_recipe_by_slug("cacio")
+        assert database.get_search_term_counts() == [("carbonara", 1)]
+
+        database.delete_recipes_by_search_term("carbonara")
+        assert database.get_search_term_counts() == []
+        assert database.check_search_term_summary() == []
+
+    def test_check_detects_and_rebuild_fixes_drift(self):
+        database.add_recipe(make_recipe())
+        with database._get_session() as session:
+            session.query(database.SearchTermSummaryTable).delete()
+            session.commit()
+
+        assert database.check_search_term_summary() == ['"carbonara": missing from summary']
+        assert database.rebuild_search_term_summary() == 1
+        assert database.check_search_term_summary() == []
+
+    def test_check_detects_outdated_query_keys(self):
+        database.add_recipe(make_recipe())
+        with database._get_session() as session:
+            session.query(database.SearchTermSummaryTable).update({"query_key": "old"})
+            session.commit()
+
+        assert database.check_search_term_summary() == ['"carbonara": outdated query key']
+        database.rebuild_search_term_summary()
+        assert database.check_search_term_summary() == []
+
+
+class TestQueryKeyLookup:
+    def test_matches_other_spellings_of_saved_terms(self):
+        database.add_recipe(make_recipe(term="chocolate chip cookie", score=90))
+        database.add_recipe(
+            make_recipe(title="Cookies", url="https://example.com/c", term="cookies chocolate-chip")
+        )
+        database.link_recipe_to_search_term(1, "cookies chocolate-chip")
+        database.add_recipe(make_recipe(title="Low", url="https://example.com/l", score=40))
+
+        key = query_key("Chocolate-chip cookies")
+        assert [r.title for r in database.get_recipes_by_query_key(key)] == [
+            "Carbonara",
+            "Cookies",
+        ]
+        assert [r.title for r in database.get_recipes_by_query_key(key, limit=1)] == ["Carbonara"]
+        assert database.get_recipes_by_query_key(key, min_trust_score=85)[0].title == "Carbonara"
+        assert database.get_recipes_by_query_key(query_key("brownies")) == []
+
+    def test_existing_summary_gets_query_keys(self):
+        database.add_recipe(make_recipe(term="Carbonaras"))
+        with database._get_engine().begin() as conn:
+            conn.execute(database.text("DROP INDEX ix_search_term_summary_query_key"))
+            conn.execute(database.text("ALTER TABLE search_term_summary DROP COLUMN query_key"))
+
+        database.create_tables()
+
+        assert database.check_search_term_summary() == []
+        assert len(database.get_recipes_by_query_key(query_key("carbonara"))) == 1
+
+
+class TestStaleRecipes:
+    def test_unfetched_and_old_recipes_are_stale(self):
+        database.add_recipe(make_recipe(), content_hash="a" * 64)
+        database.add_recipe(make_recipe(title="Cacio", url="https://example.com/cacio"))
+        database.add_recipe(make_recipe(title="Notes", url=None))
+        with database._get_session() as session:
+            session.query(database.RecipeTable).filter(database.RecipeTable.id == 2).update(
+                {"fetched_at": None}
+            )
+            session.commit()
+
+        now = datetime.now(UTC).replace(tzinfo=None)
+        stale = database.get_stale_recipes(now + timedelta(minutes=1))
+        assert [(r.title, digest) for r, digest in stale] == [
+            ("Cacio", None),
+            ("Carbonara", "a" * 64),
+        ]
+        assert [r.title for r, _ in database.get_stale_recipes(now - timedelta(days=1))] == [
+            "Cacio"
+        ]
+        assert database.get_stale_recipes(now + timedelta(minutes=1), slug="notes") == []
+
+        database.mark_recipes_fetched([2])
+        assert database.get_stale_recipes(now - timedelta(days=1)) == []
+
+    def test_existing_databases_get_the_column(self):
+        database.add_recipe(make_recipe())
+        with database._get_engine().begin() as conn:
+            conn.execute(database.text("DROP INDEX ix_recipes_fetched_at"))
+            conn.execute(database.text("ALTER TABLE recipes DROP COLUMN fetched_at"))
+
+        database.create_tables()
+
+        assert len(database.get_stale_recipes(datetime.now(UTC).replace(tzinfo=None))) == 1
+
+
+class TestPagination:
+    def add_recipes(self):
+        scores = [70, None, 90, 70, 50, None, 90]
+        for i, score in enumerate(scores):
+            recipe = make_recipe(title=f"R{i}", url=f"https://example.com/{i}", score=score or 0)
+            if score is None:
+                recipe.trust_score = None
+            database.add_recipe(recipe)
+        database.add_recipe(make_recipe(title="Other", url="https://example.com/o", term="soup"))
+
+    def test_pages_cover_every_recipe_once_in_order(self):
+        self.add_recipes()
+        titles, cursor, more = [], None, True
+        while more:
+            page, more = database.get_recipes_page("carbonara", page_size=3, after=cursor)
+            assert len(page) <= 3
+            titles += [recipe.title for recipe in page]
+            last = page[-1]
+            cursor = (last.trust_score.score if last.trust_score else None, last.id)
+
+        # Highest score first, newest first on ties, unscored last
+        assert titles == ["R6", "R2", "R3", "R0", "R4", "R5", "R1"]
+        assert database.count_recipes("Carbonara") == 7
+
+    def test_all_recipes_and_end_of_list(self):
+        self.add_recipes()
+        page, more = database.get_recipes_page(page_size=8)
+        assert len(page) == 8 and not more
+
+        page, more = database.get_recipes_page(page_size=8, after=(None, 2))
+        assert page == [] and not more
+
+    def test_seeks_the_trust_score_index(self):
+        with database._get_engine().connect() as conn:
+            plan = conn.exec_driver_sql(
+                "EXPLAIN QUERY PLAN SELECT id FROM recipes WHERE trust_score IS NOT NULL "
+                "AND (trust_score, id) < (80, 5) ORDER BY trust_score DESC, id DESC LIMIT 21"
+            ).all()
+        assert "ix_recipes_trust_score_id" in str(plan)
+        assert "TEMP B-TREE" not in str(plan)
+
+
+class TestExtractionLog:
+    def test_recipe_links_to_its_extraction(self):
+        usage = Usage(input_tokens=1200, output_tokens=300, cached_tokens=200, requests=1)
+        call = ExtractionCall(
+            provider="gemini",
+            model="gemini-2.0-flash",
+            usage=usage,
+            latency_ms=850,
+            outcome="ok",
+            metrics=["parse_ok"],
+        )
+        extraction_id = database.log_extraction(call).result()
+        recipe = make_recipe()
+        recipe.extraction_id = extraction_id
+
+        saved = database.add_recipe(recipe)
+        assert database.get_recipe(saved.id).extraction_id == extraction_id
+
+        [record] = database.get_extraction_records()
+        assert record.id == extraction_id
+        assert record.usage == usage
+        assert record.latency_ms == 850
+        assert database.get_provider_stats()[("gemini", "gemini-2.0-flash")] == {"parse_ok": 1}
+
+    def test_since_filters_old_records(self):
+        call = ExtractionCall(
+            provider="gemini", model="gemini-2.0-flash", usage=Usage(), latency_ms=100, outcome="ok"
+        )
+        database.log_extraction(call).result()
+        future = datetime.now(UTC).replace(tzinfo=None) + timedelta(minutes=1)
+        assert database.get_extraction_records(since=future) == []
+
+
+class TestConcurrentWrites:
+    def test_wal_enabled(self):
+        with database._get_engine().connect() as conn:
+            assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+
+    def test_concurrent_increments_are_all_applied(self):
+        def worker():
+            for _ in range(25):
+                database.increment_provider_stat("gemini", "flash", "parse_ok")
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert database.get_provider_stats()[("gemini", "flash")]["parse_ok"] == 200
+
+    def test_failed_write_does_not_discard_grouped_writes(self):
+        def fail(session):
+            raise RuntimeError("bad write")
+
+        def add(i):
+            recipe = make_recipe(title=f"Dish {i}", url=f"https://example.com/{i}")
+            return lambda session: database._add_recipe(session, recipe, None)[0]
+
+        writes = {"bad": fail, **{i: add(i) for i in range(5)}}
+        results = {}
+
+        def submit(name):
+            try:
+                results[name] = database._writer.submit(writes[name])
+            except RuntimeError as e:
+                results[name] = e
+
+        threads = [threading.Thread(target=submit, args=(name,)) for name in writes]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert isinstance(results.pop("bad"), RuntimeError)
+        assert sorted(r.title for r in results.values()) == [f"Dish {i}" for i in range(5)]
+        assert len(database.get_all_recipes()) == 5
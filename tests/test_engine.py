@@ -0,0 +1,271 @@
+"""Tests for the extraction pipeline orchestration."""
+
+import threading
+import time
+from concurrent.futures import Future
+
+import pytest
+
+from uncluttered.core import engine
+from uncluttered.core.archive import content_hash
+from uncluttered.core.models import ExtractionCall, Usage
+from uncluttered.core.resilience import Deadline, DeadlineExceeded
+
+from .conftest import make_recipe
+
+
+class TestPlanPacks:
+    def test_disabled_by_default(self, monkeypatch):
+        monkeypatch.delenv("PACK_TOKEN_BUDGET", raising=False)
+        assert engine._plan_packs(["a", "b"]) == []
+
+    def test_packs_short_contexts_within_budget(self, monkeypatch):
+        monkeypatch.setenv("PACK_TOKEN_BUDGET", "100")
+        contexts = ["x" * 120, "x" * 120, "x" * 1000, "x" * 120, "x" * 120]
+        # ~31 tokens each; three fit in 100, the 251-token context is extracted alone
+        assert engine._plan_packs(contexts) == [[0, 1, 3]]
+
+    def test_pack_size_capped(self, monkeypatch):
+        monkeypatch.setenv("PACK_TOKEN_BUDGET", "10000")
+        packs = engine._plan_packs(["short"] * 10)
+        assert [len(pack) for pack in packs] == [4, 4, 2]
+
+
+class TestExtractAll:
+    @pytest.fixture(autouse=True)
+    def enable_packing(self, monkeypatch):
+        monkeypatch.setenv("PACK_TOKEN_BUDGET", "10000")
+
+    def test_missing_packed_sources_fall_back_to_single_calls(self, monkeypatch):
+        singles = []
+
+        def extract_single(context, deadline=None, record=None):
+            singles.append(context)
+            return make_recipe(context)
+
+        monkeypatch.setattr(
+            engine,
+            "extract_recipes_packed",
+            lambda contexts, deadline=None, record=None: [
+                make_recipe("packed"),
+                None,
+                make_recipe("packed"),
+            ],
+        )
+        monkeypatch.setattr(engine, "extract_recipe", extract_single)
+
+        outcomes = engine._extract_all([("a", "A"), ("b", "B"), ("c", "C")])
+
+        assert [e.outcome.title for e in outcomes] == ["packed", "B", "packed"]
+        assert singles == ["B"]
+
+    def test_failed_pack_falls_back_entirely(self, monkeypatch):
+        def fail(contexts, deadline=None, record=None):
+            raise ValueError("invalid packed response")
+
+        monkeypatch.setattr(engine, "extract_recipes_packed", fail)
+        monkeypatch.setattr(
+            engine,
+            "extract_recipe",
+            lambda context, deadline=None, record=None: make_recipe(context),
+        )
+
+        outcomes = engine._extract_all([("a", "A"), ("b", "B")])
+        assert [e.outcome.title for e in outcomes] == ["A", "B"]
+
+    def test_single_failures_are_returned(self, monkeypatch):
+        monkeypatch.delenv("PACK_TOKEN_BUDGET")
+
+        def fail(context, deadline=None, record=None):
+            raise ValueError("no recipe")
+
+        monkeypatch.setattr(engine, "extract_recipe", fail)
+        [extraction] = engine._extract_all([("a", "A")])
+        assert isinstance(extraction.outcome, ValueError)
+
+    def test_expired_deadline_skips_remaining_sources(self, monkeypatch):
+        monkeypatch.delenv("PACK_TOKEN_BUDGET")
+        monkeypatch.setattr(
+            engine, "extract_recipe", lambda context, deadline=None, record=None: 1 / 0
+        )
+
+        [extraction] = engine._extract_all([("a", "A")], Deadline(0))
+        assert isinstance(extraction.outcome, DeadlineExceeded)
+
+    def test_concurrent_singles_keep_source_order(self, monkeypatch):
+        monkeypatch.delenv("PACK_TOKEN_BUDGET")
+        monkeypatch.setenv("EXTRACTION_CONCURRENCY", "3")
+        monkeypatch.setattr(
+            engine,
+            "extract_recipe",
+            lambda context, deadline=None, record=None: make_recipe(context),
+        )
+
+        outcomes = engine._extract_all([(key, key.upper()) for key in "abcde"])
+        assert [e.outcome.title for e in outcomes] == list("ABCDE")
+
+    def test_packing_skips_sources_another_query_is_extracting(self, monkeypatch):
+        packed_contexts = []
+
+        def extract_packed(contexts, deadline=None, record=None):
+            packed_contexts.append(contexts)
+            return [make_recipe(context) for context in contexts]
+
+        monkeypatch.setattr(engine, "extract_recipes_packed", extract_packed)
+        monkeypatch.setattr(engine, "extract_recipe", lambda *args, **kwargs: 1 / 0)
+
+        # Another query is already extracting "b"
+        assert engine._source_flight.claim("b")
+        results = []
+        worker = threading.Thread(
+            target=lambda: results.extend(engine._extract_all([("a", "A"), ("b", "B"), ("c", "C")]))
+        )
+        worker.start()
+        time.sleep(0.05)
+        engine._source_flight.resolve("b", engine._Extraction(make_recipe("shared")))
+        worker.join()
+
+        assert packed_contexts == [["A", "C"]]
+        assert [e.outcome.title for e in results] == ["A", "shared", "C"]
+
+
+class TestExtractionLog:
+    CALL = ExtractionCall(
+        provider="fake", model="m", usage=Usage(requests=1), latency_ms=5, outcome="ok"
+    )
+
+    def extract(self, monkeypatch, log):
+        def extract_single(context, deadline=None, record=None):
+            record(self.CALL)
+            return make_recipe(context)
+
+        logged = []
+        monkeypatch.setattr(engine, "extract_recipe", extract_single)
+        monkeypatch.setattr(engine, "log_extraction", lambda call: logged.append(call) or log)
+        [extraction] = engine._extract_all([("a", "A")])
+        assert logged == [self.CALL]
+        return extraction
+
+    def test_recipe_carries_its_log_id(self, monkeypatch):
+        log = Future()
+        log.set_result(7)
+        extraction = self.extract(monkeypatch, log)
+        assert extraction.call == self.CALL
+        assert extraction.tagged().extraction_id == 7
+
+    def test_failed_log_write_keeps_the_recipe(self, monkeypatch):
+        log = Future()
+        log.set_exception(RuntimeError("database is locked"))
+        recipe = self.extract(monkeypatch, log).tagged()
+        assert recipe.title == "A"
+        assert recipe.extraction_id is None
+
+
+class TestOfflineFirst:
+    @pytest.fixture
+    def library(self, monkeypatch):
+        calls = []
+
+        def lookup(key, min_trust_score=None, limit=None):
+            calls.append((key, min_trust_score, limit))
+            return [make_recipe(f"Cookie {i}") for i in range(2)][:limit]
+
+        monkeypatch.setattr(engine, "get_recipes_by_query_key", lookup)
+        monkeypatch.setattr(engine, "_run_pipeline", lambda *args: [make_recipe("Fresh")])
+        return calls
+
+    def test_serves_saved_recipes_when_covered(self, library, monkeypatch):
+        monkeypatch.setenv("OFFLINE_MIN_TRUST", "60")
+        seen = []
+        result = engine.process_query(
+            "Chocolate-chip cookies", display_count=2, offline_first=True, on_recipe=seen.append
+        )
+
+        assert result.from_library
+        assert [r.title for r in result.recipes] == ["Cookie 0", "Cookie 1"]
+        assert seen == result.recipes
+        assert library == [("chip chocolate cooky", 60, 2)]
+
+    def test_searches_when_coverage_is_too_low(self, library):
+        result = engine.process_query("cookies", display_count=3, offline_first=True)
+        assert not result.from_library
+        assert [r.title for r in result.recipes] == ["Fresh"]
+
+    def test_off_unless_enabled(self, library, monkeypatch):
+        def first(**kwargs):
+            return engine.process_query("cookies", display_count=1, **kwargs).recipes[0].title
+
+        assert first() == "Fresh"
+        assert library == []
+
+        monkeypatch.setenv("OFFLINE_FIRST", "1")
+        assert first() == "Cookie 0"
+        assert first(offline_first=False) == "Fresh"
+
+
+class TestRefreshRecipes:
+    def test_only_changed_pages_are_extracted(self, monkeypatch):
+        from uncluttered.core.search import preprocess_pages
+        from uncluttered.core.search_providers.base import FetchingSearchProvider
+
+        pages = {
+            "https://a.test/same": "Unchanged page",
+            "https://b.test/new": "Edited page",
+            "https://c.test/empty": "",
+            "https://e.test/failing": "Broken page",
+        }
+
+        class Provider(FetchingSearchProvider):
+            name = "fake"
+
+            def search(self, *args, **kwargs):
+                return []
+
+            def fetch(self, urls, timeout=None):
+                return {url: pages[url] for url in urls if url in pages}
+
+        def saved(recipe_id, url, page=None):
+            recipe = make_recipe(f"Recipe {recipe_id}").model_copy(
+                update={"id": recipe_id, "source_url": url, "slug": f"recipe-{recipe_id}"}
+            )
+            return recipe, preprocess_pages([page])[0][1] if page else None
+
+        stale = [
+            saved(1, "https://a.test/same", "Unchanged page"),
+            saved(2, "https://b.test/new", "Old page"),
+            saved(3, "https://c.test/empty", "Old page"),
+            saved(4, "https://d.test/gone", "Old page"),
+            saved(5, "https://e.test/failing", "Old page"),
+        ]
+        extracted, updated, marked = [], [], []
+
+        def extract(context, deadline=None, record=None):
+            extracted.append(context)
+            if "Broken" in context:
+                raise ValueError("no recipe found")
+            return make_recipe("Refreshed")
+
+        monkeypatch.setattr(engine, "get_search_provider", lambda: Provider())
+        monkeypatch.setattr(engine, "extract_recipe", extract)
+        monkeypatch.setattr(engine, "store_content", lambda text, digest: digest)
+        monkeypatch.setattr(
+            engine,
+            "update_recipe",
+            lambda recipe_id, recipe, content_hash=None: (
+                updated.append((recipe_id, content_hash)) or recipe
+            ),
+        )
+        monkeypatch.setattr(engine, "mark_recipes_fetched", marked.extend)
+        monkeypatch.setattr(engine, "REFRESH_BATCH_SIZE", 2)
+
+        result = engine.refresh_recipes(stale, concurrency=2)
+
+        assert (result.fetched, result.unchanged, result.unavailable) == (3, 1, 2)
+        assert len(extracted) == 2
+        assert "Edited page" in extracted[0]
+        # The hash computed while preprocessing is reused for the archive
+        assert updated == [(2, content_hash("Edited page"))]
+        assert [r.title for r in result.updated] == ["Refreshed"]
+        assert result.errors == ["recipe-5: no recipe found"]
+        # Unreachable and failed recipes stay stale so the next refresh retries them
+        assert sorted(marked) == [1, 2]
@@ -0,0 +1,130 @@
+"""Tests for the native Ollama provider against a local stub server."""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from uncluttered.core.models import Recipe
+from uncluttered.core.providers.ollama import OllamaProvider
+
+RECIPE = {
+    "title": "Pancakes",
+    "description": "Fluffy",
+    "ingredients": [{"name": "flour", "quantity": "1", "unit": "cup"}],
+    "instructions": ["Mix", "Fry"],
+    "yield": "4 servings",
+}
+
+
+class StubOllama(BaseHTTPRequestHandler):
+    """Answers /api/chat like Ollama, recording requests and peak concurrency."""
+
+    paths: list[str] = []
+    requests: list[dict] = []
+    in_flight = 0
+    peak = 0
+    delay = 0.0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        cls = type(self)
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with cls.lock:
+            cls.paths.append(self.path)
+            cls.requests.append(body)
+            cls.in_flight += 1
+            cls.peak = max(cls.peak, cls.in_flight)
+        time.sleep(cls.delay)
+        with cls.lock:
+            cls.in_flight -= 1
+
+        if self.path == "/api/generate":
+            self.send_response(200)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"{}")
+            return
+        if body["model"] != "llama3.1":
+            self.send_response(404)
+            self.end_headers()
+            return
+        payload = json.dumps(
+            {
+                "message": {"role": "assistant", "content": json.dumps(RECIPE)},
+                "done": True,
+                "prompt_eval_count": 120,
+                "eval_count": 40,
+            }
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    StubOllama.paths, StubOllama.requests = [], []
+    StubOllama.in_flight, StubOllama.peak = 0, 0
+    StubOllama.delay = 0.0
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), StubOllama)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_native_request_uses_schema_format_and_keep_alive(server, monkeypatch):
+    monkeypatch.setenv("OLLAMA_NUM_CTX", "8192")
+    monkeypatch.setenv("OLLAMA_KEEP_ALIVE", "1h")
+    provider = OllamaProvider(model="llama3.1", base_url=f"{server}/v1")
+
+    recipe = provider.extract_recipe("Extract the recipe.", "page text")
+
+    assert recipe.title == "Pancakes"
+    [request] = StubOllama.requests
+    assert request["format"] == Recipe.model_json_schema()
+    assert request["keep_alive"] == "1h"
+    assert request["stream"] is False
+    assert request["options"]["num_ctx"] == 8192
+    assert "num_predict" not in request["options"]
+    # The schema is enforced by `format`, not pasted into the prompt
+    assert "properties" not in request["messages"][0]["content"]
+
+
+def test_concurrency_limited_to_parallel_slots(server):
+    StubOllama.delay = 0.05
+    provider = OllamaProvider(model="llama3.1", base_url=server, num_parallel=2)
+
+    threads = [
+        threading.Thread(target=provider.extract_recipe, args=("system", "page")) for _ in range(6)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(StubOllama.requests) == 6
+    assert StubOllama.peak <= 2
+
+
+def test_missing_model(server):
+    provider = OllamaProvider(model="missing", base_url=server)
+    with pytest.raises(RuntimeError, match="ollama pull missing"):
+        provider.extract_recipe("system", "page")
+
+
+def test_warm_up_loads_model(server):
+    provider = OllamaProvider(model="llama3.1", base_url=server)
+    provider.warm_up()
+
+    assert StubOllama.paths == ["/api/generate"]
+    assert StubOllama.requests == [{"model": "llama3.1", "keep_alive": "30m"}]
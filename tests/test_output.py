@@ -0,0 +1,46 @@
+"""Tests for machine-readable CLI output."""
+
+import io
+import json
+import subprocess
+import sys
+
+from uncluttered.cli.output import OutputFormat, RecordWriter
+
+
+def test_ndjson_writes_one_object_per_line():
+    stream = io.StringIO()
+    with RecordWriter(OutputFormat.NDJSON, stream) as out:
+        out.write({"title": "Crème brûlée"})
+        # Each record is complete as soon as it is written
+        assert stream.getvalue() == '{"title": "Crème brûlée"}\n'
+        out.write({"title": "Flan"})
+
+    assert [json.loads(line) for line in stream.getvalue().splitlines()] == [
+        {"title": "Crème brûlée"},
+        {"title": "Flan"},
+    ]
+
+
+def test_json_streams_a_single_array():
+    stream = io.StringIO()
+    with RecordWriter(OutputFormat.JSON, stream) as out:
+        out.write({"a": 1})
+        out.write({"a": 2})
+    assert json.loads(stream.getvalue()) == [{"a": 1}, {"a": 2}]
+
+    empty = io.StringIO()
+    with RecordWriter(OutputFormat.JSON, empty):
+        pass
+    assert json.loads(empty.getvalue()) == []
+
+
+def test_cli_import_does_not_load_rich():
+    code = (
+        "import sys, uncluttered.cli.main; "
+        "print(any(name.split('.')[0] == 'rich' for name in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == "False"
@@ -0,0 +1,115 @@
+"""Tests for local repair of malformed LLM output."""
+
+import pytest
+
+from uncluttered.core.models import PackedRecipes, Recipe, Usage
+from uncluttered.core.providers.base import LLMProvider
+from uncluttered.core.repair import parse_lenient, repair
+from uncluttered.core.resilience import DeadlineExceeded
+
+VALID = (
+    '{"title": "Pancakes", "description": "Fluffy", '
+    '"ingredients": [{"name": "flour", "quantity": "1", "unit": "cup"}], '
+    '"instructions": ["Mix", "Fry"], "yield": "4 servings"}'
+)
+
+
+class TestParseLenient:
+    def test_fences_prose_and_trailing_commas(self):
+        raw = 'Here you go:\n```json\n{"a": [1, 2,], "b": {"c": "x, y",},}\n```\nEnjoy!'
+        assert parse_lenient(raw) == {"a": [1, 2], "b": {"c": "x, y"}}
+
+    def test_truncated_array_and_string(self):
+        assert parse_lenient('{"a": [1, 2, 3') == {"a": [1, 2, 3]}
+        assert parse_lenient('{"a": "unfinish') == {"a": "unfinish"}
+
+    def test_truncated_key_drops_partial_member(self):
+        assert parse_lenient('{"a": 1, "b": {"x": ') == {"a": 1}
+
+    def test_unrepairable(self):
+        with pytest.raises(ValueError):
+            parse_lenient("no json here")
+
+
+class TestRepair:
+    def test_near_miss_fields(self):
+        raw = (
+            '{"title": "Pancakes", "description": null, '
+            '"ingredients": [{"name": "egg", "quantity": 2}, "salt"], '
+            '"instructions": "Mix\\nFry", "servings": 4, "prep_time": 10,}'
+        )
+        recipe = repair(raw, Recipe)
+        assert recipe.serving_yield == "4"
+        assert [i.quantity for i in recipe.ingredients] == ["2", ""]
+        assert recipe.instructions == ["Mix", "Fry"]
+        assert recipe.prep_time == "10"
+
+    def test_nested_recipes(self):
+        raw = (
+            '{"recipes": [{"source_index": 1, "recipe": {"title": "T", "description": "d", '
+            '"ingredients": [], "instructions": [{"step": 1, "text": "Go"}], "yield": 2}}]}'
+        )
+        [packed] = repair(raw, PackedRecipes).recipes
+        assert packed.recipe.instructions == ["Go"]
+        assert packed.recipe.serving_yield == "2"
+
+
+class ScriptedProvider(LLMProvider):
+    name = "scripted"
+
+    def __init__(self, outputs: list[str]):
+        self._model = "test"
+        self.outputs = outputs
+        self.prompts: list[str] = []
+
+    def _complete(self, system_prompt, context, response_model, deadline=None):
+        self.prompts.append(context)
+        return self.outputs.pop(0), Usage(input_tokens=100, output_tokens=10, requests=1)
+
+
+class TestProviderRepair:
+    def extract(self, provider):
+        calls = []
+        try:
+            return provider.extract_recipe("system", "page", record=calls.append)
+        finally:
+            self.calls = calls
+
+    def test_valid_output(self):
+        assert self.extract(ScriptedProvider([VALID])).title == "Pancakes"
+        [call] = self.calls
+        assert (call.provider, call.model, call.outcome) == ("scripted", "test", "ok")
+        assert call.metrics == ["parse_ok"]
+        assert call.usage.requests == 1
+
+    def test_local_repair(self):
+        assert self.extract(ScriptedProvider([VALID[:-1] + ","])).title == "Pancakes"
+        assert self.calls[0].metrics == ["repair_local"]
+
+    def test_followup_sends_errors_not_page(self):
+        provider = ScriptedProvider(['{"title": "Pancakes"}', VALID])
+        assert self.extract(provider).title == "Pancakes"
+        assert self.calls[0].metrics == ["repair_followup"]
+        assert self.calls[0].usage.requests == 2
+        assert "ingredients" in provider.prompts[1]
+        assert "page" not in provider.prompts[1]
+
+    def test_deadline_does_not_trip_breaker(self, monkeypatch):
+        monkeypatch.setenv("CIRCUIT_FAILURE_THRESHOLD", "2")
+        provider = ScriptedProvider([])
+
+        def timed_out(*args, **kwargs):
+            raise DeadlineExceeded("Deadline of 1s exceeded")
+
+        monkeypatch.setattr(provider, "_complete", timed_out)
+        for _ in range(3):
+            with pytest.raises(DeadlineExceeded):
+                self.extract(provider)
+        assert not provider.breaker.is_open
+        assert self.calls[0].outcome == "timeout"
+
+    def test_failed_repair_raises_value_error(self):
+        provider = ScriptedProvider(['{"title": "Pancakes"}', '{"title": "Pancakes"}'])
+        with pytest.raises(ValueError):
+            self.extract(provider)
+        assert (self.calls[0].outcome, self.calls[0].metrics) == ("invalid", ["repair_failed"])
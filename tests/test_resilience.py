@@ -0,0 +1,91 @@
+"""Tests for deadlines and the provider circuit breaker."""
+
+import pytest
+
+from uncluttered.core import resilience
+from uncluttered.core.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    Deadline,
+    DeadlineExceeded,
+    timeout_kwargs,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(resilience.time, "monotonic", fake)
+    return fake
+
+
+class TestDeadline:
+    def test_unbounded(self):
+        deadline = Deadline()
+        assert deadline.remaining() is None
+        assert not deadline.expired
+        assert timeout_kwargs(deadline) == {}
+
+    def test_expires(self, clock):
+        deadline = Deadline(10)
+        assert deadline.remaining() == 10
+        assert timeout_kwargs(deadline) == {"timeout": 10}
+        clock.now += 11
+        assert deadline.remaining() == 0
+        assert deadline.expired
+        with pytest.raises(DeadlineExceeded):
+            deadline.check()
+
+
+class TestCircuitBreaker:
+    def test_opens_after_threshold(self, clock):
+        breaker = CircuitBreaker(failure_threshold=2, cooldown=30)
+        breaker.record_failure()
+        breaker.before_call()
+        breaker.record_failure()
+        assert breaker.is_open
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+
+    def test_success_resets_failure_count(self, clock):
+        breaker = CircuitBreaker(failure_threshold=2, cooldown=30)
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        assert not breaker.is_open
+
+    def test_half_open_trial(self, clock):
+        breaker = CircuitBreaker(failure_threshold=1, cooldown=30)
+        breaker.record_failure()
+        clock.now += 31
+        breaker.before_call()
+        # Only one trial call at a time
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+        breaker.record_failure()
+        assert breaker.is_open
+
+        clock.now += 31
+        breaker.before_call()
+        breaker.record_success()
+        assert not breaker.is_open
+        breaker.before_call()
+
+    def test_abandoned_trial_neither_counts_nor_blocks(self, clock):
+        breaker = CircuitBreaker(failure_threshold=1, cooldown=30)
+        breaker.record_failure()
+        clock.now += 31
+        breaker.before_call()
+        breaker.record_abandoned()
+        # The next call is let through as a new trial instead of being rejected
+        breaker.before_call()
+        breaker.record_success()
+        assert not breaker.is_open
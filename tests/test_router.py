@@ -0,0 +1,98 @@
+"""Tests for latency-aware provider routing."""
+
+import pytest
+
+from uncluttered.core.models import Usage
+from uncluttered.core.providers.base import LLMProvider
+from uncluttered.core.providers.router import RouterProvider, parse_routes
+
+
+class FakeProvider(LLMProvider):
+    name = "fake"
+
+    def __init__(self, model: str, error: Exception | None = None):
+        self._model = model
+        self.error = error
+        self.calls = 0
+
+    def _complete(self, system_prompt, context, response_model, deadline=None):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        output = {
+            "title": self._model,
+            "description": "A test",
+            "ingredients": [{"name": "flour", "quantity": "1", "unit": "cup"}],
+            "instructions": ["Mix"],
+            "yield": "2 servings",
+        }
+        return output, Usage(requests=1)
+
+
+class TestParseRoutes:
+    def test_entries(self):
+        assert parse_routes("gemini, openai:gpt-4o-mini@1.5") == [
+            ("gemini", None, 1.0),
+            ("openai", "gpt-4o-mini", 1.5),
+        ]
+
+    def test_empty(self):
+        with pytest.raises(ValueError):
+            parse_routes(" , ")
+
+    def test_bad_weight(self):
+        with pytest.raises(ValueError):
+            parse_routes("gemini@fast")
+
+
+class TestRouterProvider:
+    def test_prefers_lower_expected_latency(self):
+        slow, fast = FakeProvider("slow"), FakeProvider("fast")
+        provider = RouterProvider([(slow, 1.0), (fast, 1.0)])
+        provider.routes[0].latency = 5.0
+        provider.routes[1].latency = 1.0
+
+        assert provider.extract_recipe("system", "context").title == "fast"
+
+    def test_weight_and_rate_limit_penalize(self):
+        first, second = FakeProvider("first"), FakeProvider("second")
+        provider = RouterProvider([(first, 1.0), (second, 3.0)])
+        assert [r.label for r in provider.ranked_routes()] == ["fake:first", "fake:second"]
+
+        for route in provider.routes:
+            route.latency = 1.0
+        first.note_rate_limit(10)
+        assert [r.label for r in provider.ranked_routes()] == ["fake:second", "fake:first"]
+
+    def test_falls_back_and_records_errors(self):
+        broken = FakeProvider("broken", error=RuntimeError("down"))
+        backup = FakeProvider("backup")
+        provider = RouterProvider([(broken, 1.0), (backup, 1.0)])
+
+        calls = []
+        assert provider.extract_recipe("system", "context", record=calls.append).title == "backup"
+        assert provider.routes[0].error_rate > 0
+        assert provider.routes[1].latency is not None
+        # Each backend call is reported under the backend with its routing decision
+        assert [(c.model, c.outcome, c.metrics) for c in calls] == [
+            ("broken", "error", ["routed"]),
+            ("backup", "ok", ["parse_ok", "route_fallback"]),
+        ]
+
+    def test_invalid_output_falls_back(self):
+        invalid = FakeProvider("invalid", error=ValueError("unrepairable output"))
+        backup = FakeProvider("backup")
+        provider = RouterProvider([(invalid, 1.0), (backup, 1.0)])
+
+        assert provider.extract_recipe("system", "context").title == "backup"
+        # Invalid output is not counted as a backend error
+        assert provider.routes[0].error_rate == 0
+
+    def test_invalid_output_everywhere_raises_value_error(self):
+        first = FakeProvider("first", error=ValueError("no recipe"))
+        second = FakeProvider("second", error=ValueError("no recipe"))
+        provider = RouterProvider([(first, 1.0), (second, 1.0)])
+
+        with pytest.raises(ValueError):
+            provider.extract_recipe("system", "context")
+        assert (first.calls, second.calls) == (1, 1)
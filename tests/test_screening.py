@@ -0,0 +1,123 @@
+"""Tests for pre-extraction page screening."""
+
+import pytest
+from pydantic import ValidationError
+
+from uncluttered.core import screening
+from uncluttered.core.models import ExtractionCall, Recipe, Usage
+from uncluttered.core.providers.base import LLMProvider
+from uncluttered.core.providers.router import RouterProvider
+from uncluttered.core.repair import parse_lenient
+from uncluttered.core.screening import (
+    HeuristicScreener,
+    is_miss,
+    record_screening,
+    screen_page,
+    screening_rates,
+)
+
+RECIPE_PAGE = """Classic Carbonara
+
+Ingredients
+- 200 g spaghetti
+- 2 eggs
+- 50 g pecorino
+- 100 g guanciale
+
+Instructions
+1. Boil the pasta.
+2. Fry the guanciale.
+3. Toss with eggs and cheese.
+"""
+
+
+class TestHeuristicScreener:
+    def test_recipe_page_passes(self):
+        assert HeuristicScreener().screen("Classic Carbonara", RECIPE_PAGE)
+
+    def test_roundup_rejected(self):
+        text = "Our favourite pasta dishes, from carbonara to cacio e pepe."
+        assert not HeuristicScreener().screen("25 Best Pasta Recipes", text)
+
+    def test_paywall_rejected(self):
+        text = "Carbonara. Subscribe to continue reading this recipe."
+        assert not HeuristicScreener().screen("Carbonara", text)
+
+
+class FakeBackend(LLMProvider):
+    name = "fake"
+
+    def __init__(self, model: str):
+        self._model = model
+
+    def _complete(self, system_prompt, context, response_model, deadline=None):
+        raise NotImplementedError
+
+
+class BrokenScreener(HeuristicScreener):
+    def screen(self, title, content):
+        raise RuntimeError("classifier crashed")
+
+
+class TestScreenPage:
+    def test_returns_verdict(self):
+        assert not screen_page(HeuristicScreener(), "25 Best Pasta Recipes", "pasta")
+
+    def test_screener_error_keeps_page(self):
+        assert screen_page(BrokenScreener(), "Carbonara", RECIPE_PAGE)
+
+
+class TestIsMiss:
+    def test_invalid_output_is_a_miss(self):
+        with pytest.raises(ValidationError) as invalid:
+            Recipe.model_validate({"title": "Carbonara"})
+        with pytest.raises(ValueError) as unparseable:
+            parse_lenient("no json here")
+        assert is_miss(invalid.value)
+        assert is_miss(unparseable.value)
+
+    def test_other_errors_are_not_misses(self):
+        assert not is_miss(ValueError("OPENAI_API_KEY environment variable is required"))
+        assert not is_miss(RuntimeError("connection reset"))
+
+
+class TestRecordScreening:
+    @pytest.fixture
+    def counted(self, monkeypatch):
+        counts = []
+        monkeypatch.setattr(screening, "increment_provider_stat", lambda *args: counts.append(args))
+        return counts
+
+    def test_counted_under_the_backend_that_extracted(self, counted):
+        call = ExtractionCall(
+            provider="openai", model="gpt-4o-mini", usage=Usage(), latency_ms=1, outcome="ok"
+        )
+        record_screening(True, hit=True, call=call)
+        assert counted == [("openai", "gpt-4o-mini", "screen_pass_hit")]
+
+    def test_skipped_page_goes_to_top_route(self, counted, monkeypatch):
+        slow, fast = FakeBackend("slow"), FakeBackend("fast")
+        provider = RouterProvider([(slow, 1.0), (fast, 1.0)])
+        provider.routes[0].latency, provider.routes[1].latency = 5.0, 1.0
+        monkeypatch.setattr(screening, "get_provider", lambda: provider)
+
+        record_screening(False, hit=None)
+        assert counted == [("fake", "fast", "screen_reject_skipped")]
+
+
+class TestScreeningRates:
+    def test_no_data(self):
+        assert screening_rates({}) == (None, None)
+
+    def test_recall_scales_audited_rejections(self):
+        counts = {
+            "screen_pass_hit": 8,
+            "screen_pass_miss": 2,
+            "screen_reject_hit": 1,
+            "screen_reject_miss": 1,
+            "screen_reject_skipped": 18,
+        }
+        precision, recall = screening_rates(counts)
+        assert precision == 0.8
+        # 1 of 2 audited rejections was a hit, so ~10 of 20 rejections are missed hits
+        assert recall == 8 / 18
@@ -0,0 +1,243 @@
+"""Tests for search result cleaning."""
+
+import random
+import re
+
+import pytest
+
+from uncluttered.core import search
+from uncluttered.core.search import MAX_CONTENT_CHARS, _clean_content
+from uncluttered.core.search_providers.base import FetchingSearchProvider, SearchHit, SearchProvider
+
+
+def reference_clean(text: str) -> str:
+    """The original whole-page cleaner that _clean_content must match."""
+    text = re.sub(r"https?://\S+", "", text)
+    text = re.sub(r"\n{3,}", "\n\n", text)
+    text = re.sub(r" {2,}", " ", text)
+    return text[:MAX_CONTENT_CHARS]
+
+
+class TestCleanContent:
+    def test_strips_urls_and_collapses_whitespace(self):
+        text = "Mix  well.\n\n\n\nSee https://example.com/x  for more"
+        assert _clean_content(text) == "Mix well.\n\nSee for more"
+
+    def test_truncates_to_limit(self):
+        assert len(_clean_content("word " * 20_000)) == MAX_CONTENT_CHARS
+
+    @pytest.mark.parametrize("seed", range(20))
+    def test_matches_whole_page_cleaner(self, seed, monkeypatch):
+        # Small chunks force runs and URLs to straddle chunk boundaries
+        monkeypatch.setattr(search, "_CHUNK_CHARS", 7)
+        rng = random.Random(seed)
+        tokens = ["word", " ", "  ", "\n", "\n\n\n", "\t", "http://a.b/c", "xhttps://q", "é"]
+        text = "".join(rng.choice(tokens) for _ in range(rng.randint(0, 400)))
+        assert _clean_content(text) == reference_clean(text)
+        assert _clean_content(text, limit=50) == reference_clean(text)[:50]
+
+    def test_long_token_without_whitespace(self, monkeypatch):
+        monkeypatch.setattr(search, "_CHUNK_CHARS", 8)
+        text = "start https://example.com/" + "a" * 100 + "  end"
+        assert _clean_content(text) == reference_clean(text)
+
+
+class TestPreprocessPages:
+    def test_worker_pool_matches_in_process(self, monkeypatch):
+        monkeypatch.setattr(search, "_MAX_PAYLOAD_CHARS", 200)
+        pages = ["short page", "word " * 1000, "https://x.y/" + "a" * 500 + " tail" * 10]
+        expected = [search._preprocess(page) for page in pages]
+
+        monkeypatch.setenv("PREPROCESS_WORKERS", "2")
+        monkeypatch.setattr(search, "_preprocess_pool", None)
+        try:
+            assert search.preprocess_pages(pages) == expected
+        finally:
+            search._shutdown_preprocess_pool()
+
+
+class FakeProvider(FetchingSearchProvider):
+    name = "fake"
+
+    def __init__(self, hits, pages):
+        self.hits = hits
+        self.pages = pages
+        self.searches = []
+        self.fetches = []
+
+    def search(self, query, max_results, exclude_domains=None, timeout=None, include_content=True):
+        self.searches.append(include_content)
+        return [
+            SearchHit(url, title, self.pages.get(url, "") if include_content else "snippet", score)
+            for url, title, score in self.hits
+            if not any(f"//{domain}/" in url for domain in exclude_domains or [])
+        ]
+
+    def fetch(self, urls, timeout=None):
+        self.fetches.append(urls)
+        return {url: self.pages[url] for url in urls if url in self.pages}
+
+
+class TestSearchForRecipes:
+    HITS = [
+        ("https://a.test/dal", "Dal", 0.5),
+        ("https://youtube.com/watch?v=1", "Video", 0.99),
+        ("https://saved.test/dal", "Saved", 0.9),
+        ("https://www.a.test/dal/", "Same page", 0.45),
+        ("https://b.test/dal", "Best dal", 0.8),
+        ("https://c.test/empty", "Empty", 0.7),
+        ("https://d.test/mirror", "Mirror", 0.6),
+        ("https://e.test/dal", "Backup", 0.3),
+        ("https://f.test/dal", "Spare", 0.2),
+    ]
+    PAGES = {
+        "https://a.test/dal": "Red lentils, https://x.test/ad spices",
+        "https://b.test/dal": "Yellow lentils",
+        "https://d.test/mirror": "Yellow lentils",
+        "https://e.test/dal": "Mung beans",
+        "https://f.test/dal": "Chana",
+        "https://youtube.com/watch?v=1": "Video page",
+        "https://saved.test/dal": "Saved page",
+    }
+
+    def run(self, monkeypatch, mode):
+        provider = FakeProvider(self.HITS, self.PAGES)
+        monkeypatch.setattr(search, "get_search_provider", lambda: provider)
+        monkeypatch.setenv("SEARCH_MODE", mode)
+        results = search.search_for_recipes(
+            "dal", num_results=3, exclude_urls=["https://saved.test/other"]
+        )
+        return provider, results
+
+    def test_two_phase_fetches_only_selected_pages(self, monkeypatch):
+        provider, results = self.run(monkeypatch, "two-phase")
+
+        assert provider.searches == [False]
+        # Filtered and ranked first; empty and mirrored pages are replaced
+        assert provider.fetches == [
+            ["https://b.test/dal", "https://c.test/empty", "https://d.test/mirror"],
+            ["https://a.test/dal", "https://e.test/dal"],
+        ]
+        assert [r.title for r in results] == ["Best dal", "Dal", "Backup"]
+        assert results[1].content == "Red lentils, spices"
+
+    def test_single_mode_matches_two_phase_results(self, monkeypatch):
+        provider, single = self.run(monkeypatch, "single")
+        _, two_phase = self.run(monkeypatch, "two-phase")
+
+        assert provider.searches == [True]
+        assert provider.fetches == []
+        assert {r.url for r in single} == {r.url for r in two_phase}
+
+    def test_single_mode_is_the_default(self, monkeypatch):
+        provider = FakeProvider(self.HITS, self.PAGES)
+        monkeypatch.setattr(search, "get_search_provider", lambda: provider)
+        monkeypatch.delenv("SEARCH_MODE", raising=False)
+
+        search.search_for_recipes("dal", num_results=3)
+
+        assert provider.searches == [True]
+        assert provider.fetches == []
+
+    def test_two_phase_needs_a_fetching_provider(self, monkeypatch):
+        hits, pages = self.HITS, self.PAGES
+        searches = []
+
+        class SearchOnly(SearchProvider):
+            name = "search-only"
+
+            def search(self, query, max_results, exclude_domains=None, **kwargs):
+                searches.append(kwargs.get("include_content", True))
+                return [
+                    SearchHit(url, title, pages.get(url, ""), score) for url, title, score in hits
+                ]
+
+        monkeypatch.setattr(search, "get_search_provider", SearchOnly)
+        monkeypatch.setenv("SEARCH_MODE", "two-phase")
+
+        results = search.search_for_recipes("dal", num_results=3)
+
+        assert searches == [True]
+        assert [r.title for r in results] == ["Saved", "Best dal", "Dal"]
+
+    def test_unknown_mode(self, monkeypatch):
+        with pytest.raises(ValueError, match="SEARCH_MODE"):
+            self.run(monkeypatch, "eager")
+
+
+class VariantProvider(FakeProvider):
+    """Returns different hits for each query; "authentic" searches fail."""
+
+    def __init__(self, hits_by_query, pages):
+        super().__init__([], pages)
+        self.hits_by_query = hits_by_query
+        self.queries = []
+
+    def search(self, query, max_results, exclude_domains=None, timeout=None, include_content=True):
+        self.queries.append(query)
+        if query.startswith("authentic"):
+            raise RuntimeError("rate limited")
+        self.hits = self.hits_by_query.get(query, [])
+        return super().search(query, max_results, exclude_domains, timeout, include_content)
+
+
+class TestQueryExpansion:
+    def test_variants(self):
+        assert search.query_variants("Best Carbonara") == [
+            "Best Carbonara",
+            "Carbonara",
+            "easy Carbonara",
+            "authentic Carbonara",
+        ]
+        assert search.query_variants("easy dal") == ["easy dal", "dal", "authentic dal"]
+
+    @pytest.mark.parametrize("mode", ["two-phase", "single"])
+    def test_fills_results_from_variant_searches(self, monkeypatch, mode):
+        pages = {f"https://{name}.test/": f"{name} page" for name in "abcde"}
+        provider = VariantProvider(
+            {
+                "Best Carbonara": [
+                    ("https://a.test/", "A", 0.4),
+                    ("https://youtube.com/x", "Video", 0.9),
+                ],
+                "Carbonara": [
+                    ("https://a.test/?utm_source=x", "A again", 0.95),
+                    ("https://b.test/", "B", 0.7),
+                    ("https://c.test/", "C", 0.5),
+                ],
+                "easy Carbonara": [("https://d.test/", "D", 0.6)],
+            },
+            pages,
+        )
+        monkeypatch.setattr(search, "get_search_provider", lambda: provider)
+        monkeypatch.setenv("SEARCH_MODE", mode)
+        monkeypatch.setenv("SEARCH_MAX_CALLS", "4")
+
+        results = search.search_for_recipes("Best Carbonara", num_results=3)
+
+        assert provider.queries[0] == "Best Carbonara"
+        # The failed "authentic" search only loses its own hits
+        assert sorted(provider.queries[1:]) == [
+            "Carbonara",
+            "authentic Carbonara",
+            "easy Carbonara",
+        ]
+        # Ranked by score; the copy of a.test found by a variant is ignored.
+        # Two-phase fetches only the two pages still needed.
+        expected = ["B", "D", "A"] if mode == "two-phase" else ["B", "D", "C"]
+        assert [r.title for r in results] == expected
+        if mode == "two-phase":
+            assert provider.fetches == [["https://a.test/"], ["https://b.test/", "https://d.test/"]]
+
+    def test_search_calls_are_capped(self, monkeypatch):
+        provider = VariantProvider({}, {})
+        monkeypatch.setattr(search, "get_search_provider", lambda: provider)
+        monkeypatch.setenv("SEARCH_MAX_CALLS", "2")
+
+        assert search.search_for_recipes("Best Carbonara", num_results=3) == []
+        assert provider.queries == ["Best Carbonara", "Carbonara"]
+
+        provider.queries = []
+        monkeypatch.setenv("SEARCH_MAX_CALLS", "1")
+        search.search_for_recipes("Best Carbonara", num_results=3)
+        assert provider.queries == ["Best Carbonara"]
@@ -0,0 +1,106 @@
+"""Tests for the local similarity index."""
+
+import pytest
+
+from uncluttered.core import similarity
+
+from .conftest import make_recipe
+
+pytest.importorskip("numpy")
+
+
+@pytest.fixture(autouse=True)
+def index_path(tmp_path, monkeypatch):
+    path = tmp_path / "similarity.idx"
+    monkeypatch.setattr(similarity, "_get_index_path", lambda: path)
+    return path
+
+
+LIBRARY = [
+    make_recipe(
+        "Spaghetti Carbonara",
+        ingredients=["spaghetti", "eggs", "pecorino", "guanciale"],
+        recipe_id=1,
+    ),
+    make_recipe(
+        "Classic Carbonara",
+        ingredients=["spaghetti", "egg yolks", "guanciale", "black pepper"],
+        recipe_id=2,
+    ),
+    make_recipe(
+        "Chocolate Chip Cookies",
+        ingredients=["flour", "butter", "sugar", "chocolate chips"],
+        recipe_id=3,
+    ),
+    make_recipe("Tomato Soup", ingredients=["tomatoes", "onion", "garlic", "stock"], recipe_id=4),
+]
+
+
+def test_related_recipe_ranks_first():
+    similarity.rebuild_index(LIBRARY)
+
+    matches = similarity.find_similar(LIBRARY[0], limit=3)
+
+    assert matches[0][0] == 2
+    assert all(recipe_id != 1 for recipe_id, _ in matches)
+    assert all(0 < score <= 1 for _, score in matches)
+
+
+def test_limit_below_one_returns_nothing():
+    similarity.rebuild_index(LIBRARY)
+
+    assert similarity.find_similar(LIBRARY[0], limit=0) == []
+    assert similarity.find_similar(LIBRARY[0], limit=-1) == []
+
+
+def test_index_and_remove_are_incremental(index_path):
+    for recipe in LIBRARY:
+        similarity.index_recipe(recipe)
+    # Re-indexing a recipe replaces its vector rather than duplicating it
+    similarity.index_recipe(LIBRARY[1])
+    assert similarity.indexed_count() == 4
+
+    similarity.remove_recipes([2])
+
+    assert similarity.indexed_count() == 3
+    assert 2 not in dict(similarity.find_similar(LIBRARY[0]))
+    # Enough tombstones trigger a compaction, leaving only live records
+    assert index_path.stat().st_size == 3 * similarity._record_dtype().itemsize
+
+
+def test_empty_index():
+    assert similarity.indexed_count() == 0
+    assert similarity.find_similar(LIBRARY[0]) == []
+
+    similarity.rebuild_index(LIBRARY)
+    similarity.clear_index()
+
+    assert similarity.indexed_count() == 0
+
+
+def test_matches_tf_idf_cosine_and_reweights_as_library_grows():
+    np = pytest.importorskip("numpy")
+    similarity.rebuild_index(LIBRARY[:2])
+    basis = similarity._load_weights()[1]
+    for recipe in LIBRARY[2:]:
+        similarity.index_recipe(recipe)
+    # Doubling the library re-weights every record
+    assert similarity._load_weights()[1] > basis
+
+    raw = np.array([similarity.vectorize(r) for r in LIBRARY])
+    weights = similarity._idf(raw)
+    weighted = raw * weights
+    expected = (
+        weighted @ weighted[0] / (np.linalg.norm(weighted, axis=1) * np.linalg.norm(weighted[0]))
+    )
+    for recipe_id, score in similarity.find_similar(LIBRARY[0], limit=3):
+        assert score == pytest.approx(expected[recipe_id - 1], rel=1e-4)
+
+
+def test_index_without_weights_is_rebuilt(index_path):
+    similarity.rebuild_index(LIBRARY)
+    similarity._weights_path().unlink()
+
+    assert similarity.indexed_count() == 0
+    similarity.index_recipe(LIBRARY[0])
+    assert similarity.indexed_count() == 1
@@ -0,0 +1,61 @@
+"""Tests for single-flight call coalescing."""
+
+import threading
+import time
+
+import pytest
+
+from uncluttered.core.singleflight import SingleFlight
+
+
+class TestSingleFlight:
+    def test_returns_result(self):
+        flight = SingleFlight()
+        assert flight.do("key", lambda: 42) == 42
+
+    def test_concurrent_calls_share_one_execution(self):
+        flight = SingleFlight()
+        calls = []
+
+        def work():
+            calls.append(1)
+            time.sleep(0.1)
+            return "done"
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(flight.do("key", work)))
+            for _ in range(5)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(calls) == 1
+        assert results == ["done"] * 5
+
+    def test_error_propagates_and_key_is_released(self):
+        flight = SingleFlight()
+
+        def fail():
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            flight.do("key", fail)
+        assert flight.do("key", lambda: "retry") == "retry"
+
+    def test_claimed_key_is_shared_once_resolved(self):
+        flight = SingleFlight()
+        assert flight.claim("key")
+        assert not flight.claim("key")
+
+        results = []
+        follower = threading.Thread(target=lambda: results.append(flight.do("key", lambda: "own")))
+        follower.start()
+        time.sleep(0.05)
+        flight.resolve("key", "claimed")
+        follower.join()
+
+        assert results == ["claimed"]
+        assert flight.claim("key")
@@ -0,0 +1,76 @@
+"""Tests for streaming JSONL export and import."""
+
+import gzip
+import json
+
+import pytest
+
+from uncluttered.core import database, transfer
+
+from .conftest import make_recipe
+
+pytestmark = pytest.mark.usefixtures("temp_db")
+
+
+def test_iter_recipes_reads_in_chunks():
+    for i in range(5):
+        database.add_recipe(make_recipe(f"Recipe {i}", f"https://example.com/{i}", term="pasta"))
+    database.link_recipe_to_search_term(1, "dinner")
+
+    records = list(database.iter_recipes(chunk_size=2))
+
+    assert [recipe.title for recipe, _ in records] == [f"Recipe {i}" for i in range(5)]
+    assert records[0][1] == ["pasta", "dinner"]
+
+
+def test_round_trip_through_gzip(tmp_path, use_database):
+    database.add_recipe(make_recipe("Carbonara", "https://example.com/carbonara", term="pasta"))
+    database.add_recipe(make_recipe("Cacio e Pepe", None, term="roman pasta"))
+    database.link_recipe_to_search_term(1, "roman pasta")
+    path = tmp_path / "library.jsonl.gz"
+
+    assert transfer.export_library(path) == 2
+    exported = [json.loads(line) for line in gzip.open(path, "rt")]
+    assert exported[0]["search_terms"] == ["pasta", "roman pasta"]
+    assert "id" not in exported[0]
+
+    (tmp_path / "target").mkdir()
+    use_database(tmp_path / "target")
+    result = transfer.import_library(path, batch_size=1)
+
+    assert result == transfer.ImportResult(imported=2)
+    assert [r.title for r in database.get_recipes_by_search_term("roman pasta")] == [
+        "Carbonara",
+        "Cacio e Pepe",
+    ]
+    assert database.get_recipe_by_slug("carbonara").trust_score.score == 80
+    assert database.check_search_term_summary() == []
+
+
+def test_import_deduplicates_by_url_and_slug(tmp_path):
+    lines = [
+        make_recipe("Carbonara", "https://example.com/carbonara?utm_source=x", term="pasta"),
+        make_recipe("Carbonara", "https://www.example.com/carbonara", term="dinner"),
+        make_recipe("Cacio e Pepe", None, term="pasta"),
+        make_recipe("Cacio e Pepe", None, term="dinner"),
+        # Same slug, different source: a different recipe
+        make_recipe("Carbonara", "https://other.example.com/carbonara", term="pasta"),
+    ]
+    path = tmp_path / "library.jsonl"
+    with open(path, "w") as f:
+        for recipe in lines:
+            f.write(recipe.model_dump_json(by_alias=True) + "\n")
+        f.write("not json\n")
+        f.write('{"title": "No ingredients"}\n')
+
+    result = transfer.import_library(path)
+
+    assert result == transfer.ImportResult(imported=3, duplicates=2, invalid=2)
+    assert {r.slug for r in database.get_recipes_by_search_term("dinner")} == {
+        "carbonara",
+        "cacio-e-pepe",
+    }
+    assert database.get_recipe_by_slug("carbonara-2") is not None
+
+    assert transfer.import_library(path) == transfer.ImportResult(duplicates=5, invalid=2)
+    assert database.count_recipes() == 3
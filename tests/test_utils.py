@@ -1,6 +1,18 @@
 """Tests for core utility functions."""
 
-from uncluttered.core.utils import generate_slug, make_unique_slug
+from datetime import timedelta
+
+import pytest
+
+from uncluttered.core.utils import (
+    canonicalize_url,
+    format_page_cursor,
+    generate_slug,
+    normalize_query,
+    parse_duration,
+    parse_page_cursor,
+    query_key,
+)
 
 
 class TestGenerateSlug:
@@ -26,17 +38,73 @@ class TestGenerateSlug:
         assert generate_slug("") == ""
 
 
-class TestMakeUniqueSlug:
-    def test_no_conflict(self):
-        assert make_unique_slug("carbonara", set()) == "carbonara"
+class TestNormalizeQuery:
+    def test_case_folded(self):
+        assert normalize_query("Best Carbonara") == "best carbonara"
+
+    def test_whitespace_collapsed(self):
+        assert normalize_query("  best   carbonara\t") == "best carbonara"
+
+
+class TestQueryKey:
+    def test_spellings_share_a_key(self):
+        keys = {
+            query_key(q)
+            for q in ["Chocolate-chip cookies", "chocolate chip cookie", "cookies, chocolate chip!"]
+        }
+        assert len(keys) == 1
+
+    @pytest.mark.parametrize(
+        "plural, singular",
+        [("berries", "berry"), ("pies", "pie"), ("tomatoes", "tomato"), ("peaches", "peach")],
+    )
+    def test_plurals(self, plural, singular):
+        assert query_key(plural) == query_key(singular)
+
+    def test_keeps_distinct_queries_apart(self):
+        assert query_key("Crème brûlée") == query_key("creme brulee")
+        assert query_key("hummus") == "hummus"
+        assert query_key("best carbonara") != query_key("carbonara")
+
+
+class TestCanonicalizeUrl:
+    def test_scheme_and_prefix_normalized(self):
+        assert canonicalize_url("http://www.example.com/pasta") == "https://example.com/pasta"
+        assert canonicalize_url("https://m.example.com/pasta") == "https://example.com/pasta"
+
+    def test_trailing_slash_and_fragment_dropped(self):
+        assert canonicalize_url("https://example.com/pasta/#comments") == (
+            "https://example.com/pasta"
+        )
+
+    def test_tracking_params_dropped(self):
+        url = "https://example.com/pasta?utm_source=news&fbclid=abc&page=2"
+        assert canonicalize_url(url) == "https://example.com/pasta?page=2"
+
+    def test_query_params_sorted(self):
+        assert canonicalize_url("https://example.com/?b=2&a=1") == "https://example.com?a=1&b=2"
+
+    def test_host_lowercased_and_default_port_dropped(self):
+        assert canonicalize_url("https://Example.COM:443/Pasta") == "https://example.com/Pasta"
+
+
+class TestParseDuration:
+    def test_units(self):
+        assert parse_duration("30m") == timedelta(minutes=30)
+        assert parse_duration("24h") == timedelta(hours=24)
+        assert parse_duration("7d") == timedelta(days=7)
+        assert parse_duration("2W") == timedelta(weeks=2)
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            parse_duration("yesterday")
 
-    def test_single_conflict(self):
-        assert make_unique_slug("carbonara", {"carbonara"}) == "carbonara-2"
 
-    def test_multiple_conflicts(self):
-        existing = {"carbonara", "carbonara-2", "carbonara-3"}
-        assert make_unique_slug("carbonara", existing) == "carbonara-4"
+class TestPageCursor:
+    def test_round_trip(self):
+        assert parse_page_cursor(format_page_cursor(87, 1234)) == (87, 1234)
+        assert parse_page_cursor(format_page_cursor(None, 5)) == (None, 5)
 
-    def test_unrelated_slugs_ignored(self):
-        existing = {"pasta", "risotto"}
-        assert make_unique_slug("carbonara", existing) == "carbonara"
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            parse_page_cursor("87")